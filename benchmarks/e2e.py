@@ -0,0 +1,150 @@
+"""
+End-to-end benchmarks of the `odhg` command against a local stand-in
+OpenDota server (tests/standin.py) with injected latency and faults.
+
+Each scenario runs the console entry point in a fresh interpreter with 
+a temporary home directory, and records wall time, exit status and 
+the requests/bytes served.
+
+Usage (from the repository root):
+
+    python -m benchmarks.e2e --output e2e.json
+    python -m benchmarks.e2e --scenario baseline cached
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+from odherogrid import __version__
+
+from tests.standin import Fault, StandInServer
+from tests.synthetic import generate_hero_stats
+
+
+ROOT = Path(__file__).resolve().parent.parent
+REPEAT = 3
+N_HEROES = 120
+
+# name: (faults for the first requests, fault for every later request)
+SCENARIOS: Dict[str, tuple] = {
+    "baseline": ([], None),
+    "latency": ([], Fault(latency=0.2)),
+    "503x2": ([Fault(status=503), Fault(status=503)], None),
+    "429-retry-after": ([Fault(status=429, retry_after="1")], None),
+    "truncated": ([Fault(truncate=0.5)], None),
+    "slow-stream": ([], Fault(chunk_delay=0.005)),
+    "cached": ([], None),   # stats cached by a previous run -> 304
+    "offline": ([], Fault(status=503)),  # stats cached, API down
+}
+# Scenarios that need hero stats cached by an unmeasured run first
+WARM = {"cached", "offline"}
+
+
+def make_home(tmp: Path) -> Path:
+    home = tmp / "home"
+    cfg_dir = home / "Steam/userdata/1/570/remote/cfg"
+    cfg_dir.mkdir(parents=True)
+    (home / ".odhg").mkdir()
+    config = {
+        "path": str(cfg_dir),
+        "brackets": [7],
+        "layout": 1,
+        "config_name": "Benchmark",
+        "ascending": False,
+    }
+    (home / ".odhg/config.yml").write_text(yaml.dump(config))
+    return home
+
+
+def run_odhg(home: Path, api_url: str) -> subprocess.CompletedProcess:
+    env = dict(
+        os.environ, 
+        HOME=str(home), 
+        ODHG_OPENDOTA_URL=api_url, 
+        PYTHONPATH=str(ROOT),
+    )
+    return subprocess.run(
+        [sys.executable, "-c", "from odherogrid.odhg import main; main()", "-q"],
+        env=env, capture_output=True, text=True,
+    )
+
+
+def run_scenario(name: str, repeat: int = REPEAT) -> dict:
+    faults, default = SCENARIOS[name]
+    times, runs = [], []
+    payload = generate_hero_stats(N_HEROES)
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp, StandInServer(payload) as server:
+            home = make_home(Path(tmp))
+            if name in WARM:
+                run_odhg(home, server.api_url)
+            server.faults = [Fault(**vars(f)) for f in faults]
+            server.default_fault = default or Fault()
+            before = (server.stats.requests, server.stats.bytes_sent)
+
+            start = time.perf_counter()
+            p = run_odhg(home, server.api_url)
+            times.append(time.perf_counter() - start)
+            runs.append({
+                "exit_code": p.returncode,
+                "requests": server.stats.requests - before[0],
+                "bytes": server.stats.bytes_sent - before[1],
+                "stderr": p.stderr[-500:],
+            })
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "runs": repeat,
+        "exit_code": max(r["exit_code"] for r in runs),
+        "requests": runs[-1]["requests"],
+        "bytes": runs[-1]["bytes"],
+        "stderr": runs[-1]["stderr"] if runs[-1]["exit_code"] else "",
+    }
+
+
+def run_benchmarks(scenarios: List[str] = None, repeat: int = REPEAT) -> dict:
+    return {
+        "meta": {
+            "odherogrid": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now().isoformat(),
+        },
+        "results": {
+            name: run_scenario(name, repeat) for name in (scenarios or SCENARIOS)
+        },
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", type=Path, help="Save results as JSON.")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS))
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scenario, args.repeat)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=4))
+    for name, r in results["results"].items():
+        print(
+            f"{name:<20} {r['median']*1000:>10.1f} ms  "
+            f"exit={r['exit_code']}  requests={r['requests']}  bytes={r['bytes']}"
+        )
+    return 1 if any(r["exit_code"] for r in results["results"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Micro-benchmarks of hero ranking, grid layouts and hero grid config I/O,
+using deterministic synthetic datasets of increasing size.
+
+Usage (from the repository root):
+
+    python -m benchmarks.micro --output results.json
+    python -m benchmarks.micro --output new.json --compare results.json
+
+With --compare, exits with status 1 if any benchmark is slower than
+the baseline by more than --threshold.
+"""
+
+import argparse
+import copy
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from odherogrid import __version__
+from odherogrid.herogrid import HeroGrid, HeroGridConfig
+from odherogrid.odapi import _normalize_hero_stats
+
+from tests.synthetic import generate_hero_grid_config, generate_hero_stats
+
+
+HERO_COUNTS = [120, 1_000, 10_000]
+GRID_COUNTS = [10, 100, 1_000]
+REPEAT = 5
+BRACKET = 7
+THRESHOLD = 1.25 # slowdown ratio considered a regression
+
+
+def bench(func: Callable[[], None], 
+          setup: Callable[[], None] = None, 
+          repeat: int = REPEAT
+         ) -> Dict[str, float]:
+    """Times `func`, excluding time spent in `setup` (called before each run).
+    Returns timings in seconds."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times), 
+        "median": statistics.median(times), 
+        "runs": repeat
+    }
+
+
+def make_config(path: Path, layout: int = 1) -> dict:
+    return {
+        "path": path,
+        "brackets": [BRACKET],
+        "layout": layout,
+        "config_name": "Benchmark",
+        "ascending": False,
+    }
+
+
+def bench_heroes(n_heroes: int, repeat: int, tmp: Path) -> Dict[str, dict]:
+    """Benchmarks that scale with the number of heroes."""
+    results = {}
+    heroes = _normalize_hero_stats(generate_hero_stats(n_heroes))
+    config = make_config(tmp / "unused.json")
+    h = HeroGrid(list(heroes), BRACKET, config)
+
+    def shuffle():
+        h.heroes = list(heroes)
+    results["sort_heroes_by_winrate"] = bench(h.sort_heroes_by_winrate, shuffle, repeat)
+
+    h.sort_heroes_by_winrate()
+    for layout in ["main_stat", "single", "attack", "role"]:
+        results[f"_get_grid_{layout}"] = bench(getattr(h, f"_get_grid_{layout}"), repeat=repeat)
+
+    grid = generate_hero_grid_config(1, [hero["id"] for hero in heroes])["configs"][0]
+    results["modify"] = bench(lambda: h.modify(grid), repeat=repeat)
+    return {f"{name}[heroes={n_heroes}]": r for name, r in results.items()}
+
+
+def bench_grids(n_grids: int, repeat: int, tmp: Path) -> Dict[str, dict]:
+    """Benchmarks that scale with the number of grids in hero_grid_config.json."""
+    results = {}
+    heroes = _normalize_hero_stats(generate_hero_stats(120))
+    path = tmp / f"hero_grid_config_{n_grids}.json"
+    path.write_text(json.dumps(
+        generate_hero_grid_config(n_grids, [hero["id"] for hero in heroes])
+    ))
+    h = HeroGridConfig(heroes, make_config(path))
+    results["load_hero_grid_config"] = bench(h.load_hero_grid_config, repeat=repeat)
+    
+    out = tmp / "out.json"
+    results["save_hero_grid_config"] = bench(
+        lambda: h.save_hero_grid_config(path=out), repeat=repeat
+    )
+
+    # Adding a grid that doesn't exist yet (worst case, scans every grid)
+    original = h.hero_grid_config
+    grid = HeroGrid(h.get_ranking(BRACKET), BRACKET, h.config, ranked=True).create()
+    def reset():
+        h.hero_grid_config = copy.copy(original)
+        h.hero_grid_config["configs"] = list(original["configs"])
+    results["add_hero_grid"] = bench(lambda: h.add_hero_grid(grid), reset, repeat)
+    return {f"{name}[grids={n_grids}]": r for name, r in results.items()}
+
+
+def run_benchmarks(hero_counts: List[int] = HERO_COUNTS, 
+                   grid_counts: List[int] = GRID_COUNTS, 
+                   repeat: int = REPEAT
+                  ) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in hero_counts:
+            results.update(bench_heroes(n, repeat, Path(tmp)))
+        for n in grid_counts:
+            results.update(bench_grids(n, repeat, Path(tmp)))
+    return {
+        "meta": {
+            "odherogrid": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now().isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> List[str]:
+    """Prints a comparison of median timings and returns the names
+    of benchmarks that regressed."""
+    regressions = []
+    for name, r in results["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<50} {r['median']*1000:>10.3f} ms  (new)")
+            continue
+        ratio = r["median"] / base["median"] if base["median"] else 1.0
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<50} {r['median']*1000:>10.3f} ms  {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", type=Path, help="Save results as JSON.")
+    parser.add_argument("--compare", type=Path, help="Baseline results (JSON).")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--heroes", type=int, nargs="+", default=HERO_COUNTS)
+    parser.add_argument("--grids", type=int, nargs="+", default=GRID_COUNTS)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.heroes, args.grids, args.repeat)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=4))
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        return 1 if compare(results, baseline, args.threshold) else 0
+    for name, r in results["results"].items():
+        print(f"{name:<50} {r['median']*1000:>10.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
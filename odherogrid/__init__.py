@@ -1,8 +1,41 @@
 __version__ = '0.3.1'
 
-from .cli import *
-from .config import *
-from .enums import *
-from .odapi import *
-from .odhg import *
-from .resources import *
+import importlib
+
+# Submodules are imported on first attribute access rather than up front,
+# so that `import odherogrid` (and by extension the `odhg` console script)
+# does not pay for httpx, yaml, etc. before they are needed.
+# Listed in the order they used to be star-imported; later modules take
+# precedence when names collide.
+_SUBMODULES = ["cli", "config", "enums", "models", "odapi", "odhg", "resources"]
+
+
+def _public_names(module) -> list:
+    return getattr(
+        module, "__all__", [n for n in vars(module) if not n.startswith("_")]
+    )
+
+
+def __getattr__(name: str):
+    if name == "__all__":
+        # Computed (once) on `from odherogrid import *`, which needs every
+        # submodule anyway. Same names as the former star-imports.
+        names = list(_SUBMODULES)
+        for modname in _SUBMODULES:
+            module = importlib.import_module(f".{modname}", __name__)
+            names.extend(n for n in _public_names(module) if n not in names)
+        globals()["__all__"] = names
+        return names
+    if name.startswith("__"):
+        raise AttributeError(name)
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    for modname in reversed(_SUBMODULES):
+        module = importlib.import_module(f".{modname}", __name__)
+        if name in _public_names(module):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + _SUBMODULES)
@@ -0,0 +1,176 @@
+"""
+Library API for generating hero grids, e.g. from a web service.
+
+Unlike the CLI, these functions do no I/O and never print or prompt.
+Invalid arguments raise subclasses of `ODHGError`. Arguments are never
+modified, so the functions can be called concurrently from several threads.
+
+    ranking = rank(hero_stats, "5-7")   # hero_stats: OpenDota /api/heroStats
+    grid = build_grid(ranking, "role")
+    hero_grid_config = merge_into(hero_grid_config, [grid])
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from .cli.parse import LAYOUTS, find_argument_in_mapping, parse_arg_bracket
+from .enums import Bracket, Layout
+from .herogrid import HeroGrid, order_by_ranking
+from .models import Hero, HeroGridModel
+from .resources import get_new_hero_grid_config
+from .settings import DEFAULT_GRID_NAME
+from .validate import InvalidGrid, ValidationReport, validate_grid, validate_grids
+
+# Heroes are currently only ranked by winrate
+METRICS = ("winrate",)
+
+
+class ODHGError(Exception):
+    """Base class of the exceptions raised by this module."""
+
+
+class InvalidBracket(ODHGError, ValueError):
+    pass
+
+
+class InvalidLayout(ODHGError, ValueError):
+    pass
+
+
+class InvalidMetric(ODHGError, ValueError):
+    pass
+
+
+class InvalidHeroStats(ODHGError, ValueError):
+    pass
+
+
+class InvalidGridConfig(ODHGError, ValueError):
+    """Raised for hero grid configs with grids that can't be repaired.
+    `report` lists the problems that were found."""
+    def __init__(self, message: str, report: ValidationReport = None) -> None:
+        super().__init__(message)
+        self.report = report
+
+
+@dataclass(frozen=True)
+class Ranking:
+    """Heroes ranked by a metric in a bracket. Returned by `rank()`."""
+    bracket: Union[int, str]
+    metric: str
+    ascending: bool
+    heroes: Tuple[Hero, ...]
+
+    @property
+    def hero_ids(self) -> List[int]:
+        return [hero.id for hero in self.heroes]
+
+
+def parse_bracket(bracket: Union[int, str, Bracket]) -> Union[int, str]:
+    b = parse_arg_bracket(bracket)
+    if b is None:
+        raise InvalidBracket(f"No such bracket: {bracket!r}")
+    if b == Bracket.ALL:
+        raise InvalidBracket("Bracket 'all' can't be ranked. Rank each bracket instead.")
+    return b
+
+
+def parse_layout(layout: Union[int, str, Layout]) -> int:
+    lay = find_argument_in_mapping(layout, LAYOUTS)
+    if lay is None:
+        raise InvalidLayout(f"No such layout: {layout!r}")
+    return lay
+
+
+def rank(stats: Iterable[Union[Hero, dict]],
+         bracket: Union[int, str, Bracket] = Bracket.DEFAULT,
+         metric: str = "winrate",
+         *,
+         ascending: bool = False,
+         previous: Sequence[int] = None,
+         hysteresis: float = 0.0
+        ) -> Ranking:
+    """Ranks heroes in a bracket (or aggregate bracket, e.g. "5-7").
+
+    `stats` are heroes or OpenDota hero stats objects. If `previous`
+    (hero IDs of a previous ranking) is given, heroes are re-ranked starting
+    from it, and with `hysteresis` (percentage points) heroes keep their
+    previous order unless their winrates differ by more than it.
+    """
+    b = parse_bracket(bracket)
+    if metric not in METRICS:
+        raise InvalidMetric(f"No such metric: {metric!r}. Available: {', '.join(METRICS)}")
+    try:
+        heroes = [Hero.from_json(h) for h in stats]
+    except (AttributeError, KeyError, TypeError, OverflowError) as e:
+        raise InvalidHeroStats(f"Invalid hero stats: {e!r}") from e
+    if previous:
+        order_by_ranking(heroes, list(previous))
+    config = {
+        "layout": Layout.DEFAULT.value,
+        "ascending": ascending,
+        "config_name": DEFAULT_GRID_NAME,
+        "hysteresis": hysteresis,
+    }
+    heroes = HeroGrid(heroes, b, config).heroes
+    return Ranking(b, metric, ascending, tuple(heroes))
+
+
+def build_grid(ranking: Ranking,
+               layout: Union[int, str, Layout] = Layout.DEFAULT,
+               *,
+               name: str = DEFAULT_GRID_NAME,
+               name_layout: bool = False,
+               name_direction: bool = False
+              ) -> HeroGridModel:
+    """Creates a hero grid from a ranking. The grid is named after `name` and
+    the bracket, e.g. 'OpenDota Hero Winrates (Divine)'. See: `HeroGrid.create()`"""
+    config = {
+        "layout": parse_layout(layout),
+        "ascending": ranking.ascending,
+        "config_name": name,
+    }
+    h = HeroGrid(list(ranking.heroes), ranking.bracket, config, ranked=True)
+    return h.create(name_layout=name_layout, name_direction=name_direction)
+
+
+def merge_into(hero_grid_config: Optional[dict],
+               grids: Iterable[Union[HeroGridModel, dict]]
+              ) -> dict:
+    """Returns a copy of a parsed hero_grid_config.json (or a new config if
+    None), where grids with the same names as `grids` are replaced, and
+    other grids are appended.
+
+    Fixable problems in the config are repaired. Raises `InvalidGridConfig`
+    if it contains grids that can't be repaired.
+    """
+    if hero_grid_config is None:
+        hero_grid_config = get_new_hero_grid_config()
+    if not isinstance(hero_grid_config, dict):
+        raise InvalidGridConfig("Hero grid config is not an object")
+    try:
+        configs, report = validate_grids(hero_grid_config.get("configs", []))
+    except InvalidGrid as e:
+        raise InvalidGridConfig(f"Invalid hero grid config: {e}") from e
+    if report.quarantined:
+        raise InvalidGridConfig(
+            f"Hero grid config has {len(report.quarantined)} grid(s) "
+            f"that can't be repaired: {'; '.join(report.problems)}", report
+        )
+
+    index = {}
+    for i, grid in enumerate(configs):
+        index.setdefault(grid.config_name, i)
+    for grid in grids:
+        if not isinstance(grid, HeroGridModel):
+            try:
+                grid = validate_grid(grid, [])
+            except InvalidGrid as e:
+                raise InvalidGridConfig(f"Invalid grid: {e}") from e
+        idx = index.get(grid.config_name)
+        if idx is None:
+            index[grid.config_name] = len(configs)
+            configs.append(grid)
+        else:
+            configs[idx] = grid
+    return dict(hero_grid_config, configs=[g.to_json() for g in configs])
@@ -0,0 +1,293 @@
+"""
+Grid generation for many users in one process (`odhg batch CONFIGS`).
+
+Hero stats are fetched once, every distinct (bracket, metric, direction)
+is ranked once and every distinct grid is built once. Each user's
+hero_grid_config.json is then read, merged and written on a bounded
+worker pool. Users who share a hero_grid_config.json are written one
+after another by the same worker. A user's failure is reported in their result, and doesn't
+affect the other users.
+
+Example CONFIGS file (`defaults` are optional, and apply to every user):
+
+    defaults:
+      brackets: [7]
+      layout: mainstat
+    users:
+      alice:
+        path: /srv/alice/userdata/123/570/remote/cfg
+        brackets: [5-7, 8]
+        layout: [role, single]
+      bob:
+        path: /srv/bob/userdata/456/570/remote/cfg
+        ascending: true
+        config_name: Bob's Winrates
+"""
+
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import click
+
+from .api import ODHGError, build_grid, merge_into, parse_bracket, parse_layout, rank
+from .cli.parse import parse_arg_bracket
+from .enums import Bracket, Layout
+from .models import Hero, HeroGridModel
+from .profiling import count, span
+from .settings import DEFAULT_GRID_NAME
+
+DEFAULT_WORKERS = 8
+
+
+class InvalidBatchConfig(ODHGError, ValueError):
+    pass
+
+
+@dataclass
+class BatchResult:
+    user: str
+    path: Optional[Path] = None
+    grids: List[str] = field(default_factory=list) # names of the user's grids
+    written: bool = False # False if the user's grids were unchanged
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# (bracket, metric, ascending, layout, config_name, name_layout, name_direction)
+GridSpec = Tuple[Union[int, str], str, bool, int, str, bool, bool]
+
+
+@dataclass
+class _Job:
+    result: BatchResult
+    specs: List[GridSpec]
+    grids: List[HeroGridModel] = field(default_factory=list)
+
+
+def load_batch_config(path: Union[str, Path]) -> Dict[str, dict]:
+    """Loads a CONFIGS file and returns the config of each user,
+    with `defaults` applied."""
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise InvalidBatchConfig(f"{path} is not valid YAML: {e}") from e
+    if not isinstance(data, dict) or not data.get("users"):
+        raise InvalidBatchConfig(f"{path} has no 'users'")
+    defaults = data.get("defaults") or {}
+    users = data["users"]
+    if isinstance(users, list):
+        users = {str(u.get("name") or i) if isinstance(u, dict) else str(i): u
+                 for i, u in enumerate(users, 1)}
+    if not isinstance(defaults, dict) or not isinstance(users, dict):
+        raise InvalidBatchConfig(f"{path}: 'defaults' and 'users' must be mappings")
+    bad = _find_invalid_key(defaults)
+    if bad is not None:
+        raise InvalidBatchConfig(f"{path}: 'defaults' has an invalid key: {bad!r}")
+    return { # invalid keys of a user's config are reported by generate_many()
+        str(user): {**defaults, **config} if isinstance(config, dict) else config
+        for user, config in users.items()
+    }
+
+
+def _find_invalid_key(config: dict) -> Optional[object]:
+    """Returns the first key of `config` that isn't a string, if any."""
+    return next((k for k in config if not isinstance(k, str)), None)
+
+
+def _get_brackets(brackets: object) -> List[Union[int, str]]:
+    if brackets is None:
+        brackets = []
+    elif not isinstance(brackets, (list, tuple)):
+        brackets = [brackets]
+    parsed = []
+    for b in brackets or [Bracket.DEFAULT.value]:
+        if parse_arg_bracket(b) == Bracket.ALL:
+            parsed.extend(b.value for b in Bracket if b != Bracket.ALL)
+        else:
+            parsed.append(parse_bracket(b))
+    return list(dict.fromkeys(parsed))
+
+
+def _get_path(path: object) -> Path:
+    if not isinstance(path, (str, Path)) or not str(path):
+        raise InvalidBatchConfig("'path' is missing")
+    p = Path(path).expanduser()
+    if p.name != "hero_grid_config.json":
+        p = p / "hero_grid_config.json"
+    return p
+
+
+def _get_job(user: str, config: object) -> _Job:
+    """Parses a user's config into the grids that should be created for them."""
+    if not isinstance(config, dict):
+        raise InvalidBatchConfig("config is not a mapping")
+    bad = _find_invalid_key(config)
+    if bad is not None:
+        raise InvalidBatchConfig(f"invalid key: {bad!r}")
+    path = _get_path(config.get("path"))
+    brackets = _get_brackets(config.get("brackets"))
+    layouts = config.get("layout")
+    if layouts is None:
+        layouts = []
+    elif not isinstance(layouts, (list, tuple)):
+        layouts = [layouts]
+    layouts = list(dict.fromkeys(parse_layout(l) for l in layouts)) or [Layout.DEFAULT.value]
+    metric = config.get("metric", "winrate")
+    name = str(config.get("config_name") or DEFAULT_GRID_NAME)
+    both_directions = bool(config.get("both_directions"))
+    directions = [False, True] if both_directions else [bool(config.get("ascending"))]
+    name_layout = len(layouts) > 1
+    specs = [
+        (bracket, metric, ascending, layout, name, name_layout, both_directions)
+        for bracket in brackets
+        for ascending in directions
+        for layout in layouts
+    ]
+    return _Job(BatchResult(user, path), specs)
+
+
+def _write_grids(path: Path, grids: List[HeroGridModel]) -> bool:
+    """Merges grids into a hero_grid_config.json. Returns False if
+    the file is unchanged, and therefore not written."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            hero_grid_config = json.load(f)
+    except FileNotFoundError:
+        hero_grid_config = None # a new file is created
+    merged = merge_into(hero_grid_config, grids)
+    if merged == hero_grid_config:
+        return False
+    data = json.dumps(merged, indent="\t")
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path) # the Dota 2 client never sees a partial file
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def _write_jobs(jobs: List[_Job]) -> None:
+    """Writes the grids of jobs that share a hero_grid_config.json, one after
+    another, so that each job's grids are merged into the file written by the 
+    previous job instead of overwriting them."""
+    for job in jobs:
+        try:
+            job.result.written = _write_grids(job.result.path, job.grids)
+        except Exception as e:
+            job.result.error = _error(e)
+
+
+def _error(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def generate_many(configs: Union[Dict[str, dict], List[dict]],
+                  *,
+                  heroes: List[Hero] = None,
+                  source: str = None,
+                  workers: int = DEFAULT_WORKERS
+                 ) -> List[BatchResult]:
+    """Creates grids for many users. `configs` are user configs by user name
+    (see: `load_batch_config()`), or a list of user configs. Hero stats are
+    fetched unless `heroes` are given.
+
+    Returns a result for every user, in order.
+    """
+    if isinstance(configs, dict):
+        items = list(configs.items())
+    else:
+        items = [
+            (str(c.get("name") or i) if isinstance(c, dict) else str(i), c)
+            for i, c in enumerate(configs, 1)
+        ]
+    if heroes is None:
+        from .odapi import fetch_hero_stats
+        heroes = fetch_hero_stats(source)
+
+    results: List[BatchResult] = []
+    jobs: List[_Job] = []
+    rankings = {}
+    grids: Dict[GridSpec, HeroGridModel] = {}
+    for user, config in items:
+        try:
+            job = _get_job(user, config)
+            for spec in job.specs:
+                bracket, metric, ascending, layout, name, name_layout, name_direction = spec
+                if spec not in grids:
+                    key = (bracket, metric, ascending)
+                    if key not in rankings:
+                        with span("rank"):
+                            rankings[key] = rank(heroes, bracket, metric, ascending=ascending)
+                    grids[spec] = build_grid(
+                        rankings[key], layout, name=name,
+                        name_layout=name_layout, name_direction=name_direction,
+                    )
+                job.grids.append(grids[spec])
+        except Exception as e: # e.g. ODHGError, or a TypeError from an odd YAML value
+            results.append(BatchResult(user, error=_error(e)))
+            continue
+        job.result.grids = [g.config_name for g in job.grids]
+        results.append(job.result)
+        jobs.append(job)
+
+    groups: Dict[str, List[_Job]] = defaultdict(list) # by hero_grid_config.json
+    for job in jobs:
+        groups[os.path.realpath(job.result.path)].append(job)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as pool:
+        list(pool.map(_write_jobs, groups.values()))
+
+    count(
+        "batch",
+        users=len(results),
+        failed=sum(not r.ok for r in results),
+        written=sum(r.written for r in results),
+    )
+    return results
+
+
+def run_batch(path: Union[str, Path], workers: int = None, source: str = None) -> None:
+    """`odhg batch`. Exits with status 1 if any user failed."""
+    from terminaltables import SingleTable
+
+    from .cli.utils import progress
+
+    try:
+        configs = load_batch_config(path)
+    except InvalidBatchConfig as e:
+        raise SystemExit(str(e))
+
+    from .odapi import fetch_hero_stats
+    with progress("Fetching hero data... "):
+        heroes = fetch_hero_stats(source)
+    with progress(f"Creating grids for {len(configs)} user(s)... "):
+        results = generate_many(configs, heroes=heroes, workers=workers or DEFAULT_WORKERS)
+
+    rows = [["User", "Grids", "Result"]]
+    for r in results:
+        if not r.ok:
+            status = r.error
+        else:
+            status = f"Saved to {r.path}" if r.written else "Unchanged"
+        rows.append([r.user, len(r.grids), status])
+    click.echo(SingleTable(rows).table)
+
+    failed = sum(not r.ok for r in results)
+    if failed:
+        raise SystemExit(f"{failed} of {len(results)} user(s) failed.")
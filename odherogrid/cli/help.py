@@ -1,5 +1,6 @@
 from collections import defaultdict
 from enum import Enum
+from typing import List
 
 import click
 
@@ -14,22 +15,36 @@ def indent(steps: int) -> str:
 
 
 def get_help_string() -> str:
-    from .params import PARAMS # resolve circular import
+    from .params import COMMANDS, PARAMS # resolve circular import
 
     BASE_INDENT = 1 # steps
 
     lines = []
     lines.append("Usage:")
     lines.append(f"{indent(BASE_INDENT)}odhg [OPTIONS]")
+    for c in COMMANDS:
+        lines.append(f"{indent(BASE_INDENT)}odhg {c.name} {c.argument_format}".rstrip())
     lines.append("\nOptions:")
-    for p in PARAMS:
+    lines.extend(get_params_help(PARAMS, BASE_INDENT))
+
+    for c in COMMANDS:
+        lines.append(f"Command '{c.name}':")
+        lines.append(indent(BASE_INDENT) + c.description)
+        lines.append("")
+        lines.extend(get_params_help(c.params, BASE_INDENT))
+    return "\n".join(lines)
+
+
+def get_params_help(params: list, base_indent: int) -> List[str]:
+    lines = []
+    for p in params:
         if not p.enabled:
             continue
         # Add option(s) and argument format. E.g. "[-o, --option] OPTION"
-        lines.append(f"{indent(BASE_INDENT)}[{', '.join(p.options)}] {p.argument_format}")
+        lines.append(f"{indent(base_indent)}[{', '.join(p.options)}] {p.argument_format}")
 
         # Add description
-        lines.append(indent(BASE_INDENT+1) + p.description)
+        lines.append(indent(base_indent+1) + p.description)
 
         # Add valid arguments (if any)
         if p.arguments:
@@ -43,17 +58,21 @@ def get_help_string() -> str:
                     argval = p.argument_type(i).name.capitalize()
                 else:
                     argval = ""
-                lines.append(indent(BASE_INDENT+2) + a + " "*(40-len(a)) + argval)
+                lines.append(indent(base_indent+2) + a + " "*(40-len(a)) + argval)
         
         if p.description_post:
-            lines.append(indent(BASE_INDENT+1) + p.description_post)
+            lines.append(indent(base_indent+1) + p.description_post)
         
         lines.append("")
-    return "\n".join(lines)
+    return lines
+
+
+def get_version_string() -> str:
+    return f"Version {__version__}"
 
 
 def print_version(ctx, param, value) -> None:
-    click.echo(f"Version {__version__}")
+    click.echo(get_version_string())
     ctx.exit()
 
 
@@ -6,9 +6,8 @@ from typing import Any, Iterable, List, Optional, Type
 
 import click
 
-from ..config import run_first_time_setup
 from ..enums import Bracket, Layout
-from .help import get_help_string
+from .help import get_help_string, get_version_string
 from .parse import BRACKETS, LAYOUTS
 
 
@@ -46,7 +45,16 @@ class Param:
                 self.argument_format = "TEXT"
 
 
-def get_click_params() -> List[click.Option]:  
+@dataclass
+class Command:
+    """Describes an ODHG CLI subcommand (`odhg <name> [OPTIONS]`)."""
+    name: str
+    description: str
+    params: List[Param]
+    argument_format: str = "[OPTIONS]"
+
+
+def get_click_params(params: List[Param] = None) -> List[click.Option]:  
     return [
         click.Option(
             p.options,
@@ -56,7 +64,7 @@ def get_click_params() -> List[click.Option]:
             multiple=p.multiple,
             callback=p.callback
         )
-        for p in PARAMS
+        for p in (params if params is not None else PARAMS)
         if p.enabled
     ]
 
@@ -68,6 +76,8 @@ def quiet() -> None:
 
 
 def setup(options: dict) -> dict:
+    from ..config import run_first_time_setup # deferred, pulls in yaml
+
     conf = run_first_time_setup()
     options.update(conf)
     return options
@@ -78,6 +88,11 @@ def help() -> None:
     raise SystemExit    
 
 
+def version() -> None:
+    click.echo(get_version_string())
+    raise SystemExit
+
+
 # This is the alternative to stacking decorators on odhg.main()
 # and it also makes it easier to gather documentation and behavior 
 # of command parameters in one place
@@ -90,14 +105,19 @@ PARAMS = [
         arguments=BRACKETS,
         argument_type=Bracket,
         description_post="Hero grids for multiple brackets can be generated "
-                         "by specifying the -b option several times."
+                         "by specifying the -b option several times. "
+                         "A range of brackets (e.g. 5-7) or 'pubs' creates a "
+                         "single grid from the pooled winrates of those brackets."
     ),
     Param(
         options=["-l", "--layout"],
+        multiple=True,
         argument_format=f"LAYOUT (default: {Layout.DEFAULT})",
         description="Which Hero Grid layout to use.",
         arguments=LAYOUTS,
-        argument_type=Layout
+        argument_type=Layout,
+        description_post="Hero grids for multiple layouts can be generated "
+                         "by specifying the -l option several times."
     ),
     Param(
         options=["-p", "--path"],
@@ -111,6 +131,44 @@ PARAMS = [
         default=True,
         description="Sort heroes by winrate in ascending order. (Default: descending).",
     ),
+    Param(
+        options=["--both-directions"],
+        is_flag=True,
+        description="Create hero grids sorted in both ascending and descending order.",
+    ),
+    Param(
+        options=["--hysteresis"],
+        type=float,
+        argument_format="PERCENT (default: 0)",
+        description="Keep the previous order of two heroes unless their winrates "
+                    "differ by more than PERCENT percentage points.",
+        description_post="Avoids reshuffling grids over small winrate fluctuations.",
+    ),
+    Param(
+        options=["--counters"],
+        multiple=True,
+        argument_format="HERO",
+        description="Create a grid of the heroes that are strong and weak against HERO, "
+                    "ranked by their winrate against it. HERO is a hero name or ID, "
+                    "or 'all' for a grid for every hero.",
+        description_post="Counter grids for multiple heroes can be generated "
+                         "by specifying the --counters option several times.",
+    ),
+    Param(
+        options=["--min-games"],
+        type=int,
+        argument_format="NUMBER (default: 20)",
+        description="Leave out matchups with fewer games from counter grids.",
+    ),
+    Param(
+        options=["--pro-days"],
+        type=int,
+        argument_format="DAYS",
+        description="Rank heroes in the Pro bracket by their winrate in pro matches "
+                    "of the last DAYS days, instead of OpenDota's pro stats.",
+        description_post="Pro matches are stored in ~/.odhg/promatches.sqlite3, "
+                         "so only new matches are fetched.",
+    ),
     Param(
         options=["-s", "--setup"],
         is_flag=True,
@@ -128,7 +186,6 @@ PARAMS = [
         options=["--version"],
         is_flag=True,
         description= "Show program version.",
-        enabled=False
     ),
     Param(
         options=["-h", "--help"],
@@ -142,6 +199,52 @@ PARAMS = [
                      "(crontab on UNIX-like systems, Task Scheduler on Windows)",
         enabled=False
     ),
+    Param(
+        options=["--daemon"],
+        is_flag=True,
+        description="Keep running and refresh hero grids periodically.",
+        description_post="Send SIGHUP to reload config, SIGTERM to stop.",
+    ),
+    Param(
+        options=["--interval"],
+        type=int,
+        argument_format="MINUTES (default: 60)",
+        description="How often to refresh hero grids when running with --daemon.",
+    ),
+    Param(
+        options=["-w", "--watch"],
+        is_flag=True,
+        description="Keep running and sort custom hero grids by winrate "
+                    "whenever they are edited in the Dota 2 client. (Linux only)",
+    ),
+    Param(
+        options=["--source"],
+        type=str,
+        argument_format="URL",
+        description="Fetch hero stats from an ODHG server started with "
+                    "'odhg serve' instead of OpenDota.",
+    ),
+    Param(
+        options=["--profile"],
+        type=click.Choice(["table", "json"]),
+        argument_format="<table, json>",
+        description="Print time spent in each phase of the program "
+                    "(fetching, ranking, writing, etc.) to stderr.",
+    ),
+    Param(
+        options=["--memprofile"],
+        is_flag=True,
+        description="Print peak memory usage and top allocation sites "
+                    "for each phase of the program to stderr. (slow)",
+    ),
+    Param(
+        options=["--metrics"],
+        type=str,
+        argument_format="PATH",
+        description="Write metrics (fetch latency, cache hits, grids updated, etc.) "
+                    "to PATH in the OpenMetrics text format after every run.",
+        description_post="Intended for node_exporter's textfile collector.",
+    ),
     Param(
         options=["-q", "--quiet"],
         is_flag=True,
@@ -155,3 +258,66 @@ PARAMS = [
         enabled=False
     ),
 ]
+
+
+SERVE_PARAMS = [
+    Param(
+        options=["--host"],
+        type=str,
+        default="0.0.0.0",
+        argument_format="HOST (default: 0.0.0.0)",
+        description="Address to listen on.",
+    ),
+    Param(
+        options=["--port"],
+        type=int,
+        default=8570,
+        argument_format="PORT (default: 8570)",
+        description="Port to listen on.",
+    ),
+    Param(
+        options=["--interval"],
+        type=int,
+        default=60,
+        argument_format="MINUTES (default: 60)",
+        description="How often to fetch new hero stats from OpenDota.",
+    ),
+]
+
+
+BATCH_PARAMS = [
+    Param(
+        options=["--workers"],
+        type=int,
+        default=8,
+        argument_format="NUMBER (default: 8)",
+        description="Number of users whose hero grid configs are written at the same time.",
+    ),
+    Param(
+        options=["--source"],
+        type=str,
+        argument_format="URL",
+        description="Fetch hero stats from an ODHG server started with "
+                    "'odhg serve' instead of OpenDota.",
+    ),
+]
+
+
+COMMANDS = [
+    Command(
+        name="serve",
+        description="Serve hero stats and ready-made hero grids over HTTP, "
+                    "so that several machines only have to fetch from OpenDota once. "
+                    "Endpoints: /stats, /grids?bracket=7&layout=role&ascending=0&name=NAME",
+        params=SERVE_PARAMS,
+    ),
+    Command(
+        name="batch",
+        description="Create hero grids for every user in a CONFIGS file (YAML), "
+                    "fetching and ranking hero stats only once. "
+                    "Each user has a 'path' and optionally 'brackets', 'layout', "
+                    "'ascending', 'both_directions' and 'config_name'.",
+        params=BATCH_PARAMS,
+        argument_format="CONFIGS [OPTIONS]",
+    ),
+]
@@ -3,8 +3,7 @@ from typing import Dict, List, Optional, Tuple, Union
 
 import click
 
-from ..enums import Bracket, Layout
-from ..herogrid import get_hero_grid_config_path
+from ..enums import PUB_BRACKETS, PUBS, Bracket, Layout
 
 
 def make_mapping(mapping: Dict[str, IntEnum]) -> Dict[Union[str, int], IntEnum]:
@@ -43,24 +42,45 @@ LAYOUTS: Dict[Union[str, int], int] = make_mapping(_layout)
 BRACKETS: Dict[Union[str, int], int] = make_mapping(_brackets)
 
 
-def parse_arg_brackets(brackets: List[Union[str, int]]) -> List[int]:
+def parse_arg_bracket(bracket: Union[str, int]) -> Optional[Union[int, str]]:
+    """Parses a single bracket argument. Ranges of pub brackets 
+    (e.g. `5-7` or `legend-divine`) and `pubs` are parsed as aggregate 
+    brackets (see: `enums.bracket_members()`).
+    
+    Returns integer, aggregate bracket string or None if invalid.
+    """
+    if isinstance(bracket, str) and bracket.lower() in [PUBS, "allpubs", "all-pubs"]:
+        return PUBS
+    if isinstance(bracket, str) and "-" in bracket:
+        start, _, end = bracket.partition("-")
+        start = find_argument_in_mapping(start.strip(), BRACKETS)
+        end = find_argument_in_mapping(end.strip(), BRACKETS)
+        first, last = PUB_BRACKETS
+        if start is None or end is None or not first <= start <= end <= last:
+            return None
+        if start == end:
+            return start
+        if (start, end) == PUB_BRACKETS:
+            return PUBS
+        return f"{start}-{end}"
+    return find_argument_in_mapping(bracket, BRACKETS)
+
+
+def parse_arg_brackets(brackets: List[Union[str, int]]) -> List[Union[int, str]]:
     """Parses bracket (`-b` `--bracket`) argument.
     
-    Returns list of integers.
+    Returns list of integers, followed by aggregate brackets (if any).
     """
-    # FIXME: this is a mess now
+    parsed = [parse_arg_bracket(b) for b in brackets]
+    aggregates = list(dict.fromkeys(b for b in parsed if isinstance(b, str)))
 
     # Check is Bracket.ALL is given as an argument
-    if any(x in brackets for x in [str(Bracket.ALL.value), Bracket.ALL.value]):
+    if Bracket.ALL.value in parsed:
         # Create list with all brackets
         valid_brackets = [b.value for b in Bracket if b.value != Bracket.ALL.value]
     else:
-        # Parse arguments & make list of valid bracket arguments
-        valid_brackets = list(
-            filter(
-                None.__ne__, [find_argument_in_mapping(b, BRACKETS) for b in brackets]
-            )
-        )
+        valid_brackets = [b for b in parsed if isinstance(b, int)]
+    valid_brackets = list(set(valid_brackets)) + aggregates
 
     # Fall back on default value if no valid brackets are provided
     if not valid_brackets:
@@ -71,7 +91,7 @@ def parse_arg_brackets(brackets: List[Union[str, int]]) -> List[int]:
             f"Using default bracket: {Bracket.DEFAULT.name.capitalize()}"
         )
 
-    return list(set(valid_brackets))
+    return valid_brackets
 
 
 def parse_arg_layout(layout: str) -> int:
@@ -90,6 +110,21 @@ def parse_arg_layout(layout: str) -> int:
     return grp
 
 
+def parse_arg_layouts(layouts: Union[List[Union[str, int]], str, int]) -> List[int]:
+    """Parses one or more layout (`-l` `--layout`) arguments.
+
+    Returns list of integers (without duplicates, in the order given).
+    """
+    if not isinstance(layouts, (list, tuple)):
+        layouts = [layouts]
+    parsed = []
+    for layout in layouts or [Layout.DEFAULT.value]:
+        grp = parse_arg_layout(layout)
+        if grp not in parsed:
+            parsed.append(grp)
+    return parsed
+
+
 def find_argument_in_mapping(argument: Union[str, int], mapping: dict) -> Optional[int]:
     if isinstance(argument, str) and argument.isdigit():
         argument = int(argument)
@@ -97,11 +132,16 @@ def find_argument_in_mapping(argument: Union[str, int], mapping: dict) -> Option
 
 
 def parse_config(config: dict) -> dict:
+    from ..herogrid import discover_hero_grid_config_path, get_hero_grid_config_path
+
     config["brackets"] = parse_arg_brackets(config["brackets"])
-    config["layout"] = parse_arg_layout(config["layout"])
+    config["layout"] = parse_arg_layouts(config["layout"])
     
     # We can fall back on bracket and layout defaults
-    # But we can't fall back on a default Steam userdata directory path
+    # But we can't fall back on a default Steam userdata directory path,
+    # unless there is only one Steam account with a Dota 2 cfg directory
+    if config["path"] is None:
+        config["path"] = discover_hero_grid_config_path()
     try:
         config["path"] = get_hero_grid_config_path(config["path"]) # Steam userdata directory
     except (TypeError, ValueError) as e:
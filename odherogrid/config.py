@@ -3,19 +3,20 @@ This module implements functionality related to generating, maintaining
 and updating a persistent user configuration file for ODHeroGrid. 
 """
 
+import json
 import sys
 from copy import deepcopy
 from pathlib import Path
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 
 import click
-import yaml
 
+from . import __version__
 from .cli.parse import parse_arg_brackets
 from .cli.utils import progress
 from .enums import Bracket, Layout, enum_start_end, enum_string
-from .herogrid import detect_userdata_path
-from .settings import DEFAULT_GRID_NAME, CONFIG
+from .herogrid import DOTA_CFG_DIR, discover_cfg_directories
+from .settings import DEFAULT_GRID_NAME, CONFIG, CONFIG_CACHE
 from .error import handle_exception
 
 
@@ -27,12 +28,32 @@ CONFIG_BASE = {
     "ascending": False,
 }
 
+# Keys that may be left out of config.yml, and are never prompted for
+CONFIG_OPTIONAL = {
+    "api_key": None, # OpenDota API key
+}
+
+# Keys that are not written to the config cache
+CONFIG_SECRETS = ["api_key"]
+
+# Bump when the cached config or parsed config changes shape. The cache is
+# also invalidated by a new package version (e.g. changed defaults or enums).
+CONFIG_CACHE_SCHEMA = 1
+
+
+def _get_yaml_loader():
+    """Returns the libyaml-backed loader if PyYAML was built with it."""
+    import yaml # deferred, not needed when the config cache is up to date
+    return getattr(yaml, "CFullLoader", yaml.FullLoader)
+
 
 def _do_load_config(*, filename: Union[str, Path]=None) -> dict:
     """Loads configuration file and returns it as a dict."""
+    import yaml
+
     path = filename or CONFIG
     with open(path, "r") as f:
-        config = yaml.load(f.read(), Loader=yaml.loader.FullLoader)
+        config = yaml.load(f.read(), Loader=_get_yaml_loader())
     if not config:
         if click.confirm(
             "Config is empty or damaged! "
@@ -50,6 +71,16 @@ def load_config() -> dict:
 
     TODO: Should config["steam"]["path"] be a Path object?
     """
+    return load_config_and_cache()[0]
+
+
+def load_config_and_cache() -> Tuple[dict, Optional[dict]]:
+    """`load_config()`, and the parsed config cached with it (or None),
+    so that the config cache is only read once per run."""
+    cached = read_config_cache()
+    if cached:
+        return cached["config"], cached["parsed"]
+
     try:
         config = _do_load_config()
     except (FileNotFoundError, ValueError):
@@ -62,8 +93,86 @@ def load_config() -> dict:
     
     # Ensure all necessary config keys are present
     config = check_config_integrity(config)
+    write_config_cache(config)
 
-    return config
+    return config, None
+
+
+def get_api_key() -> Optional[str]:
+    """Returns the OpenDota API key (`api_key`) from config.yml, if any.
+    Unlike `load_config()`, this never prompts.
+
+    The key is not kept in the config cache, so config.yml is read, but
+    only parsed if it mentions `api_key`."""
+    try:
+        with open(CONFIG, "r") as f:
+            text = f.read()
+    except OSError:
+        return None
+    if "api_key" not in text:
+        return None
+    import yaml
+
+    try:
+        config = yaml.load(text, Loader=_get_yaml_loader())
+    except yaml.YAMLError:
+        return None
+    return (config.get("api_key") or None) if isinstance(config, dict) else None
+
+
+def _get_config_stamp(path: Path) -> Optional[list]:
+    """Returns modification time and size of the config file, 
+    and the package version and cache schema it was cached by."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, __version__, CONFIG_CACHE_SCHEMA]
+
+
+def read_config_cache(*, 
+                      filename: Union[str, Path]=None, 
+                      cache: Union[str, Path]=None
+                     ) -> Optional[dict]:
+    """Loads the cached config, unless `config.yml` has changed since the 
+    cache was written, or it was written by another version of ODHG.
+
+    Returns a dict with the keys "config" (validated config) and
+    "parsed" (config after `parse_config()`, or None).
+    """
+    stamp = _get_config_stamp(Path(filename or CONFIG))
+    try:
+        with open((cache or CONFIG_CACHE), "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if stamp is None or cached.get("stamp") != stamp:
+        return None
+    return cached
+
+
+def write_config_cache(config: dict, 
+                       *, 
+                       parsed: dict=None,
+                       filename: Union[str, Path]=None, 
+                       cache: Union[str, Path]=None
+                      ) -> None:
+    """Caches a validated (and optionally parsed) config, keyed by the
+    modification time and size of `config.yml` and the package version
+    (see: `_get_config_stamp()`). Secrets (`api_key`)
+    are left out of the cache."""
+    stamp = _get_config_stamp(Path(filename or CONFIG))
+    if stamp is None:
+        return
+    config = {k: v for k, v in config.items() if k not in CONFIG_SECRETS}
+    if parsed is not None:
+        parsed = {k: v for k, v in parsed.items() if k not in CONFIG_SECRETS}
+        parsed["path"] = str(parsed["path"])
+    try:
+        with open((cache or CONFIG_CACHE), "w") as f:
+            json.dump({"stamp": stamp, "config": config, "parsed": parsed}, f)
+    except (OSError, TypeError): # can't write, or config is not serializable
+        pass
 
 
 def create_config(config: dict, *, filename: Union[str, Path]=None) -> None:
@@ -79,6 +188,8 @@ def create_config(config: dict, *, filename: Union[str, Path]=None) -> None:
 
 def update_config(config: dict, *, filename: Union[str, Path]=None) -> None:
     """Saves config as a YAML-formatted file."""
+    import yaml
+
     path = Path((filename or CONFIG)) # make sure we have a path object
     if not path.exists():
         create_config(config, filename=filename)
@@ -91,7 +202,7 @@ def check_config_integrity(config: dict, *, filename: Union[str, Path]=None) ->
     # Remove unknown keys
     c = deepcopy(config) # config copy so we can modify while iterating
     for key in config:
-        if key not in CONFIG_BASE:
+        if key not in CONFIG_BASE and key not in CONFIG_OPTIONAL:
             c.pop(key)
     config = c
 
@@ -158,7 +269,7 @@ def ask_steam_userdata_path() -> Path:
         elif sys.platform == "darwin":
             click.echo("~/Library/Application Support/Steam/userdata/<ID>")
         elif sys.platform == "linux":
-            click.echo("~/Steam/userdata/<ID>")
+            click.echo("~/.local/share/Steam/userdata/<ID>")
         
         return get_path_from_user()
 
@@ -169,35 +280,36 @@ def ask_steam_userdata_path() -> Path:
 def setup_hero_grid_config_path(config: dict) -> dict:
     """Configure user's Dota userdata cfg directory.
     """
-    # Get default directory for Steam userdata
     click.echo("Steam Userdata Directory:")
     try:
-        p = detect_userdata_path()
+        cfg_dirs = discover_cfg_directories()
     except NotImplementedError as e:
         click.echo(e.args[0])
-        cfg_path = ask_steam_userdata_path()
+        cfg_dirs = []
+
+    if not cfg_dirs:
+        click.echo("Unable to find a Steam account with a Dota 2 cfg directory.")
+        cfg_path = Path(ask_steam_userdata_path()) / DOTA_CFG_DIR
+    elif len(cfg_dirs) == 1:
+        # Only one account on this machine. No need to ask.
+        cfg_path = cfg_dirs[0]
+        click.echo(f"\tFound {cfg_path}")
     else:
-        directories = [d for d in p.iterdir()]
-        
-        # Ask user for a path if no directories found in auto-detected path
-        if not directories:
-            click.echo(f"No subdirectories were found in {p}")
-            cfg_path = ask_steam_userdata_path()
-        
-        else:
-            # Subdirectories
-            subdirs = {idx+1: d for idx, d in enumerate(directories)}
-            
-            # Let user select a directory
-            _choices = "\n".join(f"\t{idx}. {d.stem}" for idx, d in subdirs.items())
-            click.echo(_choices)
-            
-            choice = 0
-            while choice not in subdirs:
-                choice = click.prompt(f"Select directory (1-{len(directories)})", type=int) 
-            cfg_path = subdirs.get(choice)
-    finally:    
-        config["path"] = str((cfg_path / "570/remote/cfg/hero_grid_config.json"))
+        # Let user select an account
+        choices = {idx+1: d for idx, d in enumerate(cfg_dirs)}
+        _choices = "\n".join(
+            # userdata/<ID>/570/remote/cfg
+            f"\t{idx}. {d.parents[2].name} ({d.parents[3]})"
+            for idx, d in choices.items()
+        )
+        click.echo(_choices)
+
+        choice = 0
+        while choice not in choices:
+            choice = click.prompt(f"Select account (1-{len(choices)})", type=int)
+        cfg_path = choices.get(choice)
+
+    config["path"] = str((cfg_path / "hero_grid_config.json"))
     
     return config
 
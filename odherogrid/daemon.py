@@ -0,0 +1,118 @@
+"""
+Long-running mode that periodically refreshes hero grids without 
+spawning a new process for each refresh. The HTTP client, config, 
+hero rankings and the loaded hero grid config are kept in memory 
+between refreshes.
+"""
+
+import signal
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+import click
+
+from .error import handle_exception
+from .herogrid import HeroGridConfig
+from .metrics import METRICS
+from .odapi import RATE_LIMITER, HeroStatsFetcher
+from .rankings import RankingStore
+
+
+DEFAULT_INTERVAL = 60 # minutes
+
+
+def echo(message: str) -> None:
+    click.echo(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+
+class Daemon:
+    def __init__(self, 
+                 load_config: Callable[[], dict], 
+                 interval: int = DEFAULT_INTERVAL,
+                 name: Optional[str] = None,
+                 source: Optional[str] = None,
+                ) -> None:
+        self.load_config = load_config # called again on SIGHUP
+        self.interval = interval * 60
+        self.name = name # Sort custom grid instead of creating grids
+        self.config = load_config()
+
+        self.fetcher = HeroStatsFetcher(source=source)
+        self.hero_grid_config: Optional[HeroGridConfig] = None
+        self.rankings = RankingStore() # kept across config reloads
+
+        self._wake = threading.Event()
+        self._stopping = False
+        self._reload = False
+
+    def stop(self, *args) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    def reload(self, *args) -> None:
+        self._reload = True
+        self._wake.set()
+
+    def install_signal_handlers(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if hasattr(signal, "SIGHUP"): # not available on Windows
+            signal.signal(signal.SIGHUP, self.reload)
+
+    def run(self) -> None:
+        self.install_signal_handlers()
+        echo(f"Refreshing hero grids every {self.interval // 60} minute(s).")
+        try:
+            while not self._stopping:
+                try:
+                    with METRICS.run():
+                        self.tick()
+                except Exception as e: # keep running if a single refresh fails
+                    handle_exception(e)
+                self._wake.wait(self.interval)
+                self._wake.clear()
+        finally:
+            self.fetcher.close()
+            echo("Stopped.")
+
+    def tick(self) -> None:
+        reloaded = self._reload
+        if reloaded:
+            self._reload = False
+            self.config = self.load_config()
+            self.hero_grid_config = None # config path etc. may have changed
+            RATE_LIMITER.api_key = None # re-read from config.yml
+            echo("Config reloaded.")
+        
+        if self._stopping: # SIGTERM during reload
+            return
+
+        heroes, changed = self.fetcher.fetch()
+        h = self.hero_grid_config
+        if h is None:
+            h = self.hero_grid_config = HeroGridConfig(
+                heroes, self.config, rankings=self.rankings
+            )
+        elif changed:
+            h.set_heroes(heroes)
+        
+        # The grid file can be edited by the Dota 2 client between refreshes
+        modified = h.reload_if_changed()
+        if not (changed or modified or reloaded) and h.grids:
+            echo("Hero stats unchanged.")
+            return
+        
+        if self.name:
+            h.modify_grid(self.name)
+        else:
+            h.create_grids()
+        echo(f"Updated {len(h.grids)} grid(s) in {self.config['path']}")
+
+
+def run_daemon(load_config: Callable[[], dict], 
+               interval: int = None, 
+               name: Optional[str] = None,
+               source: Optional[str] = None
+              ) -> None:
+    Daemon(load_config, interval or DEFAULT_INTERVAL, name, source).run()
@@ -1,5 +1,5 @@
 from enum import IntEnum
-from typing import Tuple
+from typing import List, Tuple, Union
 
 
 class Bracket(IntEnum):
@@ -18,6 +18,35 @@ class Bracket(IntEnum):
     DEFAULT = DIVINE
 
 
+# Aggregate brackets. Pooled stats of a range of pub brackets, 
+# e.g. "5-7" (Legend-Divine), or of every pub bracket ("pubs").
+PUBS = "pubs"
+PUB_BRACKETS = (Bracket.HERALD, Bracket.IMMORTAL) # first & last
+
+
+def bracket_members(bracket: Union[int, str]) -> List[int]:
+    """Returns the brackets whose stats are pooled in a bracket.
+    Members of aggregate brackets are always consecutive."""
+    if isinstance(bracket, int):
+        return [bracket]
+    if bracket == PUBS:
+        start, end = PUB_BRACKETS
+    else:
+        start, _, end = bracket.partition("-")
+    return list(range(int(start), int(end) + 1))
+
+
+def bracket_name(bracket: Union[int, str]) -> str:
+    """E.g. 'Divine', 'Legend-Divine' or 'All Pubs'."""
+    if bracket == PUBS:
+        return "All Pubs"
+    members = bracket_members(bracket)
+    name = Bracket(members[0]).name.capitalize()
+    if len(members) > 1:
+        name += f"-{Bracket(members[-1]).name.capitalize()}"
+    return name
+
+
 class Layout(IntEnum):
     SINGLE = 0
     MAINSTAT = 1
@@ -1,10 +1,12 @@
 import inspect
-import json
+import reprlib
 import sys
 import traceback
 from datetime import datetime
 from pathlib import Path
+from itertools import islice
 from types import FrameType
+from typing import Iterator, TextIO
 
 import click
 
@@ -12,6 +14,20 @@ from .settings import CONFIG_DIR
 
 LOGS_DIR: Path = CONFIG_DIR / "logs" 
 
+# Limits of the stack dump in error logs
+MAX_STACK_FRAMES = 30
+MAX_VALUE_LENGTH = 500      # characters per local variable
+MAX_FRAME_SIZE = 8_000      # characters per stack frame
+MAX_LOG_SIZE = 256 * 1024   # characters per log file
+
+# Variables and dict keys whose values are left out of the stack dump
+SECRET_NAMES = {"api_key", "authorization"}
+REDACTED = "<redacted>"
+
+# Retention of log files. The newest log is always kept.
+MAX_LOGS = 20
+MAX_LOGS_SIZE = 5 * 1024 * 1024 # bytes
+
 
 def eprint(*args, **kwargs) -> None:
     """Click.echo to stderr."""
@@ -33,18 +49,45 @@ def handle_exception(exception: Exception) -> None:
 
 def make_log_file(log_type: str=None) -> Path:
     """Creates a new log file and returns its path."""
-    if not LOGS_DIR.exists():
-        LOGS_DIR.mkdir()
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
     
     date_fmt = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     ltype = f"{log_type}_" if log_type else ""
     
     log_file = LOGS_DIR / f"odhg_{ltype}{date_fmt}.log"
     log_file.touch()
+    prune_logs(keep=log_file)
     
     return log_file
 
 
+def prune_logs(*, 
+               keep: Path = None, 
+               max_logs: int = MAX_LOGS, 
+               max_size: int = MAX_LOGS_SIZE
+              ) -> None:
+    """Deletes the oldest log files until at most `max_logs` remain
+    and they take up at most `max_size` bytes in total."""
+    logs = []
+    for p in LOGS_DIR.glob("odhg_*.log"):
+        try:
+            stat = p.stat()
+        except OSError:
+            continue
+        logs.append((p != keep, -stat.st_mtime, stat.st_size, p))
+    logs.sort(key=lambda l: l[:3]) # `keep` first, then newest first
+    
+    total = 0
+    for i, (_, _, size, p) in enumerate(logs):
+        total += size
+        if i == 0 or (i < max_logs and total <= max_size):
+            continue
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
 def log(exception: Exception) -> Path:
     """
     Logs exception. Writes traceback and contents of the 
@@ -58,29 +101,97 @@ def log(exception: Exception) -> Path:
         for l in exc: # write each line of the traceback
             f.write(l)
         f.write("\n\nStack dump:\n\n")
-        for frame in get_stack_frames(): # format as JSON for readability
-            stack_locals = json.dumps(
-                dict(frame.f_locals), indent=4, default=str
-            )
-            f.write(f"{stack_locals}\n")
+        tb = exception.__traceback__
+        while tb and tb.tb_next:
+            tb = tb.tb_next
+        # Innermost frame of the exception and its callers
+        frames = get_stack_frames(tb.tb_frame) if tb else get_stack_frames()
+        write_stack_dump(f, islice(frames, MAX_STACK_FRAMES))
     return log_file
 
 
-def get_stack_frames() -> FrameType:
-    """Generates stack frames."""
-    frame = inspect.currentframe()
+def _is_secret(name: object) -> bool:
+    return isinstance(name, str) and name.lower() in SECRET_NAMES
+
+
+class _Redacted:
+    def __repr__(self) -> str:
+        return REDACTED
+
+
+class _RedactingRepr(reprlib.Repr):
+    """Repr that leaves out the values of secret dict keys (e.g. `api_key`)."""
+
+    def repr_dict(self, x: dict, level: int) -> str:
+        if any(_is_secret(k) for k in x):
+            x = {k: _Redacted() if _is_secret(k) else v for k, v in x.items()}
+        return super().repr_dict(x, level)
+
+
+def _make_repr(max_length: int = MAX_VALUE_LENGTH) -> reprlib.Repr:
+    r = _RedactingRepr()
+    r.maxlevel = 3
+    r.maxdict = r.maxlist = r.maxtuple = r.maxset = r.maxfrozenset = r.maxdeque = 10
+    r.maxstring = r.maxother = r.maxlong = max_length
+    return r
+
+
+def safe_repr(value: object, max_length: int = MAX_VALUE_LENGTH) -> str:
+    """Size-limited repr of `value`. Containers are abbreviated rather than
+    fully formatted, values of secret dict keys (`SECRET_NAMES`) are redacted,
+    and values whose repr fails are not fatal."""
+    try:
+        s = _make_repr(max_length).repr(value)
+    except Exception as e:
+        s = f"<repr failed: {type(e).__name__}>"
+    if len(s) > max_length:
+        s = f"{s[:max_length]}... ({len(s)} chars)"
+    return s
+
+
+def write_stack_dump(f: TextIO, 
+                     frames: Iterator[FrameType], 
+                     *, 
+                     max_value_length: int = MAX_VALUE_LENGTH,
+                     max_frame_size: int = MAX_FRAME_SIZE,
+                     max_size: int = MAX_LOG_SIZE
+                    ) -> int:
+    """Writes the local variables of each frame to `f`, one line at a time,
+    truncating values, frames and the dump as a whole. 
+    Returns number of characters written."""
+    written = 0
+    for frame in frames:
+        code = frame.f_code
+        lines = [f"{code.co_filename}:{frame.f_lineno} in {code.co_name}\n"]
+        frame_size = len(lines[0])
+        for name, value in list(frame.f_locals.items()):
+            value = REDACTED if _is_secret(name) else safe_repr(value, max_value_length)
+            line = f"    {name} = {value}\n"
+            if frame_size + len(line) > max_frame_size:
+                lines.append("    ... (frame truncated)\n")
+                break
+            lines.append(line)
+            frame_size += len(line)
+        lines.append("\n")
+        
+        for line in lines:
+            if written + len(line) > max_size:
+                f.write("... (stack dump truncated)\n")
+                return written
+            f.write(line)
+            written += len(line)
+    return written
+
+
+def get_stack_frames(frame: FrameType = None) -> Iterator[FrameType]:
+    """Generates stack frames, starting from `frame` 
+    or the current frame and proceeding outwards."""
+    frame = frame or inspect.currentframe()
     while frame:
         yield frame
         frame = frame.f_back
 
 
-def get_n_stack_frames(limit: int) -> FrameType:
-    """Returns up to N number of stack frames.
-    
-    NOTE: untested.
-    """
-    for _ in range(limit):
-        frame = next(get_stack_frames())
-        if not frame:
-            return StopIteration
-        yield frame
+def get_n_stack_frames(limit: int) -> Iterator[FrameType]:
+    """Generates up to N number of stack frames."""
+    return islice(get_stack_frames(), limit)
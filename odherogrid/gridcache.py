@@ -0,0 +1,141 @@
+"""
+On-disk cache of generated hero grids.
+
+Grids are keyed by a fingerprint of the hero stats they were generated from,
+and by the parameters used to generate them, so running `odhg` again on
+unchanged stats skips ranking and layout. Least recently used entries are
+evicted when the cache exceeds a number of entries or a total size. Eviction
+scans the cache directory, so it is done once after a batch of puts 
+(see: `HeroGridConfig.create_grids()`) rather than after every put.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from .models import Hero, HeroGridModel, json_default
+from .profiling import span
+from .settings import GRID_CACHE_DIR
+
+MAX_ENTRIES = 500
+MAX_SIZE = 20 * 1024 * 1024 # bytes
+
+# Heroes are currently only ranked by winrate
+METRIC = "winrate"
+
+
+def stats_fingerprint(heroes: Iterable[Hero]) -> str:
+    """Hash of the hero stats and attributes that grids are generated from."""
+    h = hashlib.sha1()
+    for hero in heroes:
+        h.update(
+            f"{hero.id}|{hero.primary_attr}|{hero.attack_type}|{hero.roles}|".encode()
+        )
+        h.update(hero.wins.tobytes())
+        h.update(hero.picks.tobytes())
+    return h.hexdigest()
+
+
+def grid_key(fingerprint: str,
+             bracket: Union[int, str],
+             layout: int,
+             ascending: bool,
+             config_name: str,
+             *,
+             metric: str = METRIC,
+             hysteresis: float = 0.0,
+             previous: Optional[str] = None,
+             **naming: bool
+            ) -> str:
+    """Cache key of a grid. `naming` are the name options of `HeroGrid.create()`.
+    `previous` is the digest of the ranking that heroes are re-ranked from,
+    which decides the order of ties (and with `hysteresis`, of close winrates)."""
+    params = [fingerprint, bracket, layout, metric, ascending, config_name]
+    if hysteresis or previous:
+        params.extend([hysteresis, previous])
+    params.extend(f"{k}={v}" for k, v in sorted(naming.items()))
+    return hashlib.sha1(json.dumps(params).encode()).hexdigest()
+
+
+class GridCache:
+    def __init__(self,
+                 path: Union[str, Path] = GRID_CACHE_DIR,
+                 max_entries: int = MAX_ENTRIES,
+                 max_size: int = MAX_SIZE
+                ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._written = False # since the last eviction
+
+    def _entry(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def get(self, key: str) -> Optional[HeroGridModel]:
+        p = self._entry(key)
+        with span("grid cache") as s:
+            try:
+                data = p.read_text()
+                grid = HeroGridModel.from_json(json.loads(data))
+            except (OSError, ValueError):
+                s.add(misses=1)
+                return None
+            try:
+                os.utime(p) # mark as recently used
+            except OSError:
+                pass
+            s.add(hits=1, bytes_read=len(data))
+        return grid
+
+    def put(self, key: str, grid: HeroGridModel) -> None:
+        """Writes a grid to the cache. Call `evict()` after a batch of puts."""
+        data = json.dumps(grid, default=json_default)
+        tmp = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Unique temp file, so concurrent processes don't write each other's
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp, self._entry(key))
+        except OSError:
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            return # The cache is an optimization. Failing to write it is not an error.
+        self._written = True
+
+    def evict(self) -> None:
+        """Deletes least recently used entries until the cache is within
+        its entry count and size limits. Does nothing if no grids have
+        been put since the last eviction."""
+        if not self._written:
+            return
+        self._written = False
+        entries = []
+        for p in self.path.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, p))
+        entries.sort(reverse=True) # most recently used first
+
+        count, size = 0, 0
+        for _, entry_size, p in entries:
+            count += 1
+            size += entry_size
+            if count > self.max_entries or size > self.max_size:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        for p in self.path.glob("*.json"):
+            p.unlink()
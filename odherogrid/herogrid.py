@@ -1,52 +1,83 @@
-import copy
 import json
 import sys
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 
 import click
 
-from .enums import Bracket, Layout
-from .resources import (HERO_GRID_CONFIG_BASE, HERO_GRID_BASE, _get_new_category,
-                        get_new_hero_grid_base)
+from .enums import Layout, bracket_members, bracket_name
+from .gridcache import GridCache, grid_key, stats_fingerprint
+from .matchups import MIN_GAMES, MatchupMatrix, build_counter_grid
+from .models import Hero, HeroGridModel, json_default, role_bit
+from .resources import (HERO_GRID_CONFIG_BASE, _get_new_category, get_new_hero_grid,
+                        get_new_hero_grid_base, get_new_hero_grid_config)
+from .profiling import count, span
+from .rankings import RankingStore
+from .settings import USERDATA_CACHE
+from .validate import (InvalidGrid, ValidationReport, find_unknown_hero_ids, validate_grid,
+                       validate_grids)
 
 
 class HeroGrid:
     def __init__(self, 
-                 heroes: List[dict],
-                 bracket: int,
+                 heroes: List[Hero],
+                 bracket: Union[int, str],
                  config: dict,
-                 grid: dict = None
+                 grid: dict = None,
+                 *,
+                 ranked: bool = False
                 ):
         self.bracket = bracket
         self.layout = config["layout"]
         self.ascending = config["ascending"]
         self.config_name = config["config_name"]
+        self.hysteresis = config.get("hysteresis") or 0.0 # percentage points
         self.heroes = heroes
-        self.sort_heroes_by_winrate()
-        # TODO: add _fix_grid tests before using it
+        if not ranked: # `heroes` are not already sorted by winrate
+            self.sort_heroes_by_winrate()
 
-    def _fix_grid(self, config: dict) -> dict:
-        """Method called by `__init__()` to verify and fix missing keys and values
-        in the hero grid."""
-        for key, value in HERO_GRID_BASE.items():
-            if not config.get(key):
-                config[key] = value # fix missing / NoneType value
-        return config
+    def _fix_grid(self, config: dict) -> HeroGridModel:
+        """Verifies and fixes missing keys and values in a hero grid.
+        See: `validate.validate_grid()`"""
+        config = dict(config)
+        if not config.get("categories"):
+            config["categories"] = get_new_hero_grid_base().to_json()["categories"]
+        return validate_grid(config, [])
 
     def sort_heroes_by_winrate(self) -> list:
-        """Sorts HeroGrid hero list by winrate in a specific skill bracket."""
-        for hero in self.heroes:
-            if hero["8_pick"] == 0:
-                hero["8_pick"] = 1
-        self.heroes.sort(
-            key=lambda h: h[f"{self.bracket}_win"] / h[f"{self.bracket}_pick"], 
-            reverse=not self.ascending
-        )
+        """Sorts HeroGrid hero list by winrate in a specific skill bracket.
+        
+        For aggregate brackets, heroes are sorted by their pooled winrate
+        (total wins / total picks) across the member brackets.
 
-    def create(self) -> dict:
-        """Creates a new hero grid."""
+        The sort is stable, and adaptive: if the heroes are already nearly
+        sorted (e.g. in the order of a previous ranking), it runs in close 
+        to linear time. With a hysteresis band, heroes are only reordered 
+        if their winrates differ by more than the band.
+        """
+        members = bracket_members(self.bracket)
+        if len(members) == 1:
+            b = members[0]
+            # Heroes can have 0 picks, e.g. in the pro bracket
+            key = lambda h: h.wins[b] / (h.picks[b] or 1)
+        else:
+            start, end = members[0], members[-1] + 1 # members are consecutive
+            key = lambda h: sum(h.wins[start:end]) / (sum(h.picks[start:end]) or 1)
+        if self.hysteresis:
+            self.heroes = _sort_with_hysteresis(
+                self.heroes, key, self.hysteresis / 100, reverse=not self.ascending
+            )
+        else:
+            self.heroes.sort(key=key, reverse=not self.ascending)
+
+    def create(self, *, name_layout: bool = False, name_direction: bool = False) -> HeroGridModel:
+        """Creates a new hero grid.
+        
+        Layout and/or sorting direction can be added to the grid name, 
+        in order to tell apart grids for the same bracket.
+        """
         layout_methods = {
             Layout.MAINSTAT.value: self._get_grid_main_stat,
             Layout.SINGLE.value: self._get_grid_single,
@@ -58,16 +89,28 @@ class HeroGrid:
         if not meth:
             raise ValueError(f"No such layout: '{self.layout}'")
         
-        hero_grid = meth()
-        hero_grid["config_name"] = (f"{self.config_name} "
-                                    f"({Bracket(self.bracket).name.capitalize()})")
+        with span("layout") as s:
+            hero_grid = meth()
+            s.add(grids=1)
+        hero_grid.config_name = self.get_grid_name(
+            layout=name_layout, direction=name_direction
+        )
         
         return hero_grid
+
+    def get_grid_name(self, *, layout: bool = False, direction: bool = False) -> str:
+        """E.g. 'OpenDota Hero Winrates (Divine) (Mainstat) (Descending)'"""
+        name = f"{self.config_name} ({bracket_name(self.bracket)})"
+        if layout:
+            name += f" ({Layout(self.layout).name.capitalize()})"
+        if direction:
+            name += f" ({'Ascending' if self.ascending else 'Descending'})"
+        return name
         
     def modify(self, grid: dict) -> dict:
         """Modifies an existing hero grid."""
         hero_idx: Dict[int, int] = {
-            hero["id"]: idx for idx, hero in enumerate(self.heroes)
+            hero.id: idx for idx, hero in enumerate(self.heroes)
         }
         for category in grid["categories"]:
             heroes_cat = []
@@ -83,62 +126,91 @@ class HeroGrid:
         
         return grid
 
-    def _get_grid_main_stat(self) -> dict:
+    def _get_grid_main_stat(self) -> HeroGridModel:
         """Creates a hero grid with a mainstat layout (Dota 2 default)."""
         CATEGORY_IDX = {"str": 0, "agi": 1, "int": 2}
         hero_grid = get_new_hero_grid_base()
+        categories = [c.hero_ids for c in hero_grid.categories]
         for hero in self.heroes: # adds heroes to categories, sorted by winrate
-            idx = CATEGORY_IDX.get(hero["primary_attr"])
-            hero_grid["categories"][idx]["hero_ids"].append(hero["id"])
+            idx = CATEGORY_IDX.get(hero.primary_attr)
+            categories[idx].append(hero.id)
         return hero_grid
 
-    def _get_grid_single(self) -> dict:
+    def _get_grid_single(self) -> HeroGridModel:
         """Creates a hero grid with a single category layout."""
         category = _get_new_category("Heroes", height=1180.0)
+        category.hero_ids = [hero.id for hero in self.heroes]
+        return get_new_hero_grid(categories=[category])
 
-        hero_grid = get_new_hero_grid_base()
-        hero_grid["categories"] = [category] # Override predefined categories
-
-        for hero in self.heroes:
-            hero_grid["categories"][0]["hero_ids"].append(hero["id"])
-        return hero_grid
-
-    def _get_grid_attack(self) -> dict:
+    def _get_grid_attack(self) -> HeroGridModel:
         """Creates a hero grid with a melee/range attack type layout."""
         melee = _get_new_category("Melee", height=280.0)
         ranged = _get_new_category("Ranged", y_pos=300.0, height=280.0)
 
-        hero_grid = get_new_hero_grid_base()
-        hero_grid["categories"] = [melee, ranged] # Override predefined categories
-
         for hero in self.heroes:
-            idx = 1 if hero["attack_type"] == "Ranged" else 0
-            hero_grid["categories"][idx]["hero_ids"].append(hero["id"])
-        return hero_grid
+            category = ranged if hero.attack_type == "Ranged" else melee
+            category.hero_ids.append(hero.id)
+        return get_new_hero_grid(categories=[melee, ranged])
 
-    def _get_grid_role(self) -> dict:
+    def _get_grid_role(self) -> HeroGridModel:
         """Creates a hero grid with a hero role layout (Carry/Support/Flex)."""
         carry = _get_new_category("Carry")
         support = _get_new_category("Support", y_pos=200.0)
         flex = _get_new_category("Flexible", y_pos=400.0)
 
-        hero_grid = get_new_hero_grid_base()
-        hero_grid["categories"] = [carry, support, flex] # Override predefined categories
-
+        CARRY, SUPPORT = role_bit("Carry"), role_bit("Support")
         for hero in self.heroes:
-            if "Carry" in hero["roles"]:
-                idx = 0 
-            elif "Support" in hero["roles"]:
-                idx = 1
+            if hero.roles & CARRY:
+                category = carry
+            elif hero.roles & SUPPORT:
+                category = support
             else:
-                idx = 2
-            hero_grid["categories"][idx]["hero_ids"].append(hero["id"])
-        return hero_grid
+                category = flex
+            category.hero_ids.append(hero.id)
+        return get_new_hero_grid(categories=[carry, support, flex])
+
+
+def order_by_ranking(heroes: List[Hero], hero_ids: List[int]) -> None:
+    """Sorts heroes in place in the order of a previous ranking (hero IDs).
+    Heroes that are not in the ranking go last, in their current order."""
+    pos = {hero_id: i for i, hero_id in enumerate(hero_ids)}
+    heroes.sort(key=lambda h: pos.get(h.id, len(pos)))
+
+
+def _sort_with_hysteresis(heroes: List[Hero], 
+                          key: Callable[[Hero], float], 
+                          band: float, 
+                          *, 
+                          reverse: bool = False
+                         ) -> List[Hero]:
+    """Insertion sort that only moves a hero ahead of another if their keys
+    differ by more than `band`. Runs in O(n + moves), so it is close to 
+    linear when re-ranking heroes from a previous ranking."""
+    sign = -1 if reverse else 1
+    keys = {hero.id: sign * key(hero) for hero in heroes}
+    ranked: List[Hero] = []
+    for hero in heroes:
+        k = keys[hero.id]
+        i = len(ranked)
+        while i and k < keys[ranked[i - 1].id] - band:
+            i -= 1
+        ranked.insert(i, hero)
+    return ranked
 
 
 class HeroGridConfig:
-    def __init__(self, heroes: List[dict], config: dict) -> None:
+    def __init__(self, 
+                 heroes: Optional[List[Hero]], 
+                 config: dict, 
+                 *, 
+                 grid_cache: GridCache = None, 
+                 rankings: RankingStore = None
+                ) -> None:
         self.heroes = heroes
+        self._rankings: Dict[Union[int, str], List[Hero]] = {} # see: get_ranking()
+        self.grid_cache = grid_cache # see: create_grids()
+        self.rankings = rankings # rankings of the previous run. see: get_ranking()
+        self._fingerprint: Optional[str] = None
 
         # Config keys
         self.config = config
@@ -149,42 +221,165 @@ class HeroGridConfig:
         self.path = config["path"]
         self.ascending = config["ascending"]
         self.config_name = config["config_name"]
+        self.layouts = self.layout if isinstance(self.layout, list) else [self.layout]
+        self.both_directions = config.get("both_directions", False)
 
+        self._stamp = None # mtime & size of hero_grid_config.json when loaded
+        self._dirty = False # grids were repaired or removed when loaded
+        self._checked_hero_ids: Optional[Set[int]] = None # see: _check_hero_ids()
+        self._grid_index: Dict[str, int] = {} # see: _find_grid_index()
         self.hero_grid_config = self.load_hero_grid_config()
         # TODO: _fix_hero_grid_config() ?
         self.grids = [] # List of grids created by this instance. see: add_hero_grid()
+        self.changes: Dict[str, int] = defaultdict(int) # created/updated/unchanged grids
+
+    def set_heroes(self, heroes: List[Hero]) -> None:
+        """Replaces hero stats and discards rankings based on the old stats."""
+        self.heroes = heroes
+        self._rankings.clear()
+        self._fingerprint = None
+        self._check_hero_ids()
+
+    def _check_hero_ids(self) -> None:
+        """Reports hero IDs in hero_grid_config.json that aren't in the hero stats.
+        The config is usually loaded before the hero stats are available."""
+        hero_ids = {hero.id for hero in self.heroes or []}
+        if not hero_ids or hero_ids == self._checked_hero_ids:
+            return
+        self._checked_hero_ids = hero_ids
+        unknown = find_unknown_hero_ids(self.hero_grid_config["configs"], hero_ids)
+        if unknown:
+            report = ValidationReport(unknown_hero_ids=unknown)
+            click.echo(f"Problems were found in {self.path}:\n{report.summary()}")
+
+    def get_ranking(self, bracket: Union[int, str], ascending: bool = None) -> List[Hero]:
+        """Returns heroes sorted by winrate in a bracket (or aggregate bracket).
+        Each bracket is only sorted once per set of hero stats.
+        
+        If the ranking of the previous run is known, heroes are re-ranked
+        starting from it. See: `HeroGrid.sort_heroes_by_winrate()`
+        """
+        if bracket not in self._rankings:
+            heroes = list(self.heroes)
+            previous = self.rankings.get(bracket) if self.rankings else None
+            if previous:
+                order_by_ranking(heroes, previous)
+            config = dict(self.config, layout=self.layouts[0], ascending=False)
+            with span("rank"):
+                h = HeroGrid(heroes, bracket, config)
+            self._rankings[bracket] = h.heroes # descending
+            if self.rankings:
+                self.rankings.set(bracket, [hero.id for hero in h.heroes])
+        ranking = self._rankings[bracket]
+        if ascending is None:
+            ascending = self.ascending
+        return ranking[::-1] if ascending else list(ranking)
 
     def create_grids(self) -> List[dict]:
+        """Creates a grid for every combination of bracket, layout 
+        and sorting direction, then saves the hero grid config."""
+        self.grids = []
+        self.changes.clear()
+        directions = [False, True] if self.both_directions else [self.ascending]
+        naming = dict(
+            name_layout=len(self.layouts) > 1, name_direction=self.both_directions
+        )
         for bracket in self.brackets:
-            h = HeroGrid(self.heroes, bracket, self.config)
-            grid = h.create()
+            for ascending in directions:
+                for layout in self.layouts:
+                    key = self._get_grid_key(bracket, layout, ascending, naming)
+                    grid = self.grid_cache.get(key) if key else None
+                    if grid is None:
+                        ranking = self.get_ranking(bracket, ascending)
+                        config = dict(self.config, layout=layout, ascending=ascending)
+                        grid = HeroGrid(ranking, bracket, config, ranked=True).create(**naming)
+                        if key:
+                            self.grid_cache.put(key, grid)
+                    self.add_hero_grid(grid)
+        if self.grid_cache is not None:
+            self.grid_cache.evict()
+
+        if self.rankings:
+            self.rankings.save()
+        self._save_changes()
+
+    def create_counter_grids(self, 
+                             matrix: MatchupMatrix, 
+                             heroes: List[Hero], 
+                             min_games: int = None
+                            ) -> None:
+        """Creates a counter grid for each of `heroes` from their matchups
+        (see: matchups.py), then saves the hero grid config."""
+        self.grids = []
+        self.changes.clear()
+        for hero in heroes:
+            if hero.id not in matrix.fetched:
+                continue # see: MatchupMatrix.missing
+            with span("layout") as s:
+                grid = build_counter_grid(
+                    matrix, hero, min_games=MIN_GAMES if min_games is None else min_games
+                )
+                s.add(grids=1)
             self.add_hero_grid(grid)
+        self._save_changes()
 
-        self.save_hero_grid_config()
+    def _save_changes(self) -> None:
+        """Saves the hero grid config, unless every grid is unchanged."""
+        count("grids", **self.changes)
+        if self.changes["created"] or self.changes["updated"] or self._dirty:
+            self.save_hero_grid_config()
+        else:
+            count("write", skipped=1)
+
+    def _get_grid_key(self, bracket: Union[int, str], layout: int, ascending: bool, naming: dict) -> Optional[str]:
+        if self.grid_cache is None:
+            return None
+        if self._fingerprint is None:
+            self._fingerprint = stats_fingerprint(self.heroes)
+        # Rankings depend on the previous ranking (ties, and with hysteresis, close winrates)
+        hysteresis = self.config.get("hysteresis") or 0.0
+        previous = self.rankings.digest(bracket) if self.rankings else None
+        return grid_key(
+            self._fingerprint, bracket, layout, ascending, self.config_name, 
+            hysteresis=hysteresis, previous=previous, **naming
+        )
 
     def modify_grid(self, name: str) -> List[dict]:
+        self.grids = []
+        self.changes.clear()
         # Attempt to find a grid with matching name
         grid = self._get_grid(name)
         
         # NOTE: Prompt to select specific skill bracket?
-        h = HeroGrid(self.heroes, self.brackets[0], self.config)
+        h = HeroGrid(
+            self.get_ranking(self.brackets[0]), self.brackets[0], self.config, ranked=True
+        )
         grid = h.modify(grid)
 
         self.add_hero_grid(grid)
+        count("grids", **self.changes)
         self.save_hero_grid_config()
 
+    def reload_if_changed(self) -> bool:
+        """Reloads hero_grid_config.json if it has been modified since it 
+        was last loaded or saved by this instance (e.g. by the Dota 2 client)."""
+        if _get_file_stamp(self.path) == self._stamp:
+            return False
+        self.hero_grid_config = self.load_hero_grid_config()
+        return True
+
     def _get_grid(self, name: str) -> dict:
         """Attempts to find a grid by the given name. TODO: Expand description"""
         try:
             # find first grid with matching name
             grid = next(
                 g for g in self.hero_grid_config["configs"] 
-                if g["config_name"] == name
+                if g.config_name == name
             )
         except StopIteration:
             gridnames = "\n\t".join(
                 sorted(
-                    [c["config_name"] for c in self.hero_grid_config["configs"]]
+                    [c.config_name for c in self.hero_grid_config["configs"]]
                 )
             )
             if gridnames:
@@ -201,49 +396,109 @@ class HeroGridConfig:
         else:
             return grid
     
-    def add_hero_grid(self, grid: dict, *, overwrite: bool=True) -> None:
+    def add_hero_grid(self, grid: HeroGridModel, *, overwrite: bool=True) -> None:
         """Adds a hero grid to the hero grid config.
         NOTE:
         ----
         No methods currently make use of the `overwrite` parameter.
         """
-        name = grid["config_name"]
-        for idx, g in enumerate(self.hero_grid_config["configs"]):
-            if g["config_name"] == name:
-                if overwrite:
-                    self.hero_grid_config["configs"][idx] = grid
-                else:
-                    raise KeyError(
-                        f"A hero grid with the name '{name}' already exists!"
-                    )
-                break
+        grid = HeroGridModel.from_json(grid)
+        name = grid.config_name
+        configs = self.hero_grid_config["configs"]
+        idx = self._find_grid_index(name)
+        if idx is not None:
+            if overwrite:
+                # Grids modified in place can't be compared to their old version
+                unchanged = configs[idx] is not grid and configs[idx] == grid
+                self.changes["unchanged" if unchanged else "updated"] += 1
+                configs[idx] = grid
+            else:
+                raise KeyError(
+                    f"A hero grid with the name '{name}' already exists!"
+                )
         else:
-            self.hero_grid_config["configs"].append(grid)
+            self._grid_index[name] = len(configs)
+            configs.append(grid)
+            self.changes["created"] += 1
 
         self.grids.append(grid)
 
+    def _find_grid_index(self, name: str) -> Optional[int]:
+        """Returns index of the first grid with a given name in the hero grid config."""
+        configs = self.hero_grid_config["configs"]
+        idx = self._grid_index.get(name)
+        if idx is not None and idx < len(configs) and configs[idx].config_name == name:
+            return idx
+        # The index is stale (hero_grid_config was modified directly)
+        self._grid_index = {}
+        for i, g in enumerate(configs):
+            self._grid_index.setdefault(g.config_name, i)
+        return self._grid_index.get(name)
+
     def load_hero_grid_config(self, *, path: Path=None) -> dict:
-        """Loads hero_grid_config.json and parses it."""
-        p = path or self.path
-        with open(p, "r") as f:
-            try:
-                hero_grid_config = json.load(f)
-            except json.JSONDecodeError:
-                # Renames broken config and returns an empty config
-                # TODO: Verify hero_grid_config.json integrity
-                click.echo(f"{p} is empty or malformed. A new config will be created.")
-                name = f"hero_grid_config_INVALID_{datetime.now().isoformat()}.json"
-                p.rename(p.stem / name)
-                click.echo(f"The existing config was renamed to '{name}'")
-                hero_grid_config = copy.deepcopy(HERO_GRID_CONFIG_BASE)
-            finally:
-                return hero_grid_config
+        """Loads hero_grid_config.json and parses it.
+        
+        Malformed grids are repaired, or moved to a separate file if they
+        can't be repaired. If the file itself is malformed, it is renamed 
+        and an empty config is returned.
+        """
+        p = Path(path or self.path)
+        if not path:
+            self._stamp = _get_file_stamp(p)
+        with open(p, "r") as f, span("read") as s:
+            data = f.read()
+            s.add(bytes_read=len(data))
+        try:
+            hero_grid_config = json.loads(data)
+            if not isinstance(hero_grid_config, dict):
+                raise InvalidGrid("not an object")
+            hero_ids = {hero.id for hero in self.heroes} if self.heroes else None
+            grids, report = validate_grids(hero_grid_config.get("configs", []), hero_ids)
+            self._checked_hero_ids = hero_ids
+        except (ValueError, InvalidGrid): # InvalidGrid: e.g. "configs" is not a list
+            # Renames broken config and returns an empty config
+            click.echo(f"{p} is empty or malformed. A new config will be created.")
+            name = _quarantine_name(p, "INVALID")
+            p.rename(p.with_name(name))
+            click.echo(f"The existing config was renamed to '{name}'")
+            self._dirty = True
+            return get_new_hero_grid_config()
+
+        hero_grid_config["configs"] = grids
+        self._dirty = bool(report.repaired or report.quarantined)
+        if not report.ok:
+            click.echo(f"Problems were found in {p}:\n{report.summary()}")
+        if report.quarantined:
+            name = _quarantine_name(p, "QUARANTINE")
+            with open(p.with_name(name), "w", encoding="utf-8") as f:
+                json.dump({"version": hero_grid_config.get("version"), 
+                           "configs": report.quarantined}, f, indent="\t")
+            click.echo(f"Grids that could not be repaired were saved to '{name}'")
+        return hero_grid_config
 
     def save_hero_grid_config(self, *, path: Path=None) -> None:
         p = path or self.path
-        with open(p, "w") as f:
-            json_data = json.dumps(self.hero_grid_config, indent="\t")
+        with span("serialize"):
+            json_data = json.dumps(self.hero_grid_config, indent="\t", default=json_default)
+        with open(p, "w") as f, span("write") as s:
             f.write(json_data)
+            s.add(bytes_written=len(json_data))
+        if not path:
+            self._stamp = _get_file_stamp(p)
+            self._dirty = False
+
+
+def _quarantine_name(path: Path, kind: str) -> str:
+    """E.g. hero_grid_config_INVALID_2020-08-17_12-00-00.json"""
+    return f"{path.stem}_{kind}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{path.suffix}"
+
+
+def _get_file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 
 def get_hero_grid_config_path(path: str) -> Path:
@@ -272,24 +527,147 @@ def _new_hero_grid_config(path: Path) -> None:
         f.write(config)
 
 
-# NOTE: should this function reside in config.py instead?
-def detect_userdata_path() -> Path:  
+# Steam installation directories on Linux, in order of preference.
+# ~/.steam/steam is usually a symlink to one of the others.
+LINUX_STEAM_ROOTS = [
+    ".steam/steam",
+    ".local/share/Steam",
+    ".var/app/com.valvesoftware.Steam/.local/share/Steam",
+    ".var/app/com.valvesoftware.Steam/.steam/steam",
+    "Steam",
+]
+
+# Dota 2 cfg directory relative to a Steam account's userdata directory
+DOTA_CFG_DIR = "570/remote/cfg"
+
+
+def get_steam_roots() -> List[Path]:
+    """Returns candidate Steam installation directories for the current OS."""
     if sys.platform == "win32":
-        p = _get_steam_path_windows()
+        return [_get_steam_path_windows()]
     elif sys.platform == "darwin":
-        # NYI: Mac OS steam path detection
-        p = Path.home() / "Library/Application Support/Steam"
+        return [Path.home() / "Library/Application Support/Steam"]
     elif sys.platform == "linux":
-        # NYI: Mac OS steam path detection
-        p = Path.home() / "Steam"
-    else:
-        raise NotImplementedError("Userdata directory auto-detection is not supported for your OS!")  
-    
-    p = p / "userdata"
-    if not p.exists():
+        return [Path.home() / root for root in LINUX_STEAM_ROOTS]
+    raise NotImplementedError("Userdata directory auto-detection is not supported for your OS!")
+
+
+def get_userdata_dirs(roots: List[Path] = None) -> List[Path]:
+    """Returns every existing Steam userdata directory, with symlinks resolved
+    and duplicates removed."""
+    dirs = []
+    for root in (roots if roots is not None else get_steam_roots()):
+        p = root / "userdata"
+        if not p.is_dir():
+            continue
+        p = p.resolve()
+        if p not in dirs:
+            dirs.append(p)
+    return dirs
+
+
+# NOTE: should this function reside in config.py instead?
+def detect_userdata_path() -> Path:
+    dirs = get_userdata_dirs()
+    if not dirs:
         raise FileNotFoundError("Unable to automatically detect userdata directory!")
+    return dirs[0]
+
 
-    return p
+def _get_mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan_userdata_dirs(userdata_dirs: List[Path]) -> Tuple[List[Path], Dict[str, Optional[int]]]:
+    """Lists accounts in each userdata directory.
+    
+    Returns Dota 2 cfg directories found, as well as the modification times
+    of every directory that was inspected.
+    """
+    cfg_dirs = []
+    stamps = {}
+    for userdata in userdata_dirs:
+        stamps[str(userdata)] = _get_mtime(userdata)
+        for account in sorted(userdata.iterdir()):
+            if not account.is_dir():
+                continue
+            # Creating 570/remote/cfg changes the mtime of one of these
+            for d in [account, account / "570", account / "570/remote"]:
+                stamps[str(d)] = _get_mtime(d)
+            cfg_dir = account / DOTA_CFG_DIR
+            if cfg_dir.is_dir():
+                cfg_dirs.append(cfg_dir)
+    return cfg_dirs, stamps
+
+
+def _read_userdata_cache(cache: Path, roots: List[Path]) -> Optional[List[Path]]:
+    """Returns cached cfg directories if none of the directories that were
+    inspected when the cache was created have been modified since."""
+    try:
+        with open(cache, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("roots") != [str(r) for r in roots]:
+        return None
+    stamps = cached.get("stamps", {})
+    if any(_get_mtime(Path(p)) != mtime for p, mtime in stamps.items()):
+        return None
+    return [Path(d) for d in cached.get("cfg_dirs", [])]
+
+
+def _write_userdata_cache(cache: Path, 
+                          roots: List[Path], 
+                          cfg_dirs: List[Path], 
+                          stamps: Dict[str, Optional[int]]
+                         ) -> None:
+    # Roots that don't exist are recorded too, so a new Steam
+    # installation invalidates the cache
+    for root in roots:
+        stamps.setdefault(str(root / "userdata"), _get_mtime(root / "userdata"))
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache, "w") as f:
+            json.dump({
+                "roots": [str(r) for r in roots],
+                "stamps": stamps,
+                "cfg_dirs": [str(d) for d in cfg_dirs],
+            }, f)
+    except OSError:
+        pass # The cache is an optimization. Failing to write it is not an error.
+
+
+def discover_cfg_directories(*, 
+                             roots: List[Path] = None, 
+                             cache: Path = USERDATA_CACHE
+                            ) -> List[Path]:
+    """Finds the Dota 2 cfg directory of every Steam account on the system.
+    
+    Results are cached in `cache`, and are reused until one of the 
+    inspected directories is modified.
+    """
+    roots = roots if roots is not None else get_steam_roots()
+    cfg_dirs = _read_userdata_cache(cache, roots)
+    if cfg_dirs is None:
+        cfg_dirs, stamps = _scan_userdata_dirs(get_userdata_dirs(roots))
+        _write_userdata_cache(cache, roots, cfg_dirs, stamps)
+    return cfg_dirs
+
+
+def discover_hero_grid_config_path(**kwargs) -> Optional[Path]:
+    """Returns path of hero_grid_config.json if exactly one Steam account
+    with a Dota 2 cfg directory is found. Otherwise returns None.
+    """
+    try:
+        cfg_dirs = discover_cfg_directories(**kwargs)
+    except NotImplementedError:
+        return None
+    if len(cfg_dirs) != 1:
+        return None
+    return cfg_dirs[0] / "hero_grid_config.json"
 
 def _get_steam_path_windows(default: str="C:\\Program Files (x86)\\Steam") -> Path:
     import winreg
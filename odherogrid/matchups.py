@@ -0,0 +1,219 @@
+"""
+Hero matchups (`/api/heroes/{hero_id}/matchups`) and counter grids.
+
+Matchups are fetched concurrently, a bounded number of requests at a time,
+on a single pooled client. Each hero's matchups are cached on disk for
+`MATCHUPS_TTL`. Heroes whose matchups can't be fetched fall back on a
+stale cache entry, or are left out, rather than failing the whole fetch.
+
+Matchups are stored in a hero × hero `MatchupMatrix`, so counter grids for
+any number of heroes are built without further requests.
+"""
+
+import json
+import os
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .models import Hero, HeroGridModel
+from .profiling import count, span
+from .resources import _get_new_category, get_new_hero_grid
+from .settings import COUNTER_GRID_NAME, MATCHUPS_CACHE_DIR, OPENDOTA_API_URL
+
+MATCHUPS_URL = f"{OPENDOTA_API_URL}/heroes/{{hero_id}}/matchups"
+MATCHUPS_TTL = 24 * 60 * 60 # seconds
+CONCURRENCY = 8 # requests in flight
+MIN_GAMES = 20 # matchups with fewer games are left out of counter grids
+
+
+class MatchupMatrix:
+    """Games and wins of every hero against every other hero.
+
+    `games` and `wins` are flat n×n arrays, indexed by
+    `index[hero_id] * n + index[opponent_id]`. Wins are the wins of
+    the hero (row) against the opponent (column). Only the rows of
+    heroes in `fetched` are filled.
+    """
+    __slots__ = ("hero_ids", "index", "n", "games", "wins", "fetched", "missing")
+
+    def __init__(self, hero_ids: Iterable[int]) -> None:
+        self.hero_ids = sorted(set(hero_ids))
+        self.index: Dict[int, int] = {hero_id: i for i, hero_id in enumerate(self.hero_ids)}
+        self.n = n = len(self.hero_ids)
+        self.games = array("I", bytes(4 * n * n))
+        self.wins = array("I", bytes(4 * n * n))
+        self.fetched: Set[int] = set()
+        self.missing: List[int] = [] # heroes whose matchups couldn't be fetched
+
+    def add(self, hero_id: int, matchups: List[dict]) -> None:
+        """Adds the matchups of a hero (as returned by OpenDota)."""
+        row = self.index[hero_id] * self.n
+        for m in matchups:
+            j = self.index.get(m["hero_id"])
+            if j is None: # e.g. a hero that is new since the hero stats were fetched
+                continue
+            self.games[row + j] = m["games_played"]
+            self.wins[row + j] = m["wins"]
+        self.fetched.add(hero_id)
+
+    def winrate(self, hero_id: int, opponent_id: int) -> float:
+        """Winrate of a hero against an opponent."""
+        k = self.index[hero_id] * self.n + self.index[opponent_id]
+        return self.wins[k] / (self.games[k] or 1)
+
+    def counters(self, hero_id: int, min_games: int = MIN_GAMES) -> List[Tuple[int, float]]:
+        """Returns (opponent ID, opponent's winrate against the hero) of every
+        opponent with at least `min_games` games, best counters first."""
+        row = self.index[hero_id] * self.n
+        games, wins = self.games, self.wins
+        counters = [
+            (opponent_id, 1 - wins[row + j] / games[row + j])
+            for j, opponent_id in enumerate(self.hero_ids)
+            if games[row + j] and games[row + j] >= min_games
+        ]
+        counters.sort(key=lambda c: c[1], reverse=True) # stable: ties by hero ID
+        return counters
+
+
+def build_counter_grid(matrix: MatchupMatrix,
+                       hero: Hero,
+                       *,
+                       min_games: int = MIN_GAMES,
+                       name: str = COUNTER_GRID_NAME
+                      ) -> HeroGridModel:
+    """Creates a grid of the heroes that beat `hero` (winrate > 50% against it),
+    and the heroes it beats, each ranked by their winrate against `hero`."""
+    strong = _get_new_category(f"Strong against {hero.localized_name}", height=280.0)
+    weak = _get_new_category(f"Weak against {hero.localized_name}", y_pos=300.0, height=280.0)
+    for opponent_id, winrate in matrix.counters(hero.id, min_games):
+        category = strong if winrate > 0.5 else weak
+        category.hero_ids.append(opponent_id)
+    return get_new_hero_grid(f"{name} ({hero.localized_name})", [strong, weak])
+
+
+def find_heroes(heroes: List[Hero], names: Iterable[Union[str, int]]) -> List[Hero]:
+    """Finds heroes by ID or (case-insensitive) name. 'all' selects every hero.
+    Raises ValueError for unknown heroes."""
+    by_id = {hero.id: hero for hero in heroes}
+    by_name = {hero.localized_name.lower(): hero for hero in heroes}
+    found = {}
+    for name in names:
+        key = str(name).strip().lower()
+        if key == "all":
+            found.update(by_id)
+            continue
+        hero = by_id.get(int(key)) if key.isdigit() else by_name.get(key)
+        if hero is None:
+            raise ValueError(f"No such hero: '{name}'")
+        found[hero.id] = hero
+    return list(found.values())
+
+
+def _read_cache(cache_dir: Path, hero_id: int) -> Optional[dict]:
+    try:
+        with open(cache_dir / f"{hero_id}.json", "r") as f:
+            cached = json.load(f)
+        float(cached["time"])
+        _validate_matchups(cached["matchups"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return cached
+
+
+def _write_cache(cache_dir: Path, hero_id: int, matchups: list, etag: Optional[str]) -> None:
+    p = cache_dir / f"{hero_id}.json"
+    tmp = p.with_suffix(".tmp")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump({"time": time.time(), "etag": etag, "matchups": matchups}, f)
+        os.replace(tmp, p)
+    except OSError:
+        pass # The cache is an optimization. Failing to write it is not an error.
+
+
+def _validate_matchups(matchups: object) -> list:
+    """Raises ValueError if `matchups` is not a list of matchup objects."""
+    if not isinstance(matchups, list) or not all(
+        isinstance(m, dict)
+        and all(type(m.get(k)) is int and m[k] >= 0 for k in ("hero_id", "games_played", "wins"))
+        for m in matchups
+    ):
+        raise ValueError("Malformed matchups")
+    return matchups
+
+
+async def _fetch_all(hero_ids: List[int],
+                     cache_dir: Path,
+                     ttl: float,
+                     concurrency: int
+                    ) -> Dict[int, Optional[list]]:
+    import asyncio
+
+    import httpx
+
+    from .odapi import request_json_async
+
+    semaphore = asyncio.Semaphore(concurrency) # also bounds the client's connections
+    stats = {"hits": 0, "misses": 0, "fallbacks": 0}
+
+    async def fetch(client, hero_id: int) -> Optional[list]:
+        cached = _read_cache(cache_dir, hero_id)
+        if cached and time.time() - cached["time"] < ttl:
+            stats["hits"] += 1
+            return cached["matchups"]
+        headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+        url = MATCHUPS_URL.format(hero_id=hero_id)
+        async with semaphore:
+            try:
+                r, matchups = await request_json_async(
+                    client, url, headers, lambda r: _validate_matchups(r.json())
+                )
+            except (httpx.HTTPError, ValueError):
+                if cached:
+                    stats["hits"] += 1
+                    stats["fallbacks"] += 1
+                    return cached["matchups"] # stale, but better than nothing
+                return None
+        if r.status_code == 304:
+            stats["hits"] += 1
+            matchups = cached["matchups"]
+        else:
+            stats["misses"] += 1
+        _write_cache(cache_dir, hero_id, matchups, r.headers.get("ETag"))
+        return matchups
+
+    async with httpx.AsyncClient() as client:
+        results = await asyncio.gather(*(fetch(client, hero_id) for hero_id in hero_ids))
+    count("matchups cache", **stats)
+    return dict(zip(hero_ids, results))
+
+
+def fetch_matchups(hero_ids: Iterable[int],
+                   heroes: Iterable[int] = None,
+                   *,
+                   cache_dir: Union[str, Path] = MATCHUPS_CACHE_DIR,
+                   ttl: float = MATCHUPS_TTL,
+                   concurrency: int = CONCURRENCY
+                  ) -> MatchupMatrix:
+    """Fetches the matchups of `hero_ids`. The matrix also covers
+    `heroes` (e.g. the IDs of every hero), as opponents.
+
+    Heroes whose matchups can't be fetched (or read from the cache)
+    are listed in `MatchupMatrix.missing`.
+    """
+    import asyncio
+
+    hero_ids = list(dict.fromkeys(hero_ids))
+    matrix = MatchupMatrix(set(hero_ids).union(heroes or []))
+    results = asyncio.run(_fetch_all(hero_ids, Path(cache_dir), ttl, max(1, concurrency)))
+    with span("matchups") as s:
+        for hero_id, matchups in results.items():
+            if matchups is None:
+                matrix.missing.append(hero_id)
+            else:
+                matrix.add(hero_id, matchups)
+        s.add(heroes=len(matrix.fetched))
+    return matrix
@@ -0,0 +1,164 @@
+"""
+Metrics export (`--metrics PATH`) in the OpenMetrics text format,
+for e.g. node_exporter's textfile collector.
+
+Metrics are collected from the same spans as `--profile` (see: profiling.py),
+by registering a sink. Nothing is collected unless a path is given.
+The file is written atomically after every run (every refresh with --daemon),
+and counters accumulate for as long as the process runs.
+"""
+
+import os
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from . import profiling
+from .profiling import Span
+
+# Upper bounds of the fetch latency histogram buckets, in seconds
+FETCH_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Span counters that are exported with their own metric rather than
+# as odhg_<counter>_total{phase=...}
+CACHE_COUNTERS = ["hits", "misses", "fallbacks"]
+GRID_COUNTERS = ["created", "updated", "unchanged"]
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.path: Optional[Path] = None
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def reset(self) -> None:
+        # name: {labels: value}
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.gauges: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self.fetch_buckets = [0] * len(FETCH_BUCKETS)
+        self.fetch_sum = 0.0
+        self.fetch_count = 0
+
+    def enable(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.reset()
+        if self.observe not in profiling.SINKS:
+            profiling.SINKS.append(self.observe)
+
+    def disable(self) -> None:
+        self.path = None
+        if self.observe in profiling.SINKS:
+            profiling.SINKS.remove(self.observe)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        self.counters[name][tuple(sorted(labels.items()))] += value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        self.gauges[name][tuple(sorted(labels.items()))] = value
+
+    def observe(self, span: Span) -> None:
+        """Span sink. Called by every span when it ends."""
+        phase = span.name
+        self.inc("odhg_phase_seconds", span.duration, phase=phase)
+        self.inc("odhg_phase_calls", phase=phase)
+        if phase == "fetch":
+            self.observe_fetch(span.duration)
+        for k, v in span.counters.items():
+            if k.startswith("http_"):
+                self.inc("odhg_http_responses", v, code=k[len("http_"):])
+            elif k in CACHE_COUNTERS:
+                self.inc("odhg_cache_requests", v, cache=phase, result=k)
+            elif k in GRID_COUNTERS:
+                self.inc("odhg_grids", v, result=k)
+            else:
+                self.inc(f"odhg_{k}", v, phase=phase)
+
+    def observe_fetch(self, duration: float) -> None:
+        for i, bound in enumerate(FETCH_BUCKETS):
+            if duration <= bound:
+                self.fetch_buckets[i] += 1
+        self.fetch_sum += duration
+        self.fetch_count += 1
+
+    @contextmanager
+    def run(self):
+        """Times a run and writes metrics when it ends, even if it fails."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            if not isinstance(e, SystemExit) or e.code:
+                self.inc("odhg_run_failures")
+            raise
+        finally:
+            self.inc("odhg_runs")
+            self.set("odhg_last_run_duration_seconds", time.perf_counter() - start)
+            self.set("odhg_last_run_timestamp_seconds", time.time())
+            self.write()
+
+    def format(self) -> str:
+        lines = []
+        for name in sorted(self.counters):
+            # OpenMetrics counter samples have a _total suffix, families don't
+            family = name[:-len("_total")] if name.endswith("_total") else name
+            lines.append(f"# TYPE {family} counter")
+            for labels, value in sorted(self.counters[name].items()):
+                lines.append(f"{family}_total{_format_labels(labels)} {_format_value(value)}")
+        for name in sorted(self.gauges):
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(self.gauges[name].items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        if self.fetch_count:
+            name = "odhg_fetch_duration_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            lines.append(f"# UNIT {name} seconds")
+            for bound, n in zip(FETCH_BUCKETS, self.fetch_buckets):
+                lines.append(f'{name}_bucket{{le="{bound}"}} {n}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {self.fetch_count}')
+            lines.append(f"{name}_sum {_format_value(self.fetch_sum)}")
+            lines.append(f"{name}_count {self.fetch_count}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        """Writes metrics to a temporary file in the same directory,
+        then moves it into place, so readers never see a partial file."""
+        data = self.format()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.chmod(tmp, 0o644) # mkstemp creates files readable by the owner only
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+METRICS = Metrics()
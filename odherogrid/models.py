@@ -0,0 +1,283 @@
+"""
+Hero, hero grid and category models.
+
+Grid models map 1:1 onto the objects in hero_grid_config.json, but are cheaper
+to create and hold than the equivalent dicts. Item access (`grid["categories"]`)
+is supported, so models can be used wherever a grid dict was used before.
+
+`Hero` holds the subset of an OpenDota hero stats object that is needed 
+to rank heroes and lay out grids.
+"""
+
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from .enums import Bracket
+
+
+# Number of per-bracket stats stored for each hero. Indexed by Bracket value.
+N_BRACKETS = max(Bracket) + 1
+
+# Hero roles, in bit order. Roles not listed here are added as they are seen.
+ROLES = [
+    "Carry", "Support", "Nuker", "Disabler", "Jungler", 
+    "Durable", "Escape", "Pusher", "Initiator",
+]
+_ROLE_BITS: Dict[str, int] = {role: 1 << i for i, role in enumerate(ROLES)}
+_ROLES_LOCK = threading.Lock()
+
+
+def role_bit(role: str) -> int:
+    """Returns bitmask of a hero role."""
+    bit = _ROLE_BITS.get(role)
+    if bit is None:
+        with _ROLES_LOCK: # heroes can be created from several threads (see: api.py)
+            bit = _ROLE_BITS.get(role)
+            if bit is None:
+                ROLES.append(role)
+                bit = _ROLE_BITS[role] = 1 << (len(ROLES) - 1)
+    return bit
+
+
+def role_mask(roles: List[str]) -> int:
+    mask = 0
+    for role in roles:
+        mask |= role_bit(role)
+    return mask
+
+
+class Hero:
+    """Compact hero stats record.
+
+    `wins` and `picks` are indexed by `Bracket` value. Item access with the
+    keys of the OpenDota hero stats object (`hero["7_win"]`) is supported.
+    """
+    __slots__ = (
+        "id", "localized_name", "primary_attr", "attack_type", "roles", "wins", "picks"
+    )
+
+    def __init__(self,
+                 id: int,
+                 localized_name: str,
+                 primary_attr: str,
+                 attack_type: str,
+                 roles: int = 0,
+                 wins: array = None,
+                 picks: array = None
+                ) -> None:
+        self.id = id
+        self.localized_name = localized_name
+        self.primary_attr = primary_attr
+        self.attack_type = attack_type
+        self.roles = roles # bitmask, see: role_bit()
+        self.wins = wins if wins is not None else array("I", bytes(4 * N_BRACKETS))
+        self.picks = picks if picks is not None else array("I", bytes(4 * N_BRACKETS))
+
+    def has_role(self, role: str) -> bool:
+        return bool(self.roles & role_bit(role))
+
+    def get_roles(self) -> List[str]:
+        return [role for role in ROLES if self.roles & _ROLE_BITS[role]]
+
+    def winrate(self, bracket: int) -> float:
+        return self.wins[bracket] / (self.picks[bracket] or 1)
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Hero":
+        """Creates a hero from an OpenDota hero stats object. Pro stats can 
+        be named either `pro_<stat>` (OpenDota) or `9_<stat>` (`to_json()`)."""
+        if isinstance(d, Hero):
+            return d
+        wins = array("I", bytes(4 * N_BRACKETS))
+        picks = array("I", bytes(4 * N_BRACKETS))
+        for b in range(1, N_BRACKETS):
+            wins[b] = d.get(f"{b}_win") or 0
+            picks[b] = d.get(f"{b}_pick") or 0
+        if "pro_win" in d:
+            wins[Bracket.PRO] = d["pro_win"] or 0
+            picks[Bracket.PRO] = d.get("pro_pick") or 0
+        return cls(
+            d["id"],
+            d.get("localized_name", ""),
+            sys.intern(d.get("primary_attr") or ""),
+            sys.intern(d.get("attack_type") or ""),
+            role_mask(d.get("roles") or []),
+            wins,
+            picks,
+        )
+
+    def to_json(self) -> dict:
+        d = {
+            "id": self.id,
+            "localized_name": self.localized_name,
+            "primary_attr": self.primary_attr,
+            "attack_type": self.attack_type,
+            "roles": self.get_roles(),
+        }
+        for b in range(1, N_BRACKETS):
+            d[f"{b}_win"] = self.wins[b]
+            d[f"{b}_pick"] = self.picks[b]
+        return d
+
+    def __getitem__(self, key: str):
+        if key in self.__slots__:
+            return self.get_roles() if key == "roles" else getattr(self, key)
+        bracket, _, stat = key.partition("_")
+        if bracket.isdigit() and 0 < int(bracket) < N_BRACKETS:
+            if stat == "win":
+                return self.wins[int(bracket)]
+            if stat == "pick":
+                return self.picks[int(bracket)]
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Hero):
+            return self.to_json() == other.to_json()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Hero(id={self.id}, localized_name={self.localized_name!r})"
+
+
+class _Model:
+    __slots__ = ("extra",)
+    _fields: tuple = ()
+
+    def __getitem__(self, key: str):
+        if key in self._fields:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fields or bool(self.extra and key in self.extra)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (_Model, dict)):
+            return self.to_json() == (
+                other.to_json() if isinstance(other, _Model) else other
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_json()!r})"
+
+    def to_json(self) -> dict:
+        raise NotImplementedError
+
+
+class Category(_Model):
+    __slots__ = _fields = (
+        "category_name", "x_position", "y_position", "width", "height", "hero_ids"
+    )
+
+    def __init__(self,
+                 category_name: str = "name",
+                 x_position: float = 0.0,
+                 y_position: float = 0.0,
+                 width: float = 1180.0,
+                 height: float = 180.0,
+                 hero_ids: List[int] = None,
+                 extra: Optional[dict] = None
+                ) -> None:
+        self.category_name = category_name
+        self.x_position = x_position
+        self.y_position = y_position
+        self.width = width
+        self.height = height
+        self.hero_ids = hero_ids if hero_ids is not None else []
+        self.extra = extra # unknown keys, preserved when saving
+
+    def to_json(self) -> dict:
+        d = {
+            "category_name": self.category_name,
+            "x_position": self.x_position,
+            "y_position": self.y_position,
+            "width": self.width,
+            "height": self.height,
+            "hero_ids": self.hero_ids,
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Category":
+        if isinstance(d, Category):
+            return d
+        d = dict(d)
+        return cls(
+            d.pop("category_name", "name"),
+            d.pop("x_position", 0.0),
+            d.pop("y_position", 0.0),
+            d.pop("width", 1180.0),
+            d.pop("height", 180.0),
+            d.pop("hero_ids", None),
+            d or None,
+        )
+
+
+class HeroGridModel(_Model):
+    __slots__ = _fields = ("config_name", "categories")
+
+    def __init__(self,
+                 config_name: str,
+                 categories: List[Category] = None,
+                 extra: Optional[dict] = None
+                ) -> None:
+        self.config_name = config_name
+        self.categories = categories if categories is not None else []
+        self.extra = extra # unknown keys, preserved when saving
+
+    def to_json(self) -> dict:
+        d = {
+            "config_name": self.config_name,
+            "categories": [
+                c.to_json() if isinstance(c, _Model) else c for c in self.categories
+            ],
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    @classmethod
+    def from_json(cls, d: dict) -> "HeroGridModel":
+        if isinstance(d, HeroGridModel):
+            return d
+        d = dict(d)
+        return cls(
+            d.pop("config_name", None),
+            [Category.from_json(c) for c in d.pop("categories", None) or []],
+            d or None,
+        )
+
+
+def json_default(obj: object) -> dict:
+    """`default` argument for `json.dump(s)` of objects containing models or heroes."""
+    if isinstance(obj, (_Model, Hero)):
+        return obj.to_json()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -1,14 +1,431 @@
-import httpx
+import email.utils
+import hashlib
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, Union
 
-from .enums import Bracket
+from .models import Hero
+from .profiling import count, span
+from .settings import HERO_STATS_CACHE, OPENDOTA_API_URL, RATE_LIMIT_FILE
 
+HERO_STATS_URL = f"{OPENDOTA_API_URL}/heroStats"
 
-def fetch_hero_stats() -> list:
-    """Retrieves hero win/loss statistics from OpenDotaAPI."""
-    r = httpx.get("https://api.opendota.com/api/heroStats")
-    heroes = r.json()
-    # Rename pro_<stat> to 8_<stat>, so it's easier to work with our enum
-    for hero in heroes:
-        for stat in ["win", "pick", "ban"]:
-            hero[f"{Bracket.PRO.value}_{stat}"] = hero.pop(f"pro_{stat}")
+# Retrying failed requests
+MAX_RETRIES = 3
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+BACKOFF = 0.5 # seconds, doubled for every retry
+MAX_RETRY_AFTER = 60 # seconds. Longer Retry-After values are capped to this
+
+# Rate limiting (see: RateLimiter)
+RATE_LIMIT_PERIODS = {"minute": 60, "day": 24*60*60, "month": 31*24*60*60} # seconds
+MAX_RATE_LIMIT_WAIT = 5 * 60 # seconds. Requests that would wait longer fail instead
+JITTER = 0.25 # random extra wait, as a fraction of the interval between requests
+
+
+def fetch_hero_stats(source: str = None, *, cache: Union[str, Path] = None) -> List[Hero]:
+    """Retrieves hero win/loss statistics from OpenDotaAPI, or from an 
+    ODHG server (`odhg serve`) if `source` is given.
+    
+    The last response is cached. It is used to make the request conditional,
+    and as a fallback if the stats can't be fetched.
+    """
+    import httpx # deferred, importing httpx is slow
+
+    url = get_source_stats_url(source) if source else HERO_STATS_URL
+    cache = Path(cache or HERO_STATS_CACHE)
+    cached = _read_stats_cache(cache, url)
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    try:
+        with httpx.Client() as client:
+            r, heroes = request_json(client, url, headers)
+    except httpx.HTTPError as e:
+        if not cached:
+            raise
+        from .error import eprint
+        eprint(f"Unable to fetch hero stats: {e}\n"
+               f"Using cached hero stats from {cached['date']}.")
+        heroes = json.loads(cached["body"])
+        count("stats cache", hits=1, fallbacks=1)
+    else:
+        if r.status_code == 304:
+            heroes = json.loads(cached["body"])
+            count("stats cache", hits=1)
+        else:
+            _write_stats_cache(cache, url, r)
+            count("stats cache", misses=1)
+
+    return _normalize_hero_stats(heroes)
+
+
+def request_json(client, 
+                 url: str, 
+                 headers: dict = None, 
+                 decode: Callable = None
+                ) -> Tuple[object, Optional[list]]:
+    """GETs and decodes JSON from `url`. Connection errors, timeouts, 
+    truncated or malformed bodies, 429 and 5xx responses are retried.
+    The body is decoded with `decode(response)` (default: hero stats).
+    
+    Returns response and decoded body (None if the response is 304).
+    """
+    import httpx
+
+    decode = decode or _decode_hero_stats
+    limiter = RATE_LIMITER if _is_opendota(url) else None
+    auth = limiter.get_auth() if limiter else None
+
+    for attempt in range(MAX_RETRIES + 1):
+        last = attempt == MAX_RETRIES
+        if limiter:
+            time.sleep(limiter.reserve())
+        try:
+            with span("fetch") as s:
+                r = client.get(url, headers=headers, **_auth_kwargs(auth))
+                s.add(bytes_read=len(r.content), requests=1, **{f"http_{r.status_code}": 1})
+        except httpx.HTTPError:
+            if last:
+                raise
+            _wait(attempt)
+            continue
+        if limiter:
+            limiter.update(r.headers)
+
+        if r.status_code == 304:
+            return r, None
+        if r.status_code in RETRY_STATUSES and not last:
+            _wait(attempt, r.headers.get("Retry-After"))
+            continue
+        r.raise_for_status()
+        
+        try:
+            return r, decode(r)
+        except ValueError: # truncated or otherwise malformed JSON
+            if last:
+                raise
+            _wait(attempt)
+
+
+async def request_json_async(client, 
+                             url: str, 
+                             headers: dict = None, 
+                             decode: Callable = None
+                            ) -> Tuple[object, Optional[object]]:
+    """`request_json()` for an `httpx.AsyncClient`. The body is decoded with
+    `decode(response)` (default: `response.json()`)."""
+    import asyncio
+
+    import httpx
+
+    decode = decode or (lambda r: r.json())
+    # The limiter reads config.yml and locks its state file, which may block.
+    # Keep it off the event loop.
+    loop = asyncio.get_event_loop()
+    limiter = RATE_LIMITER if _is_opendota(url) else None
+    auth = await loop.run_in_executor(None, limiter.get_auth) if limiter else None
+
+    for attempt in range(MAX_RETRIES + 1):
+        last = attempt == MAX_RETRIES
+        if limiter:
+            await asyncio.sleep(await loop.run_in_executor(None, limiter.reserve))
+        try:
+            with span("fetch") as s:
+                r = await client.get(url, headers=headers, **_auth_kwargs(auth))
+                s.add(bytes_read=len(r.content), requests=1, **{f"http_{r.status_code}": 1})
+        except httpx.HTTPError:
+            if last:
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        if limiter:
+            await loop.run_in_executor(None, limiter.update, r.headers)
+
+        if r.status_code == 304:
+            return r, None
+        if r.status_code in RETRY_STATUSES and not last:
+            await asyncio.sleep(_retry_delay(attempt, r.headers.get("Retry-After")))
+            continue
+        r.raise_for_status()
+
+        try:
+            return r, decode(r)
+        except ValueError:
+            if last:
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+
+
+class RateLimiter:
+    """Client-side governor for OpenDota's rate limits. The budget is kept
+    in a state file, so that every ODHG process on a machine shares it.
+
+    Each `X-Rate-Limit-Remaining-<Period>` response header (minute, day,
+    month) resets a token bucket, which refills at its capacity (the most
+    requests remaining seen, plus one) per period. Every request takes a
+    token from each bucket, and waits for the bucket to refill if it is
+    empty. Requests are also paced at the per-minute capacity, with jitter,
+    so that concurrent runs (e.g. from cron) take turns instead of bursting.
+
+    Until OpenDota has sent rate-limit headers, requests are not delayed.
+    The budget of each API key (and of requests without one) is separate.
+    """
+
+    def __init__(self, path: Union[str, Path] = RATE_LIMIT_FILE, api_key: str = None) -> None:
+        self.path = Path(path)
+        self._api_key = api_key
+
+    @property
+    def api_key(self) -> Optional[str]:
+        """The API key (default: `api_key` in config.yml)."""
+        if self._api_key is None:
+            from .config import get_api_key
+            self._api_key = get_api_key() or ""
+        return self._api_key or None
+
+    @api_key.setter
+    def api_key(self, api_key: Optional[str]) -> None:
+        self._api_key = api_key
+
+    @property
+    def budget(self) -> str:
+        """Name of the budget in the state file."""
+        if not self.api_key:
+            return "anonymous"
+        return "key:" + hashlib.sha1(self.api_key.encode()).hexdigest()[:12]
+
+    def get_auth(self) -> Optional[Callable]:
+        """Returns httpx auth that sends the API key as a bearer token, or None
+        if there is no key. The key is added to the request by httpx, so it
+        isn't kept in the locals of `request_json()` (which error logs dump)."""
+        return self._authorize if self.api_key else None
+
+    def _authorize(self, request):
+        request.headers["Authorization"] = f"Bearer {self.api_key}"
+        return request
+
+    def reserve(self) -> float:
+        """Reserves a request. Returns how long to wait (in seconds) before 
+        sending it. Raises httpx.HTTPError if the wait would be too long."""
+        if not self.path.exists():
+            return 0.0 # no rate-limit headers seen yet
+        now = time.time()
+        try:
+            with self._state() as state:
+                budget = state.get(self.budget)
+                if not budget:
+                    return 0.0
+                wait, interval = 0.0, 0.0
+                buckets = budget["buckets"]
+                for period, b in buckets.items():
+                    rate = b["capacity"] / RATE_LIMIT_PERIODS[period] # tokens per second
+                    b["tokens"] = min(b["capacity"], b["tokens"] + (now - b["time"]) * rate)
+                    b["time"] = now
+                    if b["tokens"] < 1:
+                        wait = max(wait, (1 - b["tokens"]) / rate)
+                if "minute" in buckets:
+                    interval = RATE_LIMIT_PERIODS["minute"] / buckets["minute"]["capacity"]
+                    wait = max(wait, budget["next"] - now)
+                if wait > MAX_RATE_LIMIT_WAIT:
+                    import httpx
+                    raise httpx.HTTPError(
+                        f"OpenDota rate limit reached. Next request possible in {wait:.0f}s."
+                    )
+                if wait > 0:
+                    wait += random.uniform(0, JITTER * interval)
+                for b in buckets.values():
+                    b["tokens"] -= 1
+                budget["next"] = now + wait + interval
+        except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError):
+            return 0.0 # The governor is a courtesy. A broken state file is not an error.
+        if wait:
+            count("rate limit", waits=1, wait_ms=int(wait * 1000))
+        return wait
+
+    def update(self, headers) -> None:
+        """Updates the budget from the rate-limit headers of a response."""
+        remaining = {}
+        for period in RATE_LIMIT_PERIODS:
+            value = headers.get(f"X-Rate-Limit-Remaining-{period.title()}")
+            if value is not None and value.strip().isdigit():
+                remaining[period] = int(value)
+        if not remaining:
+            return
+        now = time.time()
+        try:
+            with self._state() as state:
+                budget = state.setdefault(self.budget, {"buckets": {}, "next": 0.0})
+                for period, n in remaining.items():
+                    b = budget["buckets"].setdefault(period, {"capacity": 1})
+                    b.update(capacity=max(b["capacity"], n + 1), tokens=n, time=now)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+    @contextmanager
+    def _state(self) -> Iterator[dict]:
+        """Locks the state file, and yields its contents. The contents
+        are written back unless an exception is raised."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+", encoding="utf-8") as f:
+            _lock(f)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                if not isinstance(state, dict):
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                _unlock(f)
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+RATE_LIMITER = RateLimiter()
+
+
+def _is_opendota(url: str) -> bool:
+    return url.startswith(OPENDOTA_API_URL)
+
+
+def _auth_kwargs(auth: Optional[Callable]) -> dict:
+    return {"auth": auth} if auth else {}
+
+
+def _wait(attempt: int, retry_after: str = None) -> None:
+    time.sleep(_retry_delay(attempt, retry_after))
+
+
+def _retry_delay(attempt: int, retry_after: str = None) -> float:
+    delay = BACKOFF * 2**attempt
+    if retry_after:
+        delay = _parse_retry_after(retry_after, delay)
+    return min(delay, MAX_RETRY_AFTER)
+
+
+def _parse_retry_after(value: str, default: float) -> float:
+    """Parses Retry-After header, which is either seconds or an HTTP date."""
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max((date - datetime.now(date.tzinfo)).total_seconds(), 0)
+
+
+def _read_stats_cache(cache: Path, url: str) -> Optional[dict]:
+    try:
+        with open(cache, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached if cached.get("url") == url else None
+
+
+def _write_stats_cache(cache: Path, url: str, r) -> None:
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache, "w") as f:
+            json.dump({
+                "url": url,
+                "etag": r.headers.get("ETag"),
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "body": r.text,
+            }, f)
+    except OSError:
+        pass # The cache is an optimization. Failing to write it is not an error.
+
+
+def _decode_hero_stats(r) -> list:
+    with span("decode") as s:
+        heroes = r.json()
+        s.add(heroes=len(heroes))
     return heroes
+
+
+def get_source_stats_url(source: str) -> str:
+    return f"{source.rstrip('/')}/stats"
+
+
+def _normalize_hero_stats(heroes: List[dict]) -> List[Hero]:
+    """Converts hero stats objects (from OpenDota or an ODHG server) 
+    to `Hero` records."""
+    with span("normalize"):
+        return [Hero.from_json(hero) for hero in heroes]
+
+
+class HeroStatsFetcher:
+    """Fetches hero stats repeatedly using a persistent HTTP client.
+
+    Requests are conditional (`If-None-Match`), and the response body is
+    hashed in case the server ignores the ETag, so unchanged stats can 
+    be detected without comparing the decoded payloads.
+    """
+
+    def __init__(self, client=None, source: str = None) -> None:
+        self._client = client
+        self.source = source # ODHG server URL
+        self.etag: Optional[str] = None
+        self.digest: Optional[str] = None
+        self.heroes: Optional[List[Hero]] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import httpx
+            self._client = httpx.Client()
+        return self._client
+
+    def fetch(self) -> Tuple[list, bool]:
+        """Returns hero stats and whether they changed since the last fetch."""
+        headers = {}
+        if self.etag and self.heroes is not None:
+            headers["If-None-Match"] = self.etag
+        url = get_source_stats_url(self.source) if self.source else HERO_STATS_URL
+        r, heroes = request_json(self.client, url, headers)
+        if r.status_code == 304:
+            return self.heroes, False
+
+        self.etag = r.headers.get("ETag")
+        digest = hashlib.sha1(r.content).hexdigest()
+        if digest == self.digest:
+            return self.heroes, False
+        self.digest = digest
+        self.heroes = _normalize_hero_stats(heroes)
+        return self.heroes, True
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
@@ -1,15 +1,17 @@
+from pathlib import Path
 from typing import List
 
 import click
-from terminaltables import SingleTable
 
-from .cli.params import get_click_params, help, quiet, setup
-from .cli.parse import parse_config
+from .cli.params import (BATCH_PARAMS, SERVE_PARAMS, get_click_params, help,
+                         quiet, setup, version)
 from .cli.utils import progress
-from .config import CONFIG_BASE, load_config
-from .error import handle_exception
-from .herogrid import HeroGridConfig
-from .odapi import fetch_hero_stats
+
+# NOTE: Heavier modules (config, herogrid, odapi, error) are imported
+#       where they are used, so that --help and --version don't need them.
+
+# Config keys whose values are resolved by parse_config()
+PARSED_CONFIG_KEYS = ["brackets", "layout", "path"]
 
 
 def get_config_from_cli_args(**options) -> dict:
@@ -17,6 +19,15 @@ def get_config_from_cli_args(**options) -> dict:
     
     Returns config
     """
+    from .profiling import span
+
+    with span("load config"):
+        return _get_config_from_cli_args(**options)
+
+
+def _get_config_from_cli_args(**options) -> dict:
+    from .cli.parse import parse_config
+    from .config import CONFIG_BASE, load_config_and_cache
     
     # Use kwargs as config if all required config keys are specified
     # and their values are not None
@@ -28,13 +39,18 @@ def get_config_from_cli_args(**options) -> dict:
         config = options
     else: # Load config.yml if not all required config keys are passed in
           # as CLI arguments.
-        config = load_config() # If no config exists, first-time setup is run.
+        # If no config exists, first-time setup is run.
+        config, cached_parsed = load_config_and_cache()
         # Add missing args using values from config.yml
+        overrides = {}
         for option, arg in options.items():
             if arg or arg == 0: # we need to accept 0 as a valid arg
                 # TODO: Check if we can just write if arg not in [None, []]
                 #       or arg is not None
-                config[option] = arg
+                overrides[option] = arg
+        if not any(k in overrides for k in PARSED_CONFIG_KEYS):
+            return _get_parsed_config(config, overrides, cached_parsed)
+        config.update(overrides)
 
     # Parse config values
     config = parse_config(config)
@@ -42,17 +58,40 @@ def get_config_from_cli_args(**options) -> dict:
     return config
 
 
+def _get_parsed_config(config: dict, overrides: dict, parsed: dict = None) -> dict:
+    """Parses config loaded from 'config.yml', reusing the cached result
+    from a previous run (`parsed`) if 'config.yml' is unchanged."""
+    from .cli.parse import parse_config
+    from .config import write_config_cache
+
+    if parsed and Path(parsed["path"]).exists():
+        parsed["path"] = Path(parsed["path"])
+    else:
+        parsed = parse_config(dict(config))
+        write_config_cache(config, parsed=parsed)
+    parsed.update(overrides)
+    return parsed
+
+
 def print_gridnames(config: dict, grids: List[str]) -> None:
+    from terminaltables import SingleTable
+
     heading = [["Grids Created:"]]
     table = SingleTable(heading + [[g["config_name"]] for g in grids])
     click.echo(table.table)
     click.echo(f"Changes were saved to {config['path']}")
     
 
-@click.command()
+@click.group(invoke_without_command=True)
 def main(**options) -> None:
+    if click.get_current_context().invoked_subcommand:
+        return # e.g. `odhg serve`
+
     if options.pop("help", None):
         help()
+
+    if options.pop("version", None):
+        version()
     
     if options.pop("setup", None):
         options = setup(options)
@@ -61,17 +100,126 @@ def main(**options) -> None:
         quiet()
 
     name = options.pop("name", None) # Sorting of custom grids (--name)
+    daemon = options.pop("daemon", None)
+    interval = options.pop("interval", None)
+    watch = options.pop("watch", None)
+    source = options.pop("source", None) # URL of `odhg serve` server
+    profile = options.pop("profile", None)
+    memprofile = options.pop("memprofile", None)
+    metrics = options.pop("metrics", None)
+    counters = options.pop("counters", None) # Counter grids (--counters)
+    min_games = options.pop("min_games", None)
+    pro_days = options.pop("pro_days", None) # Recent pro winrates (--pro-days)
+
+    if metrics:
+        from .metrics import METRICS
+        METRICS.enable(metrics)
+
+    if daemon:
+        # Not supported by the daemon, which would silently ignore them
+        unsupported = {
+            "--profile": profile, "--memprofile": memprofile, "--watch": watch, 
+            "--counters": counters, "--min-games": min_games, "--pro-days": pro_days,
+        }
+        used = [flag for flag, value in unsupported.items() if value]
+        if used:
+            raise click.UsageError(f"--daemon can't be combined with {', '.join(used)}.")
+        from .daemon import run_daemon
+        return run_daemon(
+            lambda: get_config_from_cli_args(**options), interval, name, source
+        )
+
+    if profile or memprofile:
+        from .profiling import PROFILER
+        PROFILER.enable(memory=memprofile)
+        try:
+            return _run(config_options=options, name=name, source=source, watch=watch,
+                        counters=counters, min_games=min_games, pro_days=pro_days)
+        finally:
+            PROFILER.report(profile or "table")
+            PROFILER.disable()
+    _run(config_options=options, name=name, source=source, watch=watch,
+         counters=counters, min_games=min_games, pro_days=pro_days)
 
-    config = get_config_from_cli_args(**options)
 
-    # Fetch hero W/L stats from API
-    with progress("Fetching hero data... "):
-        hero_stats = fetch_hero_stats()
+def _run(**kwargs) -> None:
+    from .metrics import METRICS
+    with METRICS.run(): # writes --metrics file, if enabled
+        run(**kwargs)
+
+
+def run(config_options: dict, 
+        name: str = None, 
+        source: str = None, 
+        watch: bool = False, 
+        counters: List[str] = None, 
+        min_games: int = None,
+        pro_days: int = None
+       ) -> None:
+    """Loads config, fetches hero stats and creates (or sorts) grids.
     
+    Hero stats are fetched in a worker thread while the config and 
+    hero_grid_config.json are loaded.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .odapi import fetch_hero_stats
+
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fetch")
+    try:
+        # Fetch hero W/L stats from API
+        future = pool.submit(fetch_hero_stats, source)
+        
+        config = get_config_from_cli_args(**config_options)
+        from .gridcache import GridCache
+        from .herogrid import HeroGridConfig
+        from .rankings import RankingStore
+        h = HeroGridConfig(None, config, grid_cache=GridCache(), rankings=RankingStore())
+
+        with progress("Fetching hero data... "):
+            hero_stats = future.result()
+    finally:
+        pool.shutdown(wait=False)
+
+    if pro_days:
+        import sqlite3
+
+        import httpx
+
+        from .promatches import update_pro_stats
+        try:
+            with progress("Fetching pro matches... "):
+                result = update_pro_stats(hero_stats, pro_days)
+        except (httpx.HTTPError, ValueError, sqlite3.Error) as e:
+            click.echo(f"Unable to fetch pro matches ({e}). Using OpenDota's pro stats.")
+        else:
+            if result.pending:
+                click.echo(f"Fetched {result.added} pro match(es). "
+                           f"{result.pending} will be fetched by later runs.")
+    h.set_heroes(hero_stats)
+    
+    if watch:
+        from .watch import watch as watch_grids
+        return watch_grids(h)
+
+    if counters:
+        from .matchups import fetch_matchups, find_heroes
+        try:
+            targets = find_heroes(hero_stats, counters)
+        except ValueError as e:
+            raise SystemExit(e.args[0])
+        with progress("Fetching matchups... "):
+            matrix = fetch_matchups(
+                [hero.id for hero in targets], [hero.id for hero in hero_stats]
+            )
+        if matrix.missing:
+            click.echo(f"Unable to fetch matchups of hero(es) with ID {matrix.missing}")
+
     with progress("Creating grids... "):
-        h = HeroGridConfig(hero_stats, config)
         if name: # Sort custom grid
             h.modify_grid(name)
+        elif counters: # Make counter grids
+            h.create_counter_grids(matrix, targets, min_games)
         else:    # Make new grid
             h.create_grids()
 
@@ -82,8 +230,28 @@ def main(**options) -> None:
 main.params.extend(get_click_params())
 
 
+@main.command()
+def serve(host: str, port: int, interval: int) -> None:
+    from .server import run_server
+    run_server(host, port, interval)
+
+
+serve.params.extend(get_click_params(SERVE_PARAMS))
+
+
+@main.command()
+@click.argument("configs", type=click.Path(exists=True, dir_okay=False))
+def batch(configs: str, workers: int, source: str) -> None:
+    from .batch import run_batch
+    run_batch(configs, workers, source)
+
+
+batch.params.extend(get_click_params(BATCH_PARAMS))
+
+
 def _main(**kwargs) -> None:
     """Experimental main() alternative with an exception handler."""
+    from .error import handle_exception
     try:
         main(**kwargs)
     except Exception as e:
@@ -0,0 +1,230 @@
+"""
+Lightweight per-phase timing (`--profile`) and memory usage (`--memprofile`).
+
+Code reports into spans:
+
+    with span("fetch") as s:
+        r = httpx.get(url)
+        s.add(bytes_read=len(r.content))
+
+When profiling is disabled (and no sinks such as `--metrics` are 
+registered), `span()` returns a shared no-op object, so instrumented 
+code pays for little more than a function call.
+
+Memory profiling uses `tracemalloc`, which slows everything down 
+considerably, and is therefore enabled separately. Peak memory is 
+measured for every span, but allocation sites (which require comparing
+snapshots of every traced allocation) only for the first span of each name.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import click
+
+
+# Number of allocation sites reported per phase
+TOP_ALLOCATIONS = 3
+
+
+class Span:
+    __slots__ = ["name", "start", "duration", "counters", "memory", "_snapshot"]
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+        self.duration = 0.0
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.memory: Optional[dict] = None # see: Profiler.memory_exit()
+        self._snapshot = None
+
+    def add(self, **counters: int) -> None:
+        """Adds to counters such as `bytes_read`, `heroes` or `grids`."""
+        for k, v in counters.items():
+            self.counters[k] += v
+
+    def __enter__(self) -> "Span":
+        if PROFILER.memory:
+            PROFILER.memory_enter(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.duration = time.perf_counter() - self.start
+        if PROFILER.memory:
+            PROFILER.memory_exit(self)
+        if PROFILER.enabled:
+            PROFILER.record(self)
+        for sink in SINKS:
+            sink(self)
+
+
+class NullSpan:
+    """Span used when profiling is disabled."""
+    __slots__ = []
+
+    def add(self, **counters: int) -> None:
+        pass
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.memory = False
+        self.spans: List[Span] = []
+        self.start = 0.0
+        self._sampled = set() # names of spans with allocation sites
+
+    def enable(self, memory: bool = False) -> None:
+        self.enabled = True
+        self.memory = memory
+        self.spans = []
+        self._sampled = set()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.start = time.perf_counter()
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self.memory:
+            self.memory = False
+            tracemalloc.stop()
+
+    def record(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def memory_enter(self, span: Span) -> None:
+        if span.name not in self._sampled:
+            self._sampled.add(span.name)
+            span._snapshot = tracemalloc.take_snapshot()
+        if hasattr(tracemalloc, "reset_peak"): # Python 3.9+
+            tracemalloc.reset_peak()
+        span.memory = {"start": tracemalloc.get_traced_memory()[0]}
+
+    def memory_exit(self, span: Span) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        start = span.memory["start"]
+        span.memory = {
+            "peak_memory": peak - start,
+            "net_memory": current - start,
+            "top_allocations": [],
+        }
+        if span._snapshot is not None:
+            stats = tracemalloc.take_snapshot().compare_to(span._snapshot, "lineno")
+            span._snapshot = None
+            span.memory["top_allocations"] = [
+                {"site": str(stat.traceback[0]), "size": stat.size_diff}
+                for stat in sorted(stats, key=lambda s: s.size_diff, reverse=True)
+                if stat.size_diff > 0 and not _is_own_allocation(stat)
+            ][:TOP_ALLOCATIONS]
+
+    def summary(self) -> dict:
+        """Returns spans aggregated by name, in the order they first occurred."""
+        phases = {}
+        for s in self.spans:
+            p = phases.setdefault(s.name, {"name": s.name, "calls": 0, "duration": 0.0})
+            p["calls"] += 1
+            p["duration"] += s.duration
+            for k, v in s.counters.items():
+                p[k] = p.get(k, 0) + v
+            if s.memory:
+                p["peak_memory"] = max(p.get("peak_memory", 0), s.memory["peak_memory"])
+                p["net_memory"] = p.get("net_memory", 0) + s.memory["net_memory"]
+                p.setdefault("top_allocations", []).extend(s.memory["top_allocations"])
+        for p in phases.values():
+            if "top_allocations" in p:
+                p["top_allocations"] = sorted(
+                    p["top_allocations"], key=lambda a: a["size"], reverse=True
+                )[:TOP_ALLOCATIONS]
+        summary = {
+            "total": time.perf_counter() - self.start,
+            "phases": list(phases.values()),
+        }
+        if self.memory:
+            summary["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        return summary
+
+    def report(self, fmt: str = "table") -> None:
+        """Prints summary to stderr (so it is shown with --quiet too)."""
+        summary = self.summary()
+        if fmt == "json":
+            out = json.dumps(summary, indent=4)
+        else:
+            out = format_summary_table(summary)
+            if self.memory:
+                out += "\n" + format_memory_table(summary)
+        click.echo(out, file=sys.stderr)
+
+
+def _is_own_allocation(stat: tracemalloc.StatisticDiff) -> bool:
+    """Allocations made by tracemalloc or the profiler itself."""
+    # NOTE: Snapshot.filter_traces() is much slower than filtering the results
+    return stat.traceback[0].filename in [tracemalloc.__file__, __file__]
+
+
+def format_summary_table(summary: dict) -> str:
+    from terminaltables import SingleTable
+
+    MEMORY_KEYS = ["peak_memory", "net_memory", "top_allocations"]
+    counters = []
+    for p in summary["phases"]:
+        counters.extend(
+            k for k in p 
+            if k not in ["name", "calls", "duration"] + MEMORY_KEYS 
+            and k not in counters
+        )
+    
+    rows = [["Phase", "Calls", "Time (ms)"] + [c.replace("_", " ").capitalize() for c in counters]]
+    for p in summary["phases"]:
+        rows.append(
+            [p["name"], p["calls"], f"{p['duration']*1000:.2f}"] 
+            + [p.get(c, "") for c in counters]
+        )
+    rows.append(["Total", "", f"{summary['total']*1000:.2f}"] + [""]*len(counters))
+    return SingleTable(rows, title="Profile").table
+
+
+def format_memory_table(summary: dict) -> str:
+    from terminaltables import SingleTable
+
+    kib = lambda b: f"{b / 1024:.1f}"
+    rows = [["Phase", "Peak (KiB)", "Net (KiB)", "Top allocation sites (KiB)"]]
+    for p in summary["phases"]:
+        sites = "\n".join(
+            f"{kib(a['size'])} {a['site']}" for a in p.get("top_allocations", [])
+        )
+        rows.append([p["name"], kib(p["peak_memory"]), kib(p["net_memory"]), sites])
+    rows.append(["Total", kib(summary["peak_memory"]), "", ""])
+    return SingleTable(rows, title="Memory").table
+
+
+PROFILER = Profiler()
+
+# Callables that receive every finished span (see: metrics.py)
+SINKS: List[Callable[[Span], None]] = []
+
+
+def span(name: str):
+    """Returns a context manager that times a phase of the program."""
+    if not (PROFILER.enabled or SINKS):
+        return NULL_SPAN
+    return Span(name)
+
+
+def count(name: str, **counters: int) -> None:
+    """Adds to the counters of a phase without timing anything."""
+    with span(name) as s:
+        s.add(**counters)
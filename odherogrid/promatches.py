@@ -0,0 +1,367 @@
+"""
+Pro winrates over a recent window (`--pro-days DAYS`).
+
+OpenDota's pro hero stats cover a long, fixed window that spans patches.
+Instead, pro matches are listed newest first (`/api/proMatches`, paged with
+`less_than_match_id`) down to the newest match listed by the previous run
+(the checkpoint), and the picks of each new match are fetched from
+`/api/matches/{match_id}`. Picks are kept in a local SQLite database, so
+the pro winrate of every hero over the last N days is one indexed query,
+and history is never downloaded again.
+
+The checkpoint also records how far back matches have been listed. If a
+run asks for a longer window than that (e.g. `--pro-days 30` after runs with
+`--pro-days 7`), older matches are paged back from the oldest listed match.
+If listing down to the checkpoint stops at `MAX_PAGES`, the checkpoint stays
+put and the next run resumes paging below the oldest match listed so far.
+
+Listed matches are stored as pending, in the same transaction that moves
+the checkpoint. Their picks are fetched afterwards, at most `MAX_MATCHES`
+per run, and matches that fail are retried by later runs, so an interrupted
+run doesn't leave matches behind the checkpoint.
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .enums import Bracket
+from .models import Hero
+from .profiling import count, span
+from .settings import OPENDOTA_API_URL, PRO_MATCHES_DB
+
+PRO_MATCHES_URL = f"{OPENDOTA_API_URL}/proMatches"
+MATCH_URL = f"{OPENDOTA_API_URL}/matches/{{match_id}}"
+
+MAX_PAGES = 200     # pages of (up to) 100 matches listed per run
+MAX_MATCHES = 100   # matches whose picks are fetched per run (under 2 minutes at OpenDota's
+                    # free rate limit). The rest are fetched by later runs.
+MAX_ATTEMPTS = 3    # failed fetches of a match before it is given up on
+CONCURRENCY = 4     # requests in flight
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    start_time INTEGER NOT NULL,
+    radiant_win INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS picks (
+    match_id INTEGER NOT NULL,
+    hero_id INTEGER NOT NULL,
+    start_time INTEGER NOT NULL,
+    win INTEGER NOT NULL,
+    PRIMARY KEY (match_id, hero_id)
+);
+CREATE INDEX IF NOT EXISTS picks_by_time ON picks (start_time, hero_id, win);
+CREATE TABLE IF NOT EXISTS pending (
+    match_id INTEGER PRIMARY KEY,
+    start_time INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    newest_match_id INTEGER,
+    oldest_match_id INTEGER,
+    listed_since INTEGER NOT NULL,
+    resume_below INTEGER,   -- listing down to newest_match_id resumes below this ID
+    resume_newest INTEGER   -- newest match ID listed by the listing being resumed
+);
+"""
+
+# (radiant_win, [(hero_id, is_radiant), ...])
+MatchPicks = Tuple[bool, List[Tuple[int, bool]]]
+
+
+class ProMatchStore:
+    """SQLite database of pro matches and their picks."""
+
+    def __init__(self, path: Union[str, Path] = PRO_MATCHES_DB) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "ProMatchStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def checkpoint(self) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """Newest and oldest listed match ID, and the (Unix) time since which
+        every match has been listed. (None, None, None) before the first run."""
+        row = self.db.execute(
+            "SELECT newest_match_id, oldest_match_id, listed_since FROM checkpoint"
+        ).fetchone()
+        return tuple(row) if row else (None, None, None)
+
+    @property
+    def newest_match_id(self) -> Optional[int]:
+        return self.checkpoint[0]
+
+    @property
+    def resume(self) -> Tuple[Optional[int], Optional[int]]:
+        """(oldest, newest) match ID listed by a listing down to the 
+        checkpoint that was cut short, or (None, None)."""
+        row = self.db.execute("SELECT resume_below, resume_newest FROM checkpoint").fetchone()
+        return tuple(row) if row else (None, None)
+
+    def add_listed(self, 
+                   matches: List[Tuple[int, int]], 
+                   listed_since: int, 
+                   resume: Tuple[int, int] = None
+                  ) -> None:
+        """Adds (match ID, start time) of newly listed matches as pending,
+        and moves the checkpoint to include them. Every match since
+        `listed_since` (Unix time) has now been listed.
+
+        If the listing down to the checkpoint was cut short, `resume` is 
+        (oldest, newest) match ID listed by it, and the newest match ID of 
+        the checkpoint isn't moved until the listing is resumed and completes."""
+        newest, oldest, since = self.checkpoint
+        ids = [match_id for match_id, _ in matches]
+        if resume is None:
+            newest = max(ids + [newest or 0, self.resume[1] or 0]) or None
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO pending (match_id, start_time) "
+                "SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM matches WHERE match_id = ?)",
+                [(match_id, start_time, match_id) for match_id, start_time in matches],
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoint VALUES (0, ?, ?, ?, ?, ?)",
+                (newest, 
+                 min(ids + [oldest]) if oldest is not None else min(ids, default=None),
+                 min(listed_since, since) if since is not None else listed_since,
+                 *(resume or (None, None)))
+            )
+
+    def pending(self, since: int = 0, limit: int = None) -> List[Tuple[int, int]]:
+        """Returns (match ID, start time) of pending matches, newest first."""
+        return self.db.execute(
+            "SELECT match_id, start_time FROM pending WHERE start_time >= ? "
+            "ORDER BY match_id DESC LIMIT ?",
+            (since, -1 if limit is None else limit)
+        ).fetchall()
+
+    def add_match(self, match_id: int, start_time: int, match: MatchPicks) -> None:
+        radiant_win, picks = match
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?)",
+                (match_id, start_time, radiant_win)
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO picks VALUES (?, ?, ?, ?)",
+                [(match_id, hero_id, start_time, is_radiant == radiant_win)
+                 for hero_id, is_radiant in picks],
+            )
+            self.db.execute("DELETE FROM pending WHERE match_id = ?", (match_id,))
+
+    def add_failure(self, match_id: int) -> None:
+        with self.db:
+            self.db.execute(
+                "UPDATE pending SET attempts = attempts + 1 WHERE match_id = ?", (match_id,)
+            )
+            self.db.execute("DELETE FROM pending WHERE attempts >= ?", (MAX_ATTEMPTS,))
+
+    def hero_stats(self, since: int) -> Dict[int, Tuple[int, int]]:
+        """Returns (picks, wins) of every hero picked since `since` (Unix time)."""
+        rows = self.db.execute(
+            "SELECT hero_id, COUNT(*), SUM(win) FROM picks WHERE start_time >= ? GROUP BY hero_id",
+            (since,)
+        )
+        return {hero_id: (picks, wins) for hero_id, picks, wins in rows}
+
+
+@dataclass
+class IngestResult:
+    listed: int = 0  # new matches listed
+    added: int = 0   # matches whose picks were stored
+    failed: int = 0  # matches whose picks couldn't be fetched (retried later)
+    pending: int = 0 # matches left for later runs
+
+
+def _decode_matches(r) -> list:
+    with span("decode") as s:
+        matches = r.json()
+        if not isinstance(matches, list) or not all(
+            isinstance(m, dict) and type(m.get("match_id")) is int
+            and type(m.get("start_time")) is int
+            for m in matches
+        ):
+            raise ValueError("Malformed pro matches")
+        s.add(matches=len(matches))
+    return matches
+
+
+def _decode_match(r) -> MatchPicks:
+    """Decodes the picks of a match. Raises ValueError if they are missing
+    (e.g. the match hasn't been parsed by OpenDota yet)."""
+    match = r.json()
+    if not isinstance(match, dict): # e.g. null
+        raise ValueError("Malformed match")
+    players = match.get("players")
+    if not isinstance(match.get("radiant_win"), bool) or not isinstance(players, list):
+        raise ValueError("Malformed match")
+    picks = []
+    for p in players:
+        hero_id = p.get("hero_id") if isinstance(p, dict) else None
+        slot = p.get("player_slot") if isinstance(p, dict) else None
+        if type(hero_id) is not int or hero_id <= 0 or type(slot) is not int:
+            raise ValueError("Malformed match")
+        picks.append((hero_id, slot < 128)) # slots 0-4 are Radiant, 128-132 Dire
+    return match["radiant_win"], picks
+
+
+def list_matches(client,
+                 newest: Optional[int],
+                 since: int,
+                 *,
+                 below: int = None,
+                 max_pages: int = MAX_PAGES
+                ) -> Tuple[List[Tuple[int, int]], bool]:
+    """Lists (match ID, start time) of pro matches newer than `newest` that
+    started since `since` (Unix time), newest first, starting below match ID
+    `below` (default: the newest match).
+
+    Also returns whether the listing is complete, i.e. it didn't stop
+    because `max_pages` pages were listed.
+    """
+    from .odapi import request_json
+
+    matches = []
+    cursor = below
+    for _ in range(max_pages):
+        url = PRO_MATCHES_URL if cursor is None else f"{PRO_MATCHES_URL}?less_than_match_id={cursor}"
+        _, page = request_json(client, url, decode=_decode_matches)
+        if not page:
+            return matches, True
+        for m in page:
+            if (newest is None or m["match_id"] > newest) and m["start_time"] >= since:
+                matches.append((m["match_id"], m["start_time"]))
+        cursor = min(m["match_id"] for m in page)
+        oldest = min(m["start_time"] for m in page)
+        if (newest is not None and cursor <= newest) or oldest < since:
+            return matches, True # the rest are older
+    return matches, False
+
+
+def _listed_since(matches: List[Tuple[int, int]], since: int, complete: bool) -> int:
+    """Time since which every match has been listed by `list_matches()`."""
+    if complete or not matches:
+        return since
+    return min(start_time for _, start_time in matches)
+
+
+async def _fetch_matches(match_ids: List[int], concurrency: int) -> Dict[int, Optional[MatchPicks]]:
+    import asyncio
+
+    import httpx
+
+    from .odapi import request_json_async
+
+    semaphore = asyncio.Semaphore(concurrency) # also bounds the client's connections
+
+    async def fetch(client, match_id: int) -> Optional[MatchPicks]:
+        async with semaphore:
+            try:
+                _, match = await request_json_async(
+                    client, MATCH_URL.format(match_id=match_id), decode=_decode_match
+                )
+            except (httpx.HTTPError, ValueError):
+                return None
+        return match
+
+    async with httpx.AsyncClient() as client:
+        results = await asyncio.gather(*(fetch(client, match_id) for match_id in match_ids))
+    return dict(zip(match_ids, results))
+
+
+def ingest(store: ProMatchStore,
+           days: int,
+           *,
+           max_matches: int = MAX_MATCHES,
+           max_pages: int = MAX_PAGES,
+           concurrency: int = CONCURRENCY,
+           now: float = None
+          ) -> IngestResult:
+    """Lists pro matches played since the checkpoint (and in the last
+    `days` days), and fetches the picks of pending matches."""
+    import asyncio
+
+    import httpx
+
+    since = int((now or time.time()) - days * 24 * 60 * 60)
+    result = IngestResult()
+    newest, oldest, listed_since = store.checkpoint
+    resume = None
+    with httpx.Client() as client:
+        if newest is None: # first run
+            listed, complete = list_matches(client, None, since, max_pages=max_pages)
+            listed_since = _listed_since(listed, since, complete)
+        else:
+            # Every match newer than the checkpoint, not just those in the window,
+            # so that what has been listed stays contiguous. Resumes a listing
+            # that was cut short by `MAX_PAGES`.
+            below, top = store.resume
+            listed, complete = list_matches(
+                client, newest, listed_since, below=below, max_pages=max_pages
+            )
+            ids = [match_id for match_id, _ in listed] + [i for i in (below, top) if i]
+            if not complete and ids:
+                resume = (min(ids), max(ids))
+            if since < listed_since: # a longer window than has been listed
+                older, complete = list_matches(
+                    client, None, since, below=oldest, max_pages=max_pages
+                )
+                listed += older
+                listed_since = _listed_since(older, since, complete)
+    store.add_listed(listed, listed_since, resume)
+    result.listed = len(listed)
+
+    pending = store.pending(since)
+    batch = dict(pending[:max_matches])
+    matches = asyncio.run(_fetch_matches(list(batch), max(1, concurrency)))
+    for match_id, match in matches.items():
+        if match is None:
+            store.add_failure(match_id)
+            result.failed += 1
+        else:
+            store.add_match(match_id, batch[match_id], match)
+            result.added += 1
+    result.pending = len(pending) - result.added
+    count("pro matches", listed=result.listed, added=result.added, failed=result.failed)
+    return result
+
+
+def set_pro_stats(heroes: List[Hero], stats: Dict[int, Tuple[int, int]]) -> None:
+    """Replaces the pro stats of heroes with (picks, wins) from `stats`."""
+    for hero in heroes:
+        picks, wins = stats.get(hero.id, (0, 0))
+        hero.picks[Bracket.PRO] = picks
+        hero.wins[Bracket.PRO] = wins
+
+
+def update_pro_stats(heroes: List[Hero],
+                     days: int,
+                     *,
+                     path: Union[str, Path] = None
+                    ) -> IngestResult:
+    """Ingests new pro matches, then sets the pro stats of heroes to
+    their picks and wins in pro matches of the last `days` days.
+    
+    Raises httpx.HTTPError if pro matches can't be listed, and
+    sqlite3.Error if the database can't be used (e.g. it is corrupt).
+    """
+    with ProMatchStore(path or PRO_MATCHES_DB) as store:
+        result = ingest(store, days)
+        since = int(time.time() - days * 24 * 60 * 60)
+        set_pro_stats(heroes, store.hero_stats(since))
+    return result
@@ -0,0 +1,71 @@
+"""
+Hero rankings of the previous run.
+
+Heroes are re-ranked starting from the order they had the last time grids
+were created, rather than from the order of the API response. Re-ranking a
+nearly sorted list is close to linear, and with a hysteresis band
+(`--hysteresis`), heroes whose winrates are within the band keep their
+previous order, so small fluctuations don't reshuffle the grids.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .settings import RANKINGS_FILE
+
+
+class RankingStore:
+    """Hero IDs in ranked (descending) order, per bracket.
+
+    `get()` always returns the rankings as loaded, so every grid of a run
+    is ranked from the same previous order. `set()` rankings are written
+    by `save()`.
+    """
+    def __init__(self, path: Union[str, Path] = RANKINGS_FILE) -> None:
+        self.path = Path(path)
+        self.previous: Dict[str, List[int]] = self._load()
+        self.current: Dict[str, List[int]] = dict(self.previous)
+
+    def _load(self) -> Dict[str, List[int]]:
+        try:
+            with open(self.path, "r") as f:
+                rankings = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(rankings, dict):
+            return {}
+        return {
+            k: v for k, v in rankings.items()
+            if isinstance(v, list) and all(type(i) is int for i in v)
+        }
+
+    def get(self, bracket: Union[int, str]) -> Optional[List[int]]:
+        return self.previous.get(str(bracket))
+
+    def digest(self, bracket: Union[int, str]) -> Optional[str]:
+        """Hash of the previous ranking of a bracket. Part of grid cache keys
+        when grids depend on the previous ranking."""
+        ranking = self.get(bracket)
+        if not ranking:
+            return None
+        return hashlib.sha1(json.dumps(ranking).encode()).hexdigest()
+
+    def set(self, bracket: Union[int, str], hero_ids: List[int]) -> None:
+        self.current[str(bracket)] = hero_ids
+
+    def save(self) -> None:
+        """Writes rankings if they changed since they were loaded."""
+        if self.current == self.previous:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(self.current, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            return # Rankings are an optimization. Failing to write them is not an error.
+        self.previous = dict(self.current)
@@ -1,76 +1,46 @@
-from copy import deepcopy
+from typing import List
 
+from .models import Category, HeroGridModel
 from .settings import DEFAULT_GRID_NAME
 
 
-CATEGORY_BASE = {
-    "category_name": "name",
-    "x_position": 0.000000,
-    "y_position": 0.000000,
-    "width": 1180.0,
-    "height": 180.0,
-    "hero_ids": [],
-}
-
-
-HERO_GRID_BASE = {
-    "config_name": DEFAULT_GRID_NAME,
-    "categories": [
-        {
-            "category_name": "Strength",
-            "x_position": 0.000000,
-            "y_position": 0.000000,
-            "width": 1180.0,
-            "height": 180.0,
-            "hero_ids": [],
-        },
-        {
-            "category_name": "Agility",
-            "x_position": 0.000000,
-            "y_position": 200.000000,
-            "width": 1180.0,
-            "height": 180.0,
-            "hero_ids": [],
-        },
-        {
-            "category_name": "Intelligence",
-            "x_position": 0.000000,
-            "y_position": 400.000000,
-            "width": 1180.0,
-            "height": 180.0,
-            "hero_ids": [],
-        }
-    ]
-}
-
-
 # Represents default hero_grid_config.json
 HERO_GRID_CONFIG_BASE = {
     "version": 3,
     "configs": [],
 }
 
-def _get_new_category(name: str, x_pos: float=0.0, y_pos: float=0.0, width: float=0.0, height: float=0.0) -> dict:
-    # Copy category and give it a name
-    category = deepcopy(CATEGORY_BASE)
-    category["category_name"] = name
 
-    params = {
-        "x_position": x_pos,
-        "y_position": y_pos,
-        "width": width,
-        "height": height
-    }
-    for param, value in params.items():
-        value = float(abs(value)) # ensure value is a positive float
-        if value:
-            category[param] = value
+def _get_new_category(name: str, x_pos: float=0.0, y_pos: float=0.0, width: float=0.0, height: float=0.0) -> Category:
+    category = Category(name)
+
+    # Only non-zero values override the defaults. Values must be positive floats.
+    if x_pos:
+        category.x_position = float(abs(x_pos))
+    if y_pos:
+        category.y_position = float(abs(y_pos))
+    if width:
+        category.width = float(abs(width))
+    if height:
+        category.height = float(abs(height))
 
     return category
 
 
-def get_new_hero_grid_base() -> dict:
-    return deepcopy(HERO_GRID_BASE)
+def get_new_hero_grid_base(name: str = DEFAULT_GRID_NAME) -> HeroGridModel:
+    """Returns a hero grid with the default Strength/Agility/Intelligence categories."""
+    return HeroGridModel(name, [
+        Category("Strength"),
+        Category("Agility", y_position=200.0),
+        Category("Intelligence", y_position=400.0),
+    ])
+
+
+def get_new_hero_grid(name: str = DEFAULT_GRID_NAME, 
+                      categories: List[Category] = None
+                     ) -> HeroGridModel:
+    """Returns a hero grid with the given categories."""
+    return HeroGridModel(name, categories)
 
 
 def get_new_hero_grid_config() -> dict:
@@ -78,4 +48,4 @@ def get_new_hero_grid_config() -> dict:
     Returns a dict with contents equivalent to an empty
     hero_grid_config.json
     """
-    return deepcopy(HERO_GRID_CONFIG_BASE)
\ No newline at end of file
+    return {"version": HERO_GRID_CONFIG_BASE["version"], "configs": []}
@@ -0,0 +1,242 @@
+"""
+Small HTTP server (`odhg serve`) that fetches hero stats from OpenDota 
+once per refresh interval, and serves them and ready-made hero grids 
+to any number of ODHG clients (`odhg --source http://host:port`).
+
+Endpoints:
+    GET /stats
+        Hero stats in the format returned by `fetch_hero_stats()`.
+    GET /grids?bracket=7&layout=role&ascending=0&name=NAME
+        List of hero grids. `bracket` can be repeated, and can be a range
+        of pub brackets (`5-7`) or `pubs`.
+
+Responses are serialized once per stats refresh and carry an ETag.
+"""
+
+import asyncio
+import hashlib
+import json
+import signal
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+from .cli.parse import LAYOUTS, find_argument_in_mapping, parse_arg_bracket
+from .enums import Bracket, Layout
+from .error import handle_exception
+from .herogrid import HeroGrid
+from .models import Hero, json_default
+from .odapi import HeroStatsFetcher
+from .settings import DEFAULT_GRID_NAME
+
+
+MAX_HEADER_LINES = 100
+MAX_CACHED_GRIDS = 64 # least recently used /grids responses are evicted
+READ_TIMEOUT = 10 # seconds
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def echo(message: str) -> None:
+    click.echo(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+
+class Response(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_response(obj) -> Response:
+    body = json.dumps(obj, separators=(",", ":"), default=json_default).encode()
+    return Response(body, f'"{hashlib.sha1(body).hexdigest()}"')
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = "") -> None:
+        super().__init__(message or STATUS_TEXT[status])
+        self.status = status
+
+
+class GridServer:
+    def __init__(self, interval: int = 60, fetcher: HeroStatsFetcher = None) -> None:
+        self.interval = interval * 60
+        self.fetcher = fetcher or HeroStatsFetcher()
+        self.heroes: Optional[List[Hero]] = None
+
+        # Cleared whenever hero stats change
+        self._stats: Optional[Response] = None
+        self._grids: Dict[tuple, Response] = OrderedDict() # LRU, keys include client-chosen names
+        self._rankings: Dict[Tuple[int, bool], List[Hero]] = {}
+
+    def update(self, heroes: List[Hero]) -> None:
+        self.heroes = heroes
+        self._stats = make_response(heroes)
+        self._grids.clear()
+        self._rankings.clear()
+
+    def refresh(self) -> bool:
+        return self._apply(*self.fetcher.fetch())
+
+    def _apply(self, heroes: List[Hero], changed: bool) -> bool:
+        if changed:
+            self.update(heroes)
+        return changed
+
+    def get_stats(self) -> Response:
+        if self._stats is None:
+            raise HTTPError(503, "Hero stats are not available yet")
+        return self._stats
+
+    def get_ranking(self, bracket: int, ascending: bool) -> List[Hero]:
+        key = (bracket, ascending)
+        if key not in self._rankings:
+            config = {"layout": Layout.DEFAULT.value, "ascending": ascending, 
+                      "config_name": DEFAULT_GRID_NAME}
+            self._rankings[key] = HeroGrid(list(self.heroes), bracket, config).heroes
+        return list(self._rankings[key])
+
+    def get_grids(self, query: Dict[str, List[str]]) -> Response:
+        if self.heroes is None:
+            raise HTTPError(503, "Hero stats are not available yet")
+        
+        brackets = []
+        for b in query.get("bracket", [Bracket.DEFAULT.value]):
+            bracket = parse_arg_bracket(b)
+            if bracket is None:
+                raise HTTPError(400, f"Invalid bracket: {b}")
+            if bracket == Bracket.ALL:
+                brackets.extend(b.value for b in Bracket if b != Bracket.ALL)
+            else:
+                brackets.append(bracket)
+        brackets = list(dict.fromkeys(brackets)) # e.g. bracket=7&bracket=d
+        layout = find_argument_in_mapping(
+            query.get("layout", [Layout.DEFAULT.value])[0], LAYOUTS
+        )
+        if layout is None:
+            raise HTTPError(400, "Invalid layout")
+        ascending = query.get("ascending", ["0"])[0].lower() in ["1", "true"]
+        name = query.get("name", [DEFAULT_GRID_NAME])[0]
+
+        key = (tuple(brackets), layout, ascending, name)
+        if key in self._grids:
+            self._grids.move_to_end(key)
+            return self._grids[key]
+        config = {"layout": layout, "ascending": ascending, "config_name": name}
+        response = self._grids[key] = make_response([
+            HeroGrid(self.get_ranking(b, ascending), b, config, ranked=True).create()
+            for b in brackets
+        ])
+        if len(self._grids) > MAX_CACHED_GRIDS:
+            self._grids.popitem(last=False)
+        return response
+
+    def route(self, method: str, target: str) -> Response:
+        if method not in ["GET", "HEAD"]:
+            raise HTTPError(405)
+        url = urlsplit(target)
+        if url.path == "/stats":
+            return self.get_stats()
+        elif url.path == "/grids":
+            return self.get_grids(parse_qs(url.query))
+        raise HTTPError(404)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+                if line in [b"\r\n", b"\n", b""]:
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            
+            try:
+                method, target, _ = request_line.decode("latin-1").split()
+                response = self.route(method, target)
+            except HTTPError as e:
+                self._write(writer, e.status, json.dumps({"error": str(e)}).encode())
+            except ValueError:
+                self._write(writer, 400, b"")
+            except Exception as e:
+                handle_exception(e)
+                self._write(writer, 500, json.dumps({"error": STATUS_TEXT[500]}).encode())
+            else:
+                if headers.get("if-none-match") == response.etag:
+                    self._write(writer, 304, b"", response.etag)
+                else:
+                    body = response.body if method == "GET" else b""
+                    self._write(writer, 200, body, response.etag, len(response.body))
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _write(self, 
+               writer: asyncio.StreamWriter, 
+               status: int, 
+               body: bytes, 
+               etag: str = None, 
+               length: int = None
+              ) -> None:
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {length if length is not None else len(body)}",
+            "Connection: close",
+        ]
+        if etag:
+            lines.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def refresh_periodically(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                # httpx client is synchronous, don't block the server while fetching.
+                # The stats and caches are only updated on the event loop, so that
+                # requests being handled never see them change.
+                result = await loop.run_in_executor(None, self.fetcher.fetch)
+                if self._apply(*result):
+                    echo(f"Hero stats updated ({len(self.heroes)} heroes).")
+            except Exception as e:
+                handle_exception(e)
+            await asyncio.sleep(self.interval)
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port)
+        refresher = asyncio.ensure_future(self.refresh_periodically())
+        
+        stop = asyncio.Event()
+        loop = asyncio.get_event_loop()
+        for sig in [signal.SIGTERM, signal.SIGINT]:
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, AttributeError): # Windows
+                pass
+        
+        echo(f"Serving hero grids on http://{host}:{port}")
+        try:
+            await stop.wait()
+        finally:
+            refresher.cancel()
+            server.close()
+            await server.wait_closed()
+            self.fetcher.close()
+            echo("Stopped.")
+
+
+def run_server(host: str, port: int, interval: int) -> None:
+    asyncio.run(GridServer(interval).serve(host, port))
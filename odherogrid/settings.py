@@ -1,7 +1,33 @@
+import os
 from pathlib import Path
 
 CONFIG_NAME = "config.yml" # NOTE: Path("config.yml")?
 CONFIG_DIR = Path().home() / ".odhg"
 CONFIG = CONFIG_DIR / CONFIG_NAME
 
+# Validated and parsed contents of config.yml
+CONFIG_CACHE = CONFIG_DIR / "config.cache.json"
+
+# Cached results of Steam userdata directory discovery
+USERDATA_CACHE = CONFIG_DIR / "userdata.json"
+
+# Hero rankings of the previous run (see: rankings.py)
+RANKINGS_FILE = CONFIG_DIR / "rankings.json"
+
+# Pro matches and their picks (see: promatches.py)
+PRO_MATCHES_DB = CONFIG_DIR / "promatches.sqlite3"
+
+# OpenDota rate-limit budget, shared by ODHG processes (see: odapi.RateLimiter)
+RATE_LIMIT_FILE = CONFIG_DIR / "ratelimit.json"
+
+# Cached API responses
+CACHE_DIR = CONFIG_DIR / "cache"
+HERO_STATS_CACHE = CACHE_DIR / "heroStats.json"
+GRID_CACHE_DIR = CACHE_DIR / "grids"
+MATCHUPS_CACHE_DIR = CACHE_DIR / "matchups" # one file per hero
+
+# Can be overridden to use a mirror or a local stand-in server (see: benchmarks/e2e.py)
+OPENDOTA_API_URL = os.environ.get("ODHG_OPENDOTA_URL", "https://api.opendota.com/api")
+
 DEFAULT_GRID_NAME = "OpenDota Hero Winrates"
+COUNTER_GRID_NAME = "OpenDota Hero Counters"
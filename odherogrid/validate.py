@@ -0,0 +1,180 @@
+"""
+Integrity checks for hero_grid_config.json.
+
+Every grid and category is checked in a single pass while the grid models
+are created. Problems that can be fixed (missing or malformed geometry,
+non-integer hero IDs, duplicate grid names, etc.) are repaired in place.
+Grids that can't be repaired are quarantined, so that the rest of the
+user's grids are kept.
+"""
+
+import math
+from dataclasses import dataclass, field
+from numbers import Real
+from typing import Collection, List, Optional, Tuple
+
+from .models import Category, HeroGridModel
+
+# Default geometry of a category
+GEOMETRY = {
+    "x_position": 0.0,
+    "y_position": 0.0,
+    "width": 1180.0,
+    "height": 180.0,
+}
+
+
+class InvalidGrid(ValueError):
+    """Raised for grids that can't be repaired."""
+
+
+@dataclass
+class ValidationReport:
+    repaired: List[str] = field(default_factory=list)     # names of repaired grids
+    quarantined: List[object] = field(default_factory=list) # grids as found in the file
+    problems: List[str] = field(default_factory=list)
+    unknown_hero_ids: List[int] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.repaired or self.quarantined or self.unknown_hero_ids)
+
+    def summary(self) -> str:
+        lines = []
+        if self.repaired:
+            lines.append(f"Repaired {len(self.repaired)} grid(s): {', '.join(self.repaired)}")
+        if self.quarantined:
+            lines.append(f"Removed {len(self.quarantined)} grid(s) that could not be repaired.")
+        if self.unknown_hero_ids:
+            ids = ", ".join(str(i) for i in sorted(self.unknown_hero_ids))
+            lines.append(f"Unknown hero IDs (kept): {ids}")
+        lines.extend(f"  - {p}" for p in self.problems)
+        return "\n".join(lines)
+
+
+def _to_number(value: object, default: float) -> Tuple[float, bool]:
+    """Returns a finite, non-negative float and whether `value` had to be 
+    changed. (NaN and infinity can't be written back as JSON.)"""
+    if isinstance(value, Real) and not isinstance(value, bool) and value >= 0 \
+            and math.isfinite(value):
+        return value, False
+    try:
+        number = abs(float(value))
+    except (TypeError, ValueError):
+        return default, True
+    return (number if math.isfinite(number) else default), True
+
+
+def _to_hero_id(value: object) -> Optional[int]:
+    if type(value) is int:
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+def validate_category(c: object, n: int, problems: List[str]) -> Optional[Category]:
+    """Returns a (repaired) category, or None if `c` is not a category."""
+    if not isinstance(c, dict):
+        problems.append(f"category {n} is not an object (removed)")
+        return None
+    c = dict(c)
+    name = c.pop("category_name", None)
+    if not isinstance(name, str):
+        problems.append(f"category {n} has no name")
+        name = f"Category {n}"
+
+    geometry = []
+    for key, default in GEOMETRY.items():
+        value, changed = _to_number(c.pop(key, default), default)
+        if changed:
+            problems.append(f"'{name}' has an invalid {key}")
+        geometry.append(value)
+
+    ids = c.pop("hero_ids", None)
+    if not isinstance(ids, list):
+        problems.append(f"'{name}' has no list of hero IDs")
+        ids = []
+    elif not all(type(i) is int for i in ids):
+        fixed = []
+        for i in ids:
+            hero_id = _to_hero_id(i)
+            if hero_id is None:
+                problems.append(f"'{name}' has an invalid hero ID: {i!r} (removed)")
+            else:
+                fixed.append(hero_id)
+        ids = fixed
+    return Category(name, *geometry, ids, c or None)
+
+
+def validate_grid(g: object, problems: List[str]) -> HeroGridModel:
+    """Returns a (repaired) grid. Raises `InvalidGrid` if it can't be repaired."""
+    if not isinstance(g, dict):
+        raise InvalidGrid("not an object")
+    g = dict(g)
+    name = g.pop("config_name", None)
+    if not isinstance(name, str) or not name:
+        problems.append("grid has no name")
+        name = "Unnamed Grid"
+    categories = g.pop("categories", None)
+    if not isinstance(categories, list):
+        raise InvalidGrid(f"'{name}' has no list of categories")
+
+    n = len(problems)
+    categories = [validate_category(c, i, problems) for i, c in enumerate(categories, 1)]
+    if len(problems) > n:
+        problems[n:] = [f"{name}: {p}" for p in problems[n:]]
+    return HeroGridModel(name, [c for c in categories if c is not None], g or None)
+
+
+def find_unknown_hero_ids(grids: List[HeroGridModel], hero_ids: Collection[int]) -> List[int]:
+    """Returns the hero IDs in `grids` that aren't in `hero_ids`."""
+    return sorted({
+        i for grid in grids for c in grid.categories for i in c.hero_ids if i not in hero_ids
+    })
+
+
+def validate_grids(configs: object,
+                   hero_ids: Collection[int] = None
+                  ) -> Tuple[List[HeroGridModel], ValidationReport]:
+    """Validates the "configs" of a parsed hero_grid_config.json, and
+    returns the valid and repaired grids as models.
+
+    If `hero_ids` is given, hero IDs that aren't in it are reported.
+    """
+    report = ValidationReport()
+    if not isinstance(configs, list):
+        raise InvalidGrid("'configs' is not a list")
+
+    grids = []
+    names = set()
+    unknown = set()
+    for g in configs:
+        problems = []
+        try:
+            grid = validate_grid(g, problems)
+        except InvalidGrid as e:
+            report.quarantined.append(g)
+            report.problems.append(str(e))
+            continue
+
+        if grid.config_name in names:
+            name, i = grid.config_name, 2
+            while f"{name} ({i})" in names:
+                i += 1
+            grid.config_name = f"{name} ({i})"
+            problems.append(f"duplicate name '{name}' (renamed to '{grid.config_name}')")
+        names.add(grid.config_name)
+
+        if hero_ids is not None:
+            unknown.update(find_unknown_hero_ids([grid], hero_ids))
+
+        if problems:
+            report.repaired.append(grid.config_name)
+            report.problems.extend(problems)
+        grids.append(grid)
+
+    report.unknown_hero_ids = sorted(unknown)
+    return grids, report
@@ -0,0 +1,141 @@
+"""
+Watches hero_grid_config.json for changes made by the Dota 2 client, and
+re-sorts the grids that were edited. Uses inotify, so it is Linux-only.
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import click
+
+from .herogrid import HeroGrid, HeroGridConfig
+from .models import json_default
+
+
+# Constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_EVENT = struct.Struct("iIII") # wd, mask, cookie, len
+
+DEBOUNCE = 0.5 # seconds without events before a burst is considered done
+
+
+class Inotify:
+    """Minimal ctypes wrapper around the inotify API."""
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise NotImplementedError("Watching for changes is only supported on Linux.")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+
+    def _raise(self) -> None:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise()
+        return wd
+
+    def read_events(self, timeout: Optional[float] = None) -> List[str]:
+        """Waits up to `timeout` seconds for events. 
+        Returns names of the files the events were for."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            names.append(os.fsdecode(data[offset:offset+length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def hash_grid(grid: dict) -> str:
+    return hashlib.sha1(json.dumps(grid, sort_keys=True, default=json_default).encode()).hexdigest()
+
+
+def hash_grids(hero_grid_config: dict) -> Dict[str, str]:
+    """Returns content hash of each grid in a hero grid config, by name."""
+    return {g["config_name"]: hash_grid(g) for g in hero_grid_config["configs"]}
+
+
+class GridWatcher:
+    def __init__(self, hero_grid_config: HeroGridConfig, debounce: float = DEBOUNCE) -> None:
+        self.h = hero_grid_config
+        self.debounce = debounce
+        self.hashes = hash_grids(self.h.hero_grid_config)
+
+    def run(self) -> None:
+        path = Path(self.h.path)
+        inotify = Inotify()
+        try:
+            # Watch the directory, since the file may be replaced rather than written to
+            inotify.add_watch(path.parent, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+            click.echo(f"Watching {path} for changes. Press Ctrl+C to stop.")
+            while True:
+                if path.name not in inotify.read_events():
+                    continue
+                # Wait for burst of writes to end
+                while inotify.read_events(self.debounce):
+                    pass
+                self.on_change()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            inotify.close()
+
+    def on_change(self) -> List[dict]:
+        """Sorts grids that were edited since the last change.
+        Returns the sorted grids."""
+        if not self.h.reload_if_changed(): # our own write
+            return []
+        hashes = hash_grids(self.h.hero_grid_config)
+        edited = [
+            g for g in self.h.hero_grid_config["configs"]
+            if self.hashes.get(g["config_name"]) != hashes[g["config_name"]]
+        ]
+        if edited:
+            bracket = self.h.brackets[0]
+            hg = HeroGrid(self.h.get_ranking(bracket), bracket, self.h.config, ranked=True)
+            for grid in edited:
+                hg.modify(grid) # in place
+            self.h.save_hero_grid_config()
+            hashes = hash_grids(self.h.hero_grid_config)
+            names = ", ".join(g["config_name"] for g in edited)
+            click.echo(f"[{time.strftime('%H:%M:%S')}] Sorted {names}")
+        self.hashes = hashes
+        return edited
+
+
+def watch(hero_grid_config: HeroGridConfig) -> None:
+    try:
+        GridWatcher(hero_grid_config).run()
+    except NotImplementedError as e:
+        raise SystemExit(e.args[0])
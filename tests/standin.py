@@ -0,0 +1,166 @@
+"""
+Local stand-in for the OpenDota API, serving `/api/heroStats` (and
+optionally other endpoints) with fault injection. Used to test and benchmark fetching, retries
+and caching without network access.
+
+    with StandInServer(payload, faults=[Fault(status=503)]) as server:
+        os.environ["ODHG_OPENDOTA_URL"] = server.api_url
+        ...
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from .synthetic import generate_hero_stats
+
+
+@dataclass
+class Fault:
+    """A fault injected into a single response."""
+    latency: float = 0.0                # seconds before responding
+    status: Optional[int] = None        # e.g. 503 or 429
+    retry_after: Optional[str] = None   # Retry-After header (with 429/503)
+    truncate: Optional[float] = None    # fraction of body sent before closing
+    chunk_delay: float = 0.0            # seconds between 1 KiB chunks (slow streaming)
+
+
+@dataclass
+class Stats:
+    requests: int = 0
+    conditional_requests: int = 0
+    not_modified: int = 0
+    bytes_sent: int = 0
+    statuses: List[int] = field(default_factory=list)
+
+
+class StandInServer:
+    """Serves `payload` on /api/heroStats, and `routes` (payloads by path,
+    e.g. "/api/heroes/1/matchups") on their paths. A route can also be a
+    function that returns the payload for the query string parameters.
+    
+    Each request consumes the next fault from `faults` (if any). 
+    `default_fault` is applied once `faults` is exhausted.
+    """
+
+    def __init__(self, 
+                 payload: list = None, 
+                 faults: List[Fault] = None, 
+                 default_fault: Fault = None,
+                 routes: Dict[str, object] = None
+                ) -> None:
+        self.bodies = {"/api/heroStats": json.dumps(payload or generate_hero_stats()).encode()}
+        self.handlers: Dict[str, Callable[[Dict[str, List[str]]], object]] = {}
+        for path, obj in (routes or {}).items():
+            if callable(obj):
+                self.handlers[path] = obj
+            else:
+                self.bodies[path] = json.dumps(obj).encode()
+        self.etags = {path: _etag(body) for path, body in self.bodies.items()}
+        self.body = self.bodies["/api/heroStats"]
+        self.etag = self.etags["/api/heroStats"]
+        self.faults = list(faults or [])
+        self.default_fault = default_fault or Fault()
+        self.stats = Stats()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/api"
+
+    def next_fault(self) -> Fault:
+        with self._lock:
+            self.stats.requests += 1
+            return self.faults.pop(0) if self.faults else self.default_fault
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: dict = None) -> None:
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.stats.statuses.append(status)
+                server.stats.bytes_sent += len(body)
+
+            def do_GET(self) -> None:
+                fault = server.next_fault()
+                time.sleep(fault.latency)
+                path, _, query = self.path.partition("?")
+                if path not in server.bodies and path not in server.handlers:
+                    return self._send(404)
+                
+                if fault.status:
+                    headers = {"Retry-After": fault.retry_after} if fault.retry_after else {}
+                    return self._send(fault.status, b'{"error": "injected"}', headers)
+
+                if path in server.handlers:
+                    body = json.dumps(server.handlers[path](parse_qs(query))).encode()
+                    etag = _etag(body)
+                else:
+                    body, etag = server.bodies[path], server.etags[path]
+                if self.headers.get("If-None-Match"):
+                    server.stats.conditional_requests += 1
+                    if self.headers["If-None-Match"] == etag:
+                        server.stats.not_modified += 1
+                        return self._send(304, headers={"ETag": etag})
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                server.stats.statuses.append(200)
+
+                if fault.truncate is not None:
+                    body = body[:int(len(body) * fault.truncate)]
+                    self.close_connection = True
+                if fault.chunk_delay:
+                    for i in range(0, len(body), 1024):
+                        self.wfile.write(body[i:i+1024])
+                        self.wfile.flush()
+                        time.sleep(fault.chunk_delay)
+                else:
+                    self.wfile.write(body)
+                server.stats.bytes_sent += len(body)
+
+        return Handler
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
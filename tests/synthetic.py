@@ -0,0 +1,140 @@
+"""Synthetic hero stats and hero grid configs for tests (and benchmarks) 
+that shouldn't depend on the OpenDota API or a Steam installation."""
+
+import random
+from typing import List
+
+from odherogrid.enums import Bracket
+from odherogrid.models import Hero
+
+
+def make_hero_stats(n: int) -> List[Hero]:
+    """Returns `n` heroes in the format returned by `fetch_hero_stats()`.
+    Hero winrates increase with hero ID in every bracket."""
+    heroes = []
+    for i in range(1, n+1):
+        hero = {
+            "id": i, 
+            "localized_name": f"Hero {i}",
+            "primary_attr": ["str", "agi", "int"][i % 3],
+            "attack_type": ["Melee", "Ranged"][i % 2],
+            "roles": [["Carry"], ["Support"], ["Nuker"]][i % 3],
+        }
+        for b in Bracket:
+            if b == Bracket.ALL:
+                continue
+            hero[f"{b.value}_win"] = i
+            hero[f"{b.value}_pick"] = n + 1
+        heroes.append(Hero.from_json(hero))
+    return heroes
+
+
+ROLES = [
+    "Carry", "Support", "Nuker", "Disabler", "Jungler", 
+    "Durable", "Escape", "Pusher", "Initiator",
+]
+
+
+def generate_hero_stats(n: int = 120, seed: int = 0) -> List[dict]:
+    """Returns `n` heroes with every key found in the OpenDota 
+    `/api/heroStats` response, as returned by the API (i.e. before 
+    `fetch_hero_stats()` renames `pro_<stat>`).
+
+    Output is deterministic for a given `n` and `seed`.
+    """
+    rng = random.Random(seed)
+    heroes = []
+    for i in range(1, n+1):
+        name = f"hero_{i}"
+        hero = {
+            "id": i,
+            "name": f"npc_dota_hero_{name}",
+            "localized_name": name.replace("_", " ").title(),
+            "primary_attr": rng.choice(["str", "agi", "int"]),
+            "attack_type": rng.choice(["Melee", "Ranged"]),
+            "roles": rng.sample(ROLES, rng.randint(1, 4)),
+            "img": f"/apps/dota2/images/heroes/{name}_full.png?",
+            "icon": f"/apps/dota2/images/heroes/{name}_icon.png",
+            "base_health": 200,
+            "base_health_regen": round(rng.uniform(0, 3), 2),
+            "base_mana": 75,
+            "base_mana_regen": 0,
+            "base_armor": rng.randint(-1, 5),
+            "base_mr": 25,
+            "base_attack_min": rng.randint(20, 40),
+            "base_attack_max": rng.randint(40, 60),
+            "base_str": rng.randint(15, 25),
+            "base_agi": rng.randint(15, 25),
+            "base_int": rng.randint(15, 25),
+            "str_gain": round(rng.uniform(1.5, 4), 1),
+            "agi_gain": round(rng.uniform(1.5, 4), 1),
+            "int_gain": round(rng.uniform(1.5, 4), 1),
+            "attack_range": rng.choice([150, 400, 550, 600]),
+            "projectile_speed": rng.choice([0, 900, 1200]),
+            "attack_rate": 1.7,
+            "move_speed": rng.randint(280, 330),
+            "turn_rate": None,
+            "cm_enabled": True,
+            "legs": 2,
+            "hero_id": i,
+            "turbo_picks": rng.randint(10_000, 500_000),
+            "turbo_wins": 0,
+        }
+        hero["turbo_wins"] = int(hero["turbo_picks"] * rng.uniform(0.4, 0.6))
+        for b in [b.value for b in Bracket if b not in [Bracket.ALL, Bracket.PRO]]:
+            picks = rng.randint(1_000, 200_000)
+            hero[f"{b}_pick"] = picks
+            hero[f"{b}_win"] = int(picks * rng.uniform(0.4, 0.6))
+        picks = rng.randint(0, 500) # some heroes are never picked in pro games
+        hero["pro_pick"] = picks
+        hero["pro_win"] = int(picks * rng.uniform(0.3, 0.7))
+        hero["pro_ban"] = rng.randint(0, 1000)
+        hero["null_pick"] = rng.randint(0, 1_000_000)
+        hero["null_win"] = 0
+        heroes.append(hero)
+    return heroes
+
+
+def generate_matchups(hero_id: int, n: int = 120) -> List[dict]:
+    """Returns the `/api/heroes/{hero_id}/matchups` response for one of `n` 
+    heroes. Heroes with higher IDs beat heroes with lower IDs, and every 
+    matchup has `hero_id + opponent` games."""
+    return [
+        {
+            "hero_id": opponent,
+            "games_played": hero_id + opponent,
+            "wins": hero_id if hero_id > opponent else opponent // 2,
+        }
+        for opponent in range(1, n+1) if opponent != hero_id
+    ]
+
+
+def generate_hero_grid_config(n_grids: int = 10, 
+                              hero_ids: List[int] = None, 
+                              seed: int = 0
+                             ) -> dict:
+    """Returns a hero grid config (contents of `hero_grid_config.json`) 
+    with `n_grids` hand-made grids containing the given hero IDs."""
+    rng = random.Random(seed)
+    hero_ids = hero_ids or list(range(1, 121))
+    configs = []
+    for g in range(n_grids):
+        ids = list(hero_ids)
+        rng.shuffle(ids)
+        n_categories = rng.randint(1, 6)
+        size = len(ids) // n_categories + 1
+        configs.append({
+            "config_name": f"Grid {g}",
+            "categories": [
+                {
+                    "category_name": f"Category {c}",
+                    "x_position": float(rng.randint(0, 600)),
+                    "y_position": float(c * 200),
+                    "width": float(rng.randint(100, 1180)),
+                    "height": 180.0,
+                    "hero_ids": ids[c*size:(c+1)*size],
+                }
+                for c in range(n_categories)
+            ]
+        })
+    return {"version": 3, "configs": configs}
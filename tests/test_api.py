@@ -0,0 +1,105 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from odherogrid.api import (InvalidBracket, InvalidGridConfig, InvalidHeroStats,
+                            InvalidLayout, InvalidMetric, ODHGError, build_grid,
+                            merge_into, rank)
+from odherogrid.enums import Bracket, Layout
+
+from .synthetic import generate_hero_stats, make_hero_stats
+
+
+def test_rank():
+    heroes = make_hero_stats(5)
+    ranking = rank(heroes, Bracket.DIVINE)
+    assert ranking.bracket == 7
+    assert ranking.hero_ids == [5, 4, 3, 2, 1]
+    assert rank(heroes, "d", ascending=True).hero_ids == [1, 2, 3, 4, 5]
+    assert rank(heroes, "legend-divine").bracket == "5-7"
+    assert [h.id for h in heroes] == [1, 2, 3, 4, 5] # not modified
+
+    # OpenDota hero stats objects
+    stats = generate_hero_stats(20)
+    assert len(rank(stats, "pro").heroes) == 20
+
+
+def test_rank_previous():
+    heroes = make_hero_stats(3)
+    heroes[1].wins[7] = heroes[2].wins[7] # heroes 2 and 3 are tied
+    assert rank(heroes, 7).hero_ids == [2, 3, 1]
+    assert rank(heroes, 7, previous=[3, 2, 1]).hero_ids == [3, 2, 1]
+    # Hero 1 (1/4) is 50 percentage points behind heroes 2 and 3 (3/4)
+    assert rank(heroes, 7, previous=[1, 2, 3], hysteresis=60).hero_ids == [1, 2, 3]
+    assert rank(heroes, 7, previous=[1, 2, 3], hysteresis=40).hero_ids == [2, 3, 1]
+
+
+@pytest.mark.parametrize("args,exc", [
+    ((0,), InvalidBracket),
+    (("9-10",), InvalidBracket),
+    (("foo",), InvalidBracket),
+    ((7, "picks"), InvalidMetric),
+])
+def test_rank_invalid(args, exc):
+    with pytest.raises(exc):
+        rank(make_hero_stats(3), *args)
+
+
+def test_rank_invalid_stats():
+    with pytest.raises(InvalidHeroStats):
+        rank([{"localized_name": "No ID"}], 7)
+    with pytest.raises(ODHGError):
+        rank([{"id": 1, "7_win": "many"}], 7)
+
+
+def test_build_grid():
+    ranking = rank(make_hero_stats(6), 7)
+    grid = build_grid(ranking, "single", name="test")
+    assert grid.config_name == "test (Divine)"
+    assert grid.categories[0].hero_ids == [6, 5, 4, 3, 2, 1]
+
+    grid = build_grid(ranking, Layout.ROLE, name="test", name_layout=True, name_direction=True)
+    assert grid.config_name == "test (Divine) (Role) (Descending)"
+    assert [c.category_name for c in grid.categories] == ["Carry", "Support", "Flexible"]
+
+    with pytest.raises(InvalidLayout):
+        build_grid(ranking, "spiral")
+
+
+def test_merge_into():
+    ranking = rank(make_hero_stats(6), 7)
+    grid = build_grid(ranking, "single", name="test")
+    custom = {"config_name": "custom", "categories": []}
+    config = {"version": 3, "configs": [custom, {"config_name": "test (Divine)", "categories": []}]}
+    before = json.dumps(config)
+
+    merged = merge_into(config, [grid, build_grid(rank(make_hero_stats(6), 8), name="test")])
+    assert json.dumps(config) == before # not modified
+    assert [g["config_name"] for g in merged["configs"]] == [
+        "custom", "test (Divine)", "test (Immortal)"
+    ]
+    assert merged["configs"][1] == grid.to_json()
+    assert merged["version"] == 3
+    json.dumps(merged)
+
+    assert merge_into(None, [grid])["configs"] == [grid.to_json()]
+
+    with pytest.raises(InvalidGridConfig) as e:
+        merge_into({"configs": [{"config_name": "broken"}]}, [grid])
+    assert e.value.report.quarantined
+    with pytest.raises(InvalidGridConfig):
+        merge_into({"configs": {}}, [grid])
+    with pytest.raises(InvalidGridConfig):
+        merge_into([], [grid])
+
+
+def test_concurrent():
+    stats = generate_hero_stats(50)
+    expected = build_grid(rank(stats, "pubs"), "role").to_json()
+
+    def generate(_):
+        return build_grid(rank(stats, "pubs"), "role").to_json()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(g == expected for g in pool.map(generate, range(32)))
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from odherogrid.batch import InvalidBatchConfig, generate_many, load_batch_config
+from odherogrid.resources import HERO_GRID_CONFIG_BASE
+
+from .synthetic import make_hero_stats
+
+
+def test_load_batch_config(tmp_path):
+    path = tmp_path / "configs.yml"
+    path.write_text(
+        "defaults:\n"
+        "  brackets: [7]\n"
+        "  layout: single\n"
+        "users:\n"
+        "  alice:\n"
+        "    path: /tmp/alice\n"
+        "    brackets: [5-7, 8]\n"
+        "  bob:\n"
+        "    path: /tmp/bob\n"
+    )
+    configs = load_batch_config(path)
+    assert configs["alice"] == {"path": "/tmp/alice", "brackets": ["5-7", 8], "layout": "single"}
+    assert configs["bob"] == {"path": "/tmp/bob", "brackets": [7], "layout": "single"}
+
+
+def test_load_batch_config_invalid_keys(tmp_path):
+    path = tmp_path / "configs.yml"
+    path.write_text("users:\n  alice:\n    path: /tmp/alice\n    1: x\n  bob:\n    path: /tmp/bob\n")
+    configs = load_batch_config(path)
+    results = generate_many(configs, heroes=make_hero_stats(10))
+    assert "invalid key: 1" in results[0].error
+    assert results[1].user == "bob" and "invalid key" not in str(results[1].error)
+
+    path.write_text("defaults:\n  1: x\nusers:\n  alice:\n    path: /tmp/alice\n")
+    with pytest.raises(InvalidBatchConfig, match="'defaults' has an invalid key: 1"):
+        load_batch_config(path)
+
+
+def test_generate_many_shared_path(tmp_path):
+    """Users whose configs point at the same hero_grid_config.json
+    all keep their grids."""
+    configs = [
+        {"name": str(i), "path": str(tmp_path), "brackets": [7], "config_name": f"user {i}"}
+        for i in range(8)
+    ]
+    configs.append({"name": "8", "path": str(tmp_path / "hero_grid_config.json"), 
+                    "brackets": [7], "config_name": "user 8"})
+    results = generate_many(configs, heroes=make_hero_stats(10), workers=8)
+    assert all(r.ok for r in results)
+    grids = json.loads((tmp_path / "hero_grid_config.json").read_text())["configs"]
+    assert sorted(g["config_name"] for g in grids) == [f"user {i} (Divine)" for i in range(9)]
+
+
+def test_generate_many(tmp_path):
+    alice, bob, carol = (tmp_path / u for u in ["alice", "bob", "carol"])
+    alice.mkdir()
+    bob.mkdir()
+    # Bob has a custom grid that must be kept
+    custom = {"config_name": "custom", "categories": []}
+    (bob / "hero_grid_config.json").write_text(
+        json.dumps(dict(HERO_GRID_CONFIG_BASE, configs=[custom]))
+    )
+    configs = {
+        "alice": {"path": str(alice), "brackets": [7, "5-7"], "layout": ["single", "role"]},
+        "bob": {"path": str(bob), "brackets": [7], "layout": "single", "ascending": True},
+        "carol": {"path": str(carol)}, # directory doesn't exist
+        "dave": {"brackets": [7]}, # no path
+        "eve": {"path": str(alice), "brackets": ["foo"]},
+    }
+    results = generate_many(configs, heroes=make_hero_stats(10), workers=2)
+    assert [r.user for r in results] == ["alice", "bob", "carol", "dave", "eve"]
+    assert [r.ok for r in results] == [True, True, False, False, False]
+
+    assert results[0].written
+    assert results[0].grids == [
+        "OpenDota Hero Winrates (Divine) (Single)",
+        "OpenDota Hero Winrates (Divine) (Role)",
+        "OpenDota Hero Winrates (Legend-Divine) (Single)",
+        "OpenDota Hero Winrates (Legend-Divine) (Role)",
+    ]
+    grids = json.loads((alice / "hero_grid_config.json").read_text())["configs"]
+    assert grids[0]["categories"][0]["hero_ids"] == list(range(10, 0, -1))
+
+    grids = json.loads((bob / "hero_grid_config.json").read_text())["configs"]
+    assert grids[0] == custom
+    assert grids[1]["categories"][0]["hero_ids"] == list(range(1, 11))
+    assert "FileNotFoundError" in results[2].error
+    assert "path" in results[3].error
+    assert "foo" in results[4].error
+
+    # Unchanged grids are not written again
+    results = generate_many(configs, heroes=make_hero_stats(10))
+    assert results[0].ok and not results[0].written
+    assert results[1].ok and not results[1].written
@@ -0,0 +1,33 @@
+from benchmarks.micro import compare, run_benchmarks
+
+from .synthetic import generate_hero_grid_config, generate_hero_stats
+
+
+def test_synthetic_deterministic():
+    assert generate_hero_stats(50, seed=1) == generate_hero_stats(50, seed=1)
+    assert generate_hero_stats(50, seed=1) != generate_hero_stats(50, seed=2)
+    assert generate_hero_grid_config(5) == generate_hero_grid_config(5)
+
+
+def test_run_benchmarks():
+    """Runs the benchmark suite at its smallest scale, so it doesn't rot."""
+    results = run_benchmarks(hero_counts=[10], grid_counts=[2], repeat=1)
+    assert "sort_heroes_by_winrate[heroes=10]" in results["results"]
+    assert "save_hero_grid_config[grids=2]" in results["results"]
+
+    # Compared to itself, nothing has regressed
+    assert compare(results, results) == []
+
+    faster = {"results": {
+        name: dict(r, median=r["median"] / 10) 
+        for name, r in results["results"].items()
+    }}
+    assert compare(results, faster, threshold=2.0)
+
+
+def test_e2e_scenario():
+    """Runs `odhg` end-to-end against the stand-in server."""
+    from benchmarks.e2e import run_scenario
+    result = run_scenario("503x2", repeat=1)
+    assert result["exit_code"] == 0, result["stderr"]
+    assert result["requests"] == 3
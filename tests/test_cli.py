@@ -1,6 +1,7 @@
 import pytest
 
-from odherogrid.cli.parse import parse_arg_brackets, parse_arg_layout, parse_config
+from odherogrid.cli.parse import (parse_arg_brackets, parse_arg_layout,
+                                  parse_arg_layouts, parse_config)
 from odherogrid.cli.help import get_help_string
 from odherogrid.cli.params import get_click_params
 from odherogrid.enums import Bracket, Layout
@@ -42,6 +43,19 @@ def test_parse_arg_layout():
         assert parse_arg_layout(g.name.lower()) == g.value
 
 
+@pytest.mark.parametrize(
+    "test_input,expected",
+    [
+        (1, [1]),
+        ("role", [3]),
+        (["m", "r", "3"], [1, 3]),
+        ((), [Layout.DEFAULT.value]),
+    ]
+)
+def test_parse_arg_layouts(test_input, expected):
+    assert parse_arg_layouts(test_input) == expected
+
+
 def test_parse_config(testconf_dict):
     """
     NOTE: Requires a valid config. (Remove this?)
@@ -67,4 +81,32 @@ def test_parameters():
         main_param = next(p for p in main.params if parameter.name == p.name)
         assert main_param
         for attr in attrs:
-            assert getattr(parameter, attr) == getattr(main_param, attr)
\ No newline at end of file
+            assert getattr(parameter, attr) == getattr(main_param, attr)
+
+@pytest.mark.parametrize(
+    "test_input,expected",
+    [
+        (["5-7"], ["5-7"]),
+        (["legend-divine"], ["5-7"]),
+        (["l-d", "5-7", 7], [7, "5-7"]),
+        (["pubs"], ["pubs"]),
+        (["1-8"], ["pubs"]),
+        (["7-7"], [7]),
+        # Invalid ranges
+        (["7-5", "5-9", "0-3"], [Bracket.DEFAULT.value]),
+    ]
+)
+def test_parse_arg_brackets_aggregate(test_input, expected):
+    assert parse_arg_brackets(test_input) == expected
+
+
+@pytest.mark.parametrize("args", [
+    ["--profile", "table"], ["--counters", "axe"], ["--min-games", "10"], ["--pro-days", "7"],
+])
+def test_daemon_rejects_unsupported_options(args, monkeypatch):
+    from click.testing import CliRunner
+
+    monkeypatch.setattr("odherogrid.daemon.run_daemon", lambda *a, **kw: pytest.fail("ran"))
+    result = CliRunner().invoke(main, ["--daemon"] + args)
+    assert result.exit_code == 2
+    assert f"--daemon can't be combined with {args[0]}" in result.output
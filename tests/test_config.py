@@ -3,7 +3,8 @@ from io import StringIO
 import pytest
 
 from odherogrid.config import (CONFIG_BASE, _do_load_config,
-                               check_config_integrity, update_config)
+                               check_config_integrity, read_config_cache,
+                               update_config, write_config_cache)
 
 
 # config.py
@@ -53,3 +54,85 @@ def test_check_config_integrity_userdefined(monkeypatch, config_empty, testconf)
         conf = check_config_integrity(conf, filename=testconf)
         
         assert conf.keys() == CONFIG_BASE.keys()
+
+
+def test_config_cache(tmp_path, testconf_dict):
+    """Tests that the config cache is invalidated when `config.yml` changes."""
+    conf = tmp_path / "config.yml"
+    cache = tmp_path / "config.cache.json"
+    update_config(testconf_dict, filename=conf)
+    assert read_config_cache(filename=conf, cache=cache) is None
+
+    write_config_cache(testconf_dict, filename=conf, cache=cache)
+    cached = read_config_cache(filename=conf, cache=cache)
+    assert cached["config"] == testconf_dict
+    assert cached["parsed"] is None
+
+    update_config(dict(testconf_dict, config_name="changed"), filename=conf)
+    assert read_config_cache(filename=conf, cache=cache) is None
+
+
+def test_check_config_integrity_optional_keys(tmp_path):
+    """Optional keys (e.g. `api_key`) are kept, but never prompted for."""
+    conf = dict(CONFIG_BASE, api_key="secret", unknown=1)
+    conf = check_config_integrity(conf, filename=tmp_path / "config.yml")
+    assert conf == dict(CONFIG_BASE, api_key="secret")
+    assert "api_key" not in check_config_integrity(dict(CONFIG_BASE))
+
+
+def test_config_cache_leaves_out_api_key(tmp_path, monkeypatch):
+    import odherogrid.config
+    from odherogrid.config import get_api_key
+
+    conf = tmp_path / "config.yml"
+    cache = tmp_path / "config.cache.json"
+    config = dict(CONFIG_BASE, path=str(tmp_path), api_key="secret")
+    update_config(config, filename=conf)
+    write_config_cache(config, parsed=dict(config), filename=conf, cache=cache)
+    assert "secret" not in cache.read_text()
+    assert read_config_cache(filename=conf, cache=cache)["config"] == dict(CONFIG_BASE, path=str(tmp_path))
+
+    # The key is read from config.yml instead
+    monkeypatch.setattr(odherogrid.config, "CONFIG", conf)
+    assert get_api_key() == "secret"
+    update_config(dict(config, api_key=None), filename=conf)
+    assert get_api_key() is None
+
+
+def test_config_cache_version(tmp_path, monkeypatch):
+    """Tests that the config cache is invalidated by another package version."""
+    import odherogrid.config
+
+    conf = tmp_path / "config.yml"
+    cache = tmp_path / "config.cache.json"
+    config = dict(CONFIG_BASE, path=str(tmp_path))
+    update_config(config, filename=conf)
+    write_config_cache(config, filename=conf, cache=cache)
+    assert read_config_cache(filename=conf, cache=cache)
+    monkeypatch.setattr(odherogrid.config, "__version__", "999.0.0")
+    assert read_config_cache(filename=conf, cache=cache) is None
+
+
+def test_config_cache_read_once(tmp_path, monkeypatch):
+    """Tests that a run reads the config cache once."""
+    import odherogrid.config
+    from odherogrid.odhg import get_config_from_cli_args
+
+    conf = tmp_path / "config.yml"
+    grids = tmp_path / "hero_grid_config.json"
+    grids.write_text('{"version": 3, "configs": []}')
+    update_config(dict(CONFIG_BASE, path=str(grids)), filename=conf)
+    monkeypatch.setattr(odherogrid.config, "CONFIG", conf)
+    monkeypatch.setattr(odherogrid.config, "CONFIG_CACHE", tmp_path / "config.cache.json")
+    reads = []
+    read = odherogrid.config.read_config_cache
+    monkeypatch.setattr(odherogrid.config, "read_config_cache", lambda: reads.append(1) or read())
+
+    import odherogrid.cli.parse
+    parses = []
+    parse = odherogrid.cli.parse.parse_config
+    monkeypatch.setattr(odherogrid.cli.parse, "parse_config", lambda c: parses.append(1) or parse(c))
+
+    first = get_config_from_cli_args()
+    assert get_config_from_cli_args() == first
+    assert (len(reads), len(parses)) == (2, 1) # the second run is parsed from the cache
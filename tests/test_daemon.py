@@ -0,0 +1,57 @@
+import json
+
+from odherogrid.daemon import Daemon
+from odherogrid.rankings import RankingStore
+from odherogrid.resources import HERO_GRID_CONFIG_BASE
+
+from .synthetic import make_hero_stats
+
+
+class FakeFetcher:
+    def __init__(self, heroes: list):
+        self.heroes = heroes
+        self.changed = True
+
+    def fetch(self):
+        changed, self.changed = self.changed, False
+        return self.heroes, changed
+
+    def close(self):
+        pass
+
+
+def test_daemon_tick(tmp_path):
+    path = tmp_path / "hero_grid_config.json"
+    path.write_text(json.dumps(HERO_GRID_CONFIG_BASE))
+    config = {
+        "path": path,
+        "brackets": [7],
+        "layout": 1,
+        "config_name": "test",
+        "ascending": False,
+    }
+    daemon = Daemon(lambda: dict(config))
+    daemon.fetcher = FakeFetcher(make_hero_stats(10))
+    daemon.rankings = RankingStore(tmp_path / "rankings.json")
+
+    daemon.tick()
+    mtime = path.stat().st_mtime_ns
+    assert len(daemon.hero_grid_config.grids) == 1
+
+    # Unchanged stats and grid file. Nothing should be written.
+    daemon.tick()
+    assert path.stat().st_mtime_ns == mtime
+
+    # Grids are regenerated after config reload (SIGHUP),
+    # but the file isn't rewritten if they are unchanged
+    daemon.reload()
+    daemon.tick()
+    assert daemon.hero_grid_config.changes["unchanged"] == 1
+    assert path.stat().st_mtime_ns == mtime
+
+    # Changed stats are written
+    daemon.fetcher = FakeFetcher(make_hero_stats(10)[::-1])
+    daemon.fetcher.heroes[-1].wins[7] += 100 # hero 1 is ranked first
+    daemon.tick()
+    assert daemon.hero_grid_config.changes["updated"] == 1
+    assert path.stat().st_mtime_ns != mtime
@@ -1,6 +1,7 @@
 import pytest
 
-from odherogrid.enums import Bracket, Layout, enum_start_end, enum_string
+from odherogrid.enums import (PUBS, Bracket, Layout, bracket_members, bracket_name,
+                             enum_start_end, enum_string)
 
 
 def test_brackets_default():
@@ -29,3 +30,12 @@ def test_enum_string(enum):
     for line, e in zip(lines, enum):
         assert line.startswith(f"\t{e.value}.")
 
+
+
+@pytest.mark.parametrize("bracket,members,name",
+    [(7, [7], "Divine"),
+     ("5-7", [5, 6, 7], "Legend-Divine"),
+     (PUBS, list(range(1, 9)), "All Pubs")])
+def test_bracket_members_name(bracket, members, name):
+    assert bracket_members(bracket) == members
+    assert bracket_name(bracket) == name
@@ -1,6 +1,101 @@
-from odherogrid.error import get_stack_frames
+import io
+import os
+
+import odherogrid.error
+from odherogrid.error import (get_n_stack_frames, get_stack_frames,
+                              prune_logs, safe_repr, write_stack_dump)
+
+API_KEY = "0123-secret-api-key" # not a local, so the stack dump can't contain it
+
 
 def test_get_stack_frames():
     assert next(get_stack_frames())
     for frame in get_stack_frames():
         assert frame
+
+
+def test_get_n_stack_frames():
+    frames = list(get_n_stack_frames(2))
+    assert len(frames) == 2
+    assert frames[0] is not frames[1]
+    assert frames[1].f_back is not None
+
+
+def test_safe_repr():
+    assert safe_repr("abc") == "'abc'"
+    assert len(safe_repr(list(range(100_000)))) < 100
+    assert len(safe_repr("a" * 10_000, max_length=100)) < 200
+
+    class BadRepr:
+        def __repr__(self):
+            raise ValueError
+    assert safe_repr(BadRepr())
+
+
+def test_write_stack_dump():
+    huge = [{"id": i, "name": "x" * 100} for i in range(10_000)]
+    f = io.StringIO()
+    written = write_stack_dump(f, get_stack_frames(), max_size=2_000)
+    assert written <= 2_000
+    assert len(f.getvalue()) < 2_100
+    assert "huge = [" in f.getvalue()
+    assert huge
+
+
+def test_prune_logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(odherogrid.error, "LOGS_DIR", tmp_path)
+    for i in range(5):
+        p = tmp_path / f"odhg_error_{i}.log"
+        p.write_text("x" * 100)
+        os.utime(p, (i, i))
+    
+    prune_logs(max_logs=3)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "odhg_error_2.log", "odhg_error_3.log", "odhg_error_4.log"
+    ]
+    prune_logs(max_size=250)
+    assert len(list(tmp_path.iterdir())) == 2
+    # The newest log is kept regardless of size
+    prune_logs(keep=tmp_path / "odhg_error_3.log", max_size=0)
+    assert [p.name for p in tmp_path.iterdir()] == ["odhg_error_3.log"]
+
+
+def test_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(odherogrid.error, "LOGS_DIR", tmp_path / "logs")
+    heroes = [{"id": i, "name": "x" * 100} for i in range(100_000)]
+    try:
+        heroes[0]["missing"]
+    except KeyError as e:
+        log_file = odherogrid.error.log(e)
+    contents = log_file.read_text()
+    assert "KeyError" in contents
+    assert "heroes = [" in contents
+    assert len(contents) < odherogrid.error.MAX_LOG_SIZE
+
+
+def test_log_redacts_api_key(tmp_path, monkeypatch):
+    """Tests that the OpenDota API key doesn't end up in error logs."""
+    import httpx
+
+    import odherogrid.odapi
+    from odherogrid.odapi import RateLimiter, request_json
+
+    from .standin import Fault, StandInServer
+
+    monkeypatch.setattr(odherogrid.error, "LOGS_DIR", tmp_path / "logs")
+    monkeypatch.setattr(
+        odherogrid.odapi, "RATE_LIMITER", RateLimiter(tmp_path / "ratelimit.json", api_key=API_KEY)
+    )
+    config = {"config_name": "test", "api_key": API_KEY}
+    with StandInServer(default_fault=Fault(status=404)) as server:
+        monkeypatch.setattr(odherogrid.odapi, "OPENDOTA_API_URL", server.api_url)
+        try:
+            with httpx.Client() as client:
+                request_json(client, f"{server.api_url}/heroStats")
+        except httpx.HTTPError as e:
+            log_file = odherogrid.error.log(e)
+    contents = log_file.read_text()
+    assert "in request_json" in contents
+    assert "'api_key': <redacted>" in contents
+    assert API_KEY not in contents
+    assert config
@@ -0,0 +1,119 @@
+import os
+
+from odherogrid.enums import Layout
+from odherogrid.gridcache import GridCache, grid_key, stats_fingerprint
+from odherogrid.herogrid import HeroGridConfig, get_hero_grid_config_path
+from odherogrid.models import HeroGridModel
+from odherogrid.rankings import RankingStore
+
+from .synthetic import make_hero_stats
+
+
+def test_stats_fingerprint():
+    heroes = make_hero_stats(10)
+    assert stats_fingerprint(heroes) == stats_fingerprint(make_hero_stats(10))
+    heroes[0].wins[7] += 1
+    assert stats_fingerprint(heroes) != stats_fingerprint(make_hero_stats(10))
+
+
+def test_grid_key():
+    key = grid_key("fp", 7, 1, False, "name")
+    assert key == grid_key("fp", 7, 1, False, "name")
+    assert key != grid_key("fp", 7, 1, True, "name")
+    assert key != grid_key("fp", "5-7", 1, False, "name")
+    assert key != grid_key("fp", 7, 1, False, "name", name_layout=True)
+
+
+def test_grid_key_previous():
+    key = grid_key("fp", 7, 1, False, "name")
+    assert key != grid_key("fp", 7, 1, False, "name", previous="a")
+    assert grid_key("fp", 7, 1, False, "name", previous="a") != grid_key(
+        "fp", 7, 1, False, "name", previous="b"
+    )
+
+
+def test_grid_cache_lru(tmp_path):
+    cache = GridCache(tmp_path, max_entries=2)
+    for i, key in enumerate("abc"):
+        cache.put(key, HeroGridModel(key))
+        os.utime(tmp_path / f"{key}.json", ns=(i, i))
+    assert cache.get("a") # not evicted until the batch is done
+    os.utime(tmp_path / "a.json", ns=(0, 0))
+    cache.evict()
+    assert cache.get("a") is None # evicted
+    assert cache.get("b").config_name == "b" # b is now most recently used
+    cache.put("d", HeroGridModel("d"))
+    cache.evict()
+    assert cache.get("c") is None
+    assert cache.get("b") and cache.get("d")
+
+    cache = GridCache(tmp_path, max_size=0)
+    cache.put("e", HeroGridModel("e"))
+    cache.evict()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_grid_cache_evicts_once_per_batch(tmp_path, monkeypatch):
+    """Eviction scans the cache directory once after a batch of puts,
+    and not at all if nothing was put."""
+    cache = GridCache(tmp_path)
+    scans = []
+    glob = type(tmp_path).glob
+    monkeypatch.setattr(type(tmp_path), "glob", lambda self, p: scans.append(p) or glob(self, p))
+    for key in "abc":
+        cache.put(key, HeroGridModel(key))
+    cache.evict()
+    cache.evict()
+    assert len(scans) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json", "b.json", "c.json"]
+
+
+def test_herogridconfig_create_grids_cached(tmp_path, monkeypatch):
+    """Tests that cached grids are used without ranking heroes."""
+    conf = {
+        "path": get_hero_grid_config_path(str(tmp_path / "hero_grid_config.json")),
+        "brackets": [7, 8],
+        "layout": [Layout.SINGLE.value, Layout.ROLE.value],
+        "config_name": "test",
+        "ascending": False,
+    }
+    cache = GridCache(tmp_path / "cache")
+    h = HeroGridConfig(make_hero_stats(10), conf, grid_cache=cache)
+    h.create_grids()
+    created = list(h.grids)
+    assert len(list(cache.path.iterdir())) == 4
+
+    h = HeroGridConfig(make_hero_stats(10), conf, grid_cache=cache)
+    monkeypatch.setattr(h, "get_ranking", None) # must not be called
+    h.create_grids()
+    assert h.grids == created
+
+    # Different stats
+    heroes = make_hero_stats(10)
+    heroes[0].wins[7] = 100
+    h = HeroGridConfig(heroes, conf, grid_cache=cache)
+    h.create_grids()
+    assert h.grids != created
+    assert len(list(cache.path.iterdir())) == 8
+
+
+def test_herogridconfig_create_grids_cached_previous_ranking(tmp_path):
+    """Tests that grids cached for one previous ranking aren't used with
+    another, since ties keep their previous order."""
+    conf = {
+        "path": get_hero_grid_config_path(str(tmp_path / "hero_grid_config.json")),
+        "brackets": [7],
+        "layout": Layout.SINGLE.value,
+        "config_name": "test",
+        "ascending": False,
+    }
+    heroes = make_hero_stats(5)
+    for hero in heroes: # every hero has the same winrate
+        hero.wins[7], hero.picks[7] = 1, 2
+    cache = GridCache(tmp_path / "cache")
+    for previous in ([5, 4, 3, 2, 1], [1, 2, 3, 4, 5]):
+        rankings = RankingStore(tmp_path / "rankings.json")
+        rankings.previous = {"7": previous}
+        h = HeroGridConfig(heroes, conf, grid_cache=cache, rankings=rankings)
+        h.create_grids()
+        assert h.grids[0].categories[0].hero_ids == previous
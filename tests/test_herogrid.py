@@ -1,12 +1,19 @@
 import itertools
 import sys
+from pathlib import Path
 
 import pytest
 
 from odherogrid.enums import Bracket, Layout
-from odherogrid.herogrid import (HeroGrid, HeroGridConfig,
+from odherogrid.herogrid import (LINUX_STEAM_ROOTS, HeroGrid, HeroGridConfig,
                                  detect_userdata_path,
-                                 get_hero_grid_config_path, _get_steam_path_windows)
+                                 discover_cfg_directories,
+                                 discover_hero_grid_config_path,
+                                 get_hero_grid_config_path, _get_steam_path_windows,
+                                 _sort_with_hysteresis)
+from odherogrid.rankings import RankingStore
+
+from .synthetic import make_hero_stats
 
 
 def _get_hero_wl(hero: dict, bracket: Bracket) -> float:
@@ -183,4 +190,153 @@ def test__get_steam_path_windows():
     if sys.platform != "win32":
         return
     p = _get_steam_path_windows()
-    assert(p.exists())
\ No newline at end of file
+    assert(p.exists())
+
+def _make_account(userdata: Path, account: str) -> Path:
+    cfg_dir = userdata / account / "570/remote/cfg"
+    cfg_dir.mkdir(parents=True)
+    return cfg_dir
+
+
+def test_discover_cfg_directories(tmp_path):
+    """Tests that symlinked Steam roots are only searched once, and that
+    accounts without a Dota 2 cfg directory are skipped."""
+    steam = tmp_path / ".local/share/Steam"
+    userdata = steam / "userdata"
+    cfg_dir = _make_account(userdata, "123")
+    (userdata / "456").mkdir() # Dota 2 has never been launched on this account
+    (tmp_path / ".steam").mkdir()
+    (tmp_path / ".steam/steam").symlink_to(steam)
+
+    roots = [tmp_path / root for root in LINUX_STEAM_ROOTS]
+    cache = tmp_path / "userdata.json"
+    assert discover_cfg_directories(roots=roots, cache=cache) == [cfg_dir.resolve()]
+    assert cache.exists()
+
+
+def test_discover_cfg_directories_cache(tmp_path):
+    """Tests that cached results are invalidated when a new account is added."""
+    userdata = tmp_path / "Steam/userdata"
+    first = _make_account(userdata, "123")
+    roots = [tmp_path / root for root in LINUX_STEAM_ROOTS]
+    cache = tmp_path / "userdata.json"
+    assert discover_cfg_directories(roots=roots, cache=cache) == [first]
+    assert discover_cfg_directories(roots=roots, cache=cache) == [first]
+
+    second = _make_account(userdata, "456")
+    assert discover_cfg_directories(roots=roots, cache=cache) == [first, second]
+
+
+def test_discover_hero_grid_config_path(tmp_path):
+    roots = [tmp_path / root for root in LINUX_STEAM_ROOTS]
+    cache = tmp_path / "userdata.json"
+    assert discover_hero_grid_config_path(roots=roots, cache=cache) is None
+
+    cfg_dir = _make_account(tmp_path / "Steam/userdata", "123")
+    p = discover_hero_grid_config_path(roots=roots, cache=cache)
+    assert p == cfg_dir / "hero_grid_config.json"
+
+
+def test_herogridconfig_create_grids_matrix(tmp_path):
+    """Tests `HeroGridConfig.create_grids()` with multiple brackets, 
+    layouts and both sorting directions."""
+    path = tmp_path / "hero_grid_config.json"
+    conf = {
+        "path": get_hero_grid_config_path(str(path)),
+        "brackets": [7, 8],
+        "layout": [Layout.SINGLE.value, Layout.ROLE.value],
+        "config_name": "test",
+        "ascending": False,
+        "both_directions": True,
+    }
+    h = HeroGridConfig(make_hero_stats(10), conf)
+    h.create_grids()
+    names = [g["config_name"] for g in h.grids]
+    assert len(names) == len(set(names)) == 8
+    assert "test (Divine) (Role) (Ascending)" in names
+
+    grids = {g["config_name"]: g for g in h.grids}
+    descending = grids["test (Immortal) (Single) (Descending)"]
+    ascending = grids["test (Immortal) (Single) (Ascending)"]
+    assert descending["categories"][0]["hero_ids"] == list(range(10, 0, -1))
+    assert ascending["categories"][0]["hero_ids"] == list(range(1, 11))
+
+
+def test_herogridconfig_aggregate_bracket(tmp_path):
+    """Tests ranking heroes by pooled winrate across brackets."""
+    heroes = make_hero_stats(3)
+    # Hero 1 is best in Legend, but hero 3 has the best pooled winrate
+    for hero in heroes:
+        hero.wins[Bracket.LEGEND], hero.picks[Bracket.LEGEND] = 0, 100
+    heroes[0].wins[Bracket.LEGEND] = 100
+    heroes[0].picks[Bracket.DIVINE] = heroes[2].picks[Bracket.DIVINE] = 1000
+    heroes[0].wins[Bracket.DIVINE], heroes[2].wins[Bracket.DIVINE] = 0, 900
+    
+    conf = {
+        "path": get_hero_grid_config_path(str(tmp_path / "hero_grid_config.json")),
+        "brackets": [Bracket.LEGEND.value, "5-7"],
+        "layout": Layout.SINGLE.value,
+        "config_name": "test",
+        "ascending": False,
+    }
+    h = HeroGridConfig(heroes, conf)
+    assert [hero.id for hero in h.get_ranking(Bracket.LEGEND)][0] == 1
+    assert [hero.id for hero in h.get_ranking("5-7")][0] == 3
+    assert h.get_ranking("5-7") == h.get_ranking("5-7") # cached
+    assert "5-7" in h._rankings
+
+    h.create_grids()
+    assert [g["config_name"] for g in h.grids] == ["test (Legend)", "test (Legend-Divine)"]
+
+
+def test_herogridconfig_hysteresis(tmp_path):
+    """Tests re-ranking from the previous ranking with a hysteresis band."""
+    conf = {
+        "path": get_hero_grid_config_path(str(tmp_path / "hero_grid_config.json")),
+        "brackets": [7],
+        "layout": Layout.SINGLE.value,
+        "config_name": "test",
+        "ascending": False,
+        "hysteresis": 1.0, # percentage points
+    }
+    rankings = RankingStore(tmp_path / "rankings.json")
+    heroes = make_hero_stats(10) # winrates are 1/11, 2/11, ... 10/11
+    h = HeroGridConfig(heroes, conf, rankings=rankings)
+    h.create_grids()
+    assert h.grids[0]["categories"][0]["hero_ids"] == list(range(10, 0, -1))
+    assert RankingStore(tmp_path / "rankings.json").get(7) == list(range(10, 0, -1))
+    mtime = Path(conf["path"]).stat().st_mtime_ns
+
+    # Hero 9 overtakes hero 10 by less than the band. The order is kept,
+    # and the unchanged grid isn't written.
+    for hero in heroes:
+        hero.wins[7], hero.picks[7] = hero.wins[7] * 100, hero.picks[7] * 100
+    heroes[8].wins[7] += 105 # +0.45 percentage points over hero 10
+    h = HeroGridConfig(heroes, conf, rankings=RankingStore(tmp_path / "rankings.json"))
+    h.create_grids()
+    assert h.changes["unchanged"] == 1
+    assert Path(conf["path"]).stat().st_mtime_ns == mtime
+
+    # Without hysteresis, hero 9 is ranked first
+    h = HeroGridConfig(heroes, dict(conf, hysteresis=0), rankings=RankingStore(tmp_path / "rankings.json"))
+    assert [hero.id for hero in h.get_ranking(7)][:2] == [9, 10]
+
+    # Hero 1 overtakes everyone by more than the band
+    heroes[0].wins[7] = 1100
+    h = HeroGridConfig(heroes, conf, rankings=RankingStore(tmp_path / "rankings.json"))
+    h.create_grids()
+    assert h.grids[0]["categories"][0]["hero_ids"] == [1] + list(range(10, 1, -1))
+    assert h.changes["updated"] == 1
+
+
+def test_sort_with_hysteresis():
+    heroes = make_hero_stats(4)
+    winrates = {1: 0.500, 2: 0.505, 3: 0.490, 4: 0.600}
+    key = lambda h: winrates[h.id]
+    # Hero 2 doesn't overtake hero 1 (+0.005), hero 4 overtakes everyone
+    ranked = _sort_with_hysteresis(heroes, key, 0.01, reverse=True)
+    assert [h.id for h in ranked] == [4, 1, 2, 3]
+    ranked = _sort_with_hysteresis(heroes, key, 0.001, reverse=True)
+    assert [h.id for h in ranked] == [4, 2, 1, 3]
+    ranked = _sort_with_hysteresis(heroes[::-1], key, 0.01)
+    assert [h.id for h in ranked] == [3, 2, 1, 4]
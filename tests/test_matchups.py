@@ -0,0 +1,103 @@
+import pytest
+
+import odherogrid.matchups
+import odherogrid.odapi
+from odherogrid.matchups import (MatchupMatrix, build_counter_grid, fetch_matchups,
+                                 find_heroes)
+
+from .standin import Fault, StandInServer
+from .synthetic import generate_matchups, make_hero_stats
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(odherogrid.odapi, "BACKOFF", 0.01)
+
+
+def make_matrix(n: int) -> MatchupMatrix:
+    matrix = MatchupMatrix(range(1, n+1))
+    for hero_id in range(1, n+1):
+        matrix.add(hero_id, generate_matchups(hero_id, n))
+    return matrix
+
+
+def test_matchup_matrix():
+    matrix = make_matrix(5)
+    assert matrix.winrate(3, 1) == 3 / 4
+    assert matrix.winrate(1, 3) == 1 / 4
+    assert matrix.winrate(3, 3) == 0 # no games
+    # Heroes with higher IDs beat hero 3. Hero 4: 1 - 2/7, hero 5: 1 - 2/8
+    assert [c[0] for c in matrix.counters(3, min_games=0)] == [5, 4, 2, 1]
+    assert [c[0] for c in matrix.counters(3, min_games=5)] == [5, 4, 2]
+
+    # Matchups against heroes that aren't in the matrix are ignored
+    matrix.add(1, [{"hero_id": 99, "games_played": 10, "wins": 5}])
+
+
+def test_build_counter_grid():
+    heroes = make_hero_stats(5)
+    grid = build_counter_grid(make_matrix(5), heroes[2], min_games=0, name="test")
+    assert grid.config_name == "test (Hero 3)"
+    strong, weak = grid.categories
+    assert strong.category_name == "Strong against Hero 3"
+    assert strong.hero_ids == [5, 4]
+    assert weak.hero_ids == [2, 1]
+
+
+def test_find_heroes():
+    heroes = make_hero_stats(5)
+    assert [h.id for h in find_heroes(heroes, ["hero 2", 4, "4"])] == [2, 4]
+    assert len(find_heroes(heroes, ["ALL"])) == 5
+    with pytest.raises(ValueError):
+        find_heroes(heroes, ["Hero 6"])
+
+
+def test_fetch_matchups(tmp_path, monkeypatch):
+    n = 6
+    routes = {f"/api/heroes/{i}/matchups": generate_matchups(i, n) for i in range(1, n)}
+    routes["/api/heroes/6/matchups"] = {"error": "not a list"} # malformed
+    cache = tmp_path / "matchups"
+    with StandInServer(routes=routes) as server:
+        monkeypatch.setattr(
+            odherogrid.matchups, "MATCHUPS_URL", f"{server.api_url}/heroes/{{hero_id}}/matchups"
+        )
+        matrix = fetch_matchups(range(1, n+1), cache_dir=cache, concurrency=2)
+        assert matrix.fetched == {1, 2, 3, 4, 5}
+        assert matrix.missing == [6]
+        assert matrix.winrate(5, 1) == 5 / 6
+
+        # Cached for the TTL
+        requests = server.stats.requests
+        assert fetch_matchups([1, 2], range(1, n+1), cache_dir=cache).fetched == {1, 2}
+        assert server.stats.requests == requests
+
+        # Expired entries are revalidated
+        matrix = fetch_matchups([1, 2], cache_dir=cache, ttl=0)
+        assert matrix.fetched == {1, 2}
+        assert server.stats.not_modified == 2
+
+        # Expired entries are used if they can't be fetched
+        server.faults = [Fault(status=500)] * 4
+        matrix = fetch_matchups([1], cache_dir=cache, ttl=0)
+        assert matrix.fetched == {1}
+
+
+def test_create_counter_grids(tmp_path):
+    from odherogrid.herogrid import HeroGridConfig, get_hero_grid_config_path
+
+    conf = {
+        "path": get_hero_grid_config_path(str(tmp_path)),
+        "brackets": [7],
+        "layout": 1,
+        "config_name": "test",
+        "ascending": False,
+    }
+    heroes = make_hero_stats(5)
+    matrix = make_matrix(5)
+    matrix.fetched.discard(5) # e.g. failed to fetch
+    h = HeroGridConfig(heroes, conf)
+    h.create_counter_grids(matrix, heroes, min_games=0)
+    assert [g.config_name for g in h.grids] == [
+        f"OpenDota Hero Counters (Hero {i})" for i in range(1, 5)
+    ]
+    assert h.changes["created"] == 4
@@ -0,0 +1,48 @@
+import json
+import tracemalloc
+
+from odherogrid.enums import Bracket, Layout
+from odherogrid.herogrid import HeroGridConfig
+from odherogrid.odapi import _normalize_hero_stats
+
+from .synthetic import generate_hero_grid_config, generate_hero_stats
+
+N_HEROES = 1000
+N_GRIDS = 500
+
+# Peak memory allowed for a full generation with the dataset above.
+# Raise with care, this test is there to catch regressions.
+PEAK_MEMORY_LIMIT = 96 * 1024**2 # bytes
+
+
+def test_peak_memory_full_generation(tmp_path):
+    """Tests peak memory usage of decoding a large heroStats payload, 
+    loading a large hero_grid_config.json and creating a grid for every
+    combination of bracket and layout."""
+    heroes = generate_hero_stats(N_HEROES)
+    payload = json.dumps(heroes).encode()
+    path = tmp_path / "hero_grid_config.json"
+    path.write_text(json.dumps(
+        generate_hero_grid_config(N_GRIDS, [h["id"] for h in heroes])
+    ))
+    del heroes
+    config = {
+        "path": path,
+        "brackets": [b.value for b in Bracket if b != Bracket.ALL],
+        "layout": [l.value for l in Layout],
+        "config_name": "test",
+        "ascending": False,
+        "both_directions": True,
+    }
+
+    tracemalloc.start()
+    try:
+        hero_stats = _normalize_hero_stats(json.loads(payload))
+        h = HeroGridConfig(hero_stats, config)
+        h.create_grids()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(h.grids) == 9 * len(Layout) * 2
+    assert peak < PEAK_MEMORY_LIMIT
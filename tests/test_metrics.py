@@ -0,0 +1,52 @@
+import pytest
+
+from odherogrid.metrics import METRICS
+from odherogrid.profiling import NULL_SPAN, SINKS, count, span
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    METRICS.enable(tmp_path / "odhg.prom")
+    yield METRICS
+    METRICS.disable()
+
+
+def test_metrics_disabled():
+    assert not SINKS
+    assert span("fetch") is NULL_SPAN
+
+
+def test_metrics_spans(metrics):
+    with span("fetch") as s:
+        s.add(bytes_read=100, requests=1, http_200=1)
+    with span("fetch") as s:
+        s.add(requests=1, http_503=1)
+    count("grid cache", hits=3, misses=1)
+    count("grids", created=1, unchanged=2)
+
+    text = metrics.format()
+    assert 'odhg_bytes_read_total{phase="fetch"} 100' in text
+    assert 'odhg_requests_total{phase="fetch"} 2' in text
+    assert 'odhg_http_responses_total{code="503"} 1' in text
+    assert 'odhg_cache_requests_total{cache="grid cache",result="hits"} 3' in text
+    assert 'odhg_grids_total{result="unchanged"} 2' in text
+    assert 'odhg_phase_calls_total{phase="fetch"} 2' in text
+    assert 'odhg_fetch_duration_seconds_bucket{le="+Inf"} 2' in text
+    assert "odhg_fetch_duration_seconds_count 2" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_metrics_run(metrics):
+    with metrics.run():
+        with span("write") as s:
+            s.add(bytes_written=10)
+    with pytest.raises(ValueError):
+        with metrics.run():
+            raise ValueError
+
+    text = metrics.path.read_text()
+    assert "odhg_runs_total 2" in text
+    assert "odhg_run_failures_total 1" in text
+    assert "odhg_last_run_duration_seconds " in text
+    # Only the metrics file is left behind
+    assert [p.name for p in metrics.path.parent.iterdir()] == ["odhg.prom"]
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from odherogrid.enums import Bracket
+from odherogrid.models import Category, Hero, HeroGridModel, json_default
+
+from .synthetic import generate_hero_grid_config, generate_hero_stats
+
+
+def test_hero_grid_model_roundtrip():
+    hgc = generate_hero_grid_config(5)
+    for g in hgc["configs"]:
+        grid = HeroGridModel.from_json(g)
+        assert grid.to_json() == g
+        assert grid == g
+        assert isinstance(grid.categories[0], Category)
+
+
+def test_hero_grid_model_unknown_keys():
+    """Tests that keys added by future versions of Dota 2 are preserved."""
+    g = {
+        "config_name": "test",
+        "categories": [{"category_name": "a", "hero_ids": [1], "locked": True}],
+        "new_key": 1,
+    }
+    grid = HeroGridModel.from_json(g)
+    assert grid["new_key"] == 1
+    assert grid.categories[0]["locked"] is True
+    out = json.loads(json.dumps(grid, default=json_default))
+    assert out["new_key"] == 1
+    assert out["categories"][0]["locked"] is True
+    assert out["categories"][0]["width"] == 1180.0
+
+
+def test_hero_grid_model_item_access():
+    grid = HeroGridModel("test", [Category("a")])
+    assert grid["config_name"] == "test"
+    grid["categories"][0]["hero_ids"] = [1, 2]
+    assert grid.categories[0].hero_ids == [1, 2]
+    assert "categories" in grid and "missing" not in grid
+    assert grid.get("missing") is None
+    with pytest.raises(KeyError):
+        grid["missing"]
+    assert not hasattr(grid, "__dict__")
+
+
+def test_hero_from_json():
+    hero = Hero.from_json(generate_hero_stats(1)[0] | {"pro_win": 3, "pro_pick": 4})
+    assert hero.wins[Bracket.PRO] == hero["9_win"] == 3
+    assert hero.picks[Bracket.PRO] == hero["9_pick"] == 4
+    assert hero.winrate(Bracket.PRO) == 0.75
+    assert "7_win" in hero and "pro_win" not in hero
+    assert Hero.from_json(hero.to_json()) == hero
+    assert not hasattr(hero, "__dict__")
+
+
+def test_hero_roles():
+    hero = Hero.from_json({"id": 1, "roles": ["Carry", "Nuker", "NewRole"]})
+    assert hero.has_role("Carry") and hero.has_role("NewRole")
+    assert not hero.has_role("Support")
+    assert hero["roles"] == ["Carry", "Nuker", "NewRole"]
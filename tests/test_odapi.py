@@ -1,3 +1,17 @@
+import asyncio
+import json
+import os
+import threading
+
+import httpx
+import pytest
+
+import odherogrid.odapi
+from odherogrid.models import Hero
+from odherogrid.odapi import (HERO_STATS_URL, JITTER, HeroStatsFetcher, RateLimiter,
+                              request_json, request_json_async)
+
+
 def test_opendota_api_type(heroes):
     # Ensure data returned by fetch_hero_stats() is a list
     assert isinstance(heroes, list)
@@ -9,5 +23,140 @@ def test_opendota_api_count(heroes, N_HEROES):
 
 
 def test_opendota_api_contents(heroes, N_HEROES):
-    # Verify that all elements in heroes list are dicts
-    assert all(isinstance(hero, dict) for hero in heroes)
+    # Verify that all elements in heroes list are Hero records
+    assert all(isinstance(hero, Hero) for hero in heroes)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(self.status_code)
+
+
+class FakeClient:
+    """Serves a single heroStats payload, honoring If-None-Match."""
+    def __init__(self, payload: list, headers: dict = None):
+        self.content = json.dumps(payload).encode()
+        self.headers = headers or {}
+        self.requests = []
+        self.auth = None
+
+    def get(self, url: str, headers: dict = None, auth=None):
+        self.requests.append(headers)
+        self.auth = auth
+        if (headers or {}).get("If-None-Match") == "etag":
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, dict(self.headers, ETag="etag"))
+
+
+def test_hero_stats_fetcher():
+    payload = [{"id": 1, "pro_win": 1, "pro_pick": 2, "pro_ban": 3}]
+    fetcher = HeroStatsFetcher(FakeClient(payload))
+    heroes, changed = fetcher.fetch()
+    assert changed
+    assert heroes[0]["9_pick"] == 2
+
+    heroes, changed = fetcher.fetch()
+    assert not changed
+    assert fetcher.client.requests[-1] == {"If-None-Match": "etag"}
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(odherogrid.odapi, "time", clock)
+    return clock
+
+
+def test_rate_limiter(tmp_path, clock):
+    path = tmp_path / "ratelimit.json"
+    limiter = RateLimiter(path, api_key="")
+    assert limiter.reserve() == 0
+    assert not path.exists() # nothing to share until OpenDota sends rate-limit headers
+
+    limiter.update({"X-Rate-Limit-Remaining-Minute": "59", "X-Rate-Limit-Remaining-Day": "1999"})
+    assert limiter.reserve() == 0
+    # Paced at 60 per minute, with jitter. The budget is shared through the state file.
+    assert 1 <= RateLimiter(path, api_key="").reserve() <= 1 + JITTER
+    # Budgets of API keys are separate
+    assert RateLimiter(path, api_key="secret").reserve() == 0
+
+    # Empty buckets refill at capacity per period
+    clock.now += 60
+    limiter.update({"X-Rate-Limit-Remaining-Minute": "0"})
+    assert 1 <= limiter.reserve() <= 1 + JITTER
+
+    # Requests that would wait too long fail
+    clock.now += 60
+    limiter.update({"X-Rate-Limit-Remaining-Month": "0"})
+    with pytest.raises(httpx.HTTPError):
+        limiter.reserve()
+
+
+def test_rate_limiter_request_json(tmp_path, monkeypatch, clock):
+    limiter = RateLimiter(tmp_path / "ratelimit.json", api_key="secret")
+    monkeypatch.setattr(odherogrid.odapi, "RATE_LIMITER", limiter)
+    client = FakeClient([{"id": 1}], {"X-Rate-Limit-Remaining-Minute": "1199"})
+    request_json(client, HERO_STATS_URL)
+    assert client.requests[-1] is None
+    request = client.auth(httpx.Request("GET", HERO_STATS_URL))
+    assert request.headers["Authorization"] == "Bearer secret"
+    assert limiter.reserve() == 0
+    assert 0.05 <= limiter.reserve() <= 0.05 * (1 + JITTER) # 1200 per minute
+
+    # Only requests to OpenDota are governed
+    client = FakeClient([{"id": 1}])
+    request_json(client, "http://localhost:8570/stats")
+    assert client.auth is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses fcntl")
+def test_rate_limiter_async_does_not_block_loop(tmp_path, monkeypatch):
+    """Tests that waiting for another process's lock on the rate limiter's
+    state file doesn't block the event loop."""
+    import fcntl
+
+    path = tmp_path / "ratelimit.json"
+    limiter = RateLimiter(path, api_key="")
+    limiter.update({"X-Rate-Limit-Remaining-Minute": "1199"})
+    monkeypatch.setattr(odherogrid.odapi, "RATE_LIMITER", limiter)
+
+    class AsyncClient:
+        async def get(self, url: str, headers: dict = None):
+            return FakeResponse(200, b"[]")
+
+    async def main() -> int:
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        ticker = asyncio.ensure_future(tick())
+        await request_json_async(AsyncClient(), HERO_STATS_URL)
+        ticker.cancel()
+        return ticks
+
+    with open(path, "a+") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX) # held by "another process" for 0.3s
+        threading.Timer(0.3, fcntl.flock, (f.fileno(), fcntl.LOCK_UN)).start()
+        assert asyncio.run(main()) >= 10
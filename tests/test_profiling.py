@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from odherogrid.profiling import NULL_SPAN, PROFILER, span
+
+
+@pytest.fixture
+def profiler():
+    PROFILER.enable()
+    yield PROFILER
+    PROFILER.disable()
+
+
+def test_span_disabled():
+    assert not PROFILER.enabled
+    with span("fetch") as s:
+        s.add(bytes_read=100)
+    assert s is NULL_SPAN
+
+
+def test_span_summary(profiler):
+    for _ in range(2):
+        with span("fetch") as s:
+            s.add(bytes_read=100)
+    with span("write") as s:
+        s.add(bytes_written=10)
+
+    summary = profiler.summary()
+    assert [p["name"] for p in summary["phases"]] == ["fetch", "write"]
+    fetch = summary["phases"][0]
+    assert fetch["calls"] == 2
+    assert fetch["bytes_read"] == 200
+    assert summary["total"] >= fetch["duration"]
+    json.dumps(summary) # must be serializable for --profile json
+
+
+def test_span_report(profiler, capsys):
+    with span("fetch"):
+        pass
+    profiler.report("table")
+    assert "fetch" in capsys.readouterr().err
+
+
+def test_span_memory():
+    PROFILER.enable(memory=True)
+    try:
+        with span("allocate"):
+            data = [str(i) for i in range(10_000)]
+        summary = PROFILER.summary()
+    finally:
+        PROFILER.disable()
+    phase = summary["phases"][0]
+    assert phase["peak_memory"] > 0
+    assert phase["top_allocations"][0]["site"].startswith(__file__)
+    assert summary["peak_memory"] >= phase["peak_memory"]
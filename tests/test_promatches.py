@@ -0,0 +1,219 @@
+import httpx
+import pytest
+
+import odherogrid.odapi
+import odherogrid.promatches
+from odherogrid.enums import Bracket
+from odherogrid.promatches import ProMatchStore, ingest, set_pro_stats
+
+from .standin import Fault, StandInServer
+from .synthetic import make_hero_stats
+
+HOUR = 60 * 60
+START = 1_600_000_000
+PAGE = 10 # matches per page of /api/proMatches
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(odherogrid.odapi, "BACKOFF", 0.01)
+
+
+def start_time(match_id: int) -> int:
+    return START + match_id * HOUR # one match per hour
+
+
+def get_match(match_id: int) -> dict:
+    """Hero `match_id % 5 + 1` (Radiant) against the next hero (Dire).
+    Radiant wins matches with even IDs."""
+    return {
+        "match_id": match_id,
+        "radiant_win": match_id % 2 == 0,
+        "players": [
+            {"hero_id": match_id % 5 + 1, "player_slot": 0},
+            {"hero_id": (match_id + 1) % 5 + 1, "player_slot": 128},
+        ],
+    }
+
+
+class ProMatches:
+    """Stand-in for /api/proMatches with matches 1 to `newest`."""
+    def __init__(self, newest: int, page: int = PAGE) -> None:
+        self.newest = newest
+        self.page = page
+        self.requests = 0
+
+    def __call__(self, query: dict) -> list:
+        self.requests += 1
+        below = int(query.get("less_than_match_id", [self.newest + 1])[0])
+        ids = range(min(below, self.newest + 1) - 1, 0, -1)[:self.page]
+        return [{"match_id": i, "start_time": start_time(i), "radiant_win": i % 2 == 0} for i in ids]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    pro_matches = ProMatches(50)
+    routes = {f"/api/matches/{i}": get_match(i) for i in range(1, 61)}
+    routes["/api/matches/30"] = {"match_id": 30} # not parsed yet
+    routes["/api/proMatches"] = pro_matches
+    with StandInServer(routes=routes) as server:
+        monkeypatch.setattr(odherogrid.promatches, "PRO_MATCHES_URL", f"{server.api_url}/proMatches")
+        monkeypatch.setattr(odherogrid.promatches, "MATCH_URL", f"{server.api_url}/matches/{{match_id}}")
+        server.pro_matches = pro_matches
+        yield server
+
+
+def test_ingest(tmp_path, server):
+    now = start_time(50)
+    with ProMatchStore(tmp_path / "pro.sqlite3") as store:
+        # First run: matches of the last day (26-50)
+        result = ingest(store, days=1, now=now)
+        assert (result.listed, result.added, result.failed, result.pending) == (25, 24, 1, 1)
+        assert server.pro_matches.requests == 3
+        assert store.newest_match_id == 50
+
+        stats = store.hero_stats(start_time(26))
+        expected = {}
+        for i in range(26, 51):
+            if i == 30:
+                continue
+            match = get_match(i)
+            for p in match["players"]:
+                picks, wins = expected.get(p["hero_id"], (0, 0))
+                win = (p["player_slot"] < 128) == match["radiant_win"]
+                expected[p["hero_id"]] = (picks + 1, wins + win)
+        assert stats == expected
+        assert sum(picks for picks, _ in stats.values()) == 2 * 24
+
+        # Later runs only list matches newer than the checkpoint,
+        # and older matches if the window is longer (7-25)
+        server.pro_matches.newest = 55
+        result = ingest(store, days=2, now=start_time(55))
+        assert (result.listed, result.added, result.failed) == (5 + 19, 5 + 19, 1)
+        assert server.pro_matches.requests == 3 + 1 + 2
+        assert store.checkpoint == (55, 7, start_time(7))
+
+        # Matches that keep failing are given up on
+        result = ingest(store, days=2, now=start_time(55))
+        assert (result.listed, result.added, result.failed, result.pending) == (0, 0, 1, 1)
+        assert store.pending() == []
+        assert ingest(store, days=2, now=start_time(55)).failed == 0
+
+        # Pending matches older than the window aren't fetched
+        store.add_listed([(20, start_time(20))], store.checkpoint[2])
+        assert ingest(store, days=1, now=start_time(55)).failed == 0
+
+
+def test_ingest_longer_window(tmp_path, monkeypatch):
+    """Tests that a longer window than previous runs listed is paged back
+    from the oldest listed match."""
+    DAY = 24 # matches
+    pro_matches = ProMatches(40 * DAY, page=100)
+    with StandInServer(routes={"/api/proMatches": pro_matches}) as server:
+        monkeypatch.setattr(odherogrid.promatches, "PRO_MATCHES_URL", f"{server.api_url}/proMatches")
+        now = start_time(40 * DAY)
+        with ProMatchStore(tmp_path / "pro.sqlite3") as store:
+            result = ingest(store, days=7, now=now, max_matches=0)
+            assert result.listed == 7 * DAY + 1
+            assert store.checkpoint == (40 * DAY, 33 * DAY, start_time(33 * DAY))
+            assert ingest(store, days=7, now=now, max_matches=0).listed == 0
+
+            requests = pro_matches.requests
+            result = ingest(store, days=30, now=now, max_matches=0)
+            assert result.listed == 23 * DAY
+            assert store.checkpoint == (40 * DAY, 10 * DAY, start_time(10 * DAY))
+            assert len(store.pending()) == 30 * DAY + 1
+            # 1 page of new matches (none), 552 older matches in 6 pages
+            assert pro_matches.requests - requests == 1 + 6
+
+
+def test_ingest_resumes_listing(tmp_path, server):
+    """Tests that a listing down to the checkpoint that is cut short by
+    `max_pages` is resumed by the next run, instead of leaving a gap."""
+    with ProMatchStore(tmp_path / "pro.sqlite3") as store:
+        ingest(store, days=1, now=start_time(50), max_matches=0)
+        server.pro_matches.newest = 100
+        now = start_time(100)
+        result = ingest(store, days=1, now=now, max_matches=0, max_pages=2)
+        assert result.listed == 20 # 100-81
+        assert store.newest_match_id == 50 and store.resume == (81, 100)
+
+        assert ingest(store, days=1, now=now, max_matches=0, max_pages=2).listed == 20 # 80-61
+        assert store.newest_match_id == 50 and store.resume == (61, 100)
+
+        assert ingest(store, days=1, now=now, max_matches=0, max_pages=2).listed == 10 # 60-51
+        assert store.newest_match_id == 100 and store.resume == (None, None)
+        assert [m for m, _ in store.pending()] == list(range(100, 25, -1))
+
+        # New matches are listed down to the new checkpoint
+        server.pro_matches.newest = 105
+        assert ingest(store, days=1, now=now, max_matches=0, max_pages=2).listed == 5
+
+
+def test_ingest_max_matches(tmp_path, server):
+    with ProMatchStore(tmp_path / "pro.sqlite3") as store:
+        result = ingest(store, days=1, now=start_time(50), max_matches=10)
+        assert (result.listed, result.added, result.pending) == (25, 10, 15)
+        # Newest first, the rest are fetched by the next run
+        assert store.hero_stats(0) and store.pending()[0][0] == 40
+        result = ingest(store, days=1, now=start_time(50))
+        assert (result.listed, result.added, result.failed) == (0, 14, 1)
+
+
+def test_ingest_null_match(tmp_path, server):
+    """A match that isn't an object fails on its own, not the whole batch."""
+    server.bodies["/api/matches/45"] = b"null"
+    with ProMatchStore(tmp_path / "pro.sqlite3") as store:
+        result = ingest(store, days=1, now=start_time(50))
+        assert (result.listed, result.added, result.failed) == (25, 23, 2)
+        assert [m for m, _ in store.pending()] == [45, 30]
+
+
+def test_ingest_listing_fails(tmp_path, server):
+    server.faults = [Fault(status=500)] * 10
+    with ProMatchStore(tmp_path / "pro.sqlite3") as store:
+        with pytest.raises(httpx.HTTPError):
+            ingest(store, days=1, now=start_time(50))
+        assert store.newest_match_id is None
+        assert store.pending() == []
+
+
+def test_set_pro_stats():
+    heroes = make_hero_stats(3)
+    set_pro_stats(heroes, {1: (10, 6), 3: (4, 1)})
+    assert [(h.picks[Bracket.PRO], h.wins[Bracket.PRO]) for h in heroes] == [
+        (10, 6), (0, 0), (4, 1)
+    ]
+
+
+def test_run_corrupt_database(tmp_path, monkeypatch, capsys):
+    """Tests that `odhg --pro-days` falls back on OpenDota's pro stats
+    if the pro matches database can't be used."""
+    import odherogrid.odhg
+    from odherogrid.gridcache import GridCache
+    from odherogrid.herogrid import get_hero_grid_config_path
+    from odherogrid.rankings import RankingStore
+
+    config = {
+        "path": get_hero_grid_config_path(str(tmp_path)),
+        "brackets": [Bracket.PRO.value],
+        "layout": [1],
+        "config_name": "test",
+        "ascending": False,
+    }
+    db = tmp_path / "promatches.sqlite3"
+    db.write_bytes(b"not a database" * 100)
+    monkeypatch.setattr(odherogrid.promatches, "PRO_MATCHES_DB", db)
+    monkeypatch.setattr(odherogrid.odhg, "get_config_from_cli_args", lambda **options: config)
+    monkeypatch.setattr(odherogrid.odapi, "HERO_STATS_CACHE", tmp_path / "heroStats.json")
+    monkeypatch.setattr(
+        "odherogrid.gridcache.GridCache", lambda: GridCache(tmp_path / "grids")
+    )
+    monkeypatch.setattr(
+        "odherogrid.rankings.RankingStore", lambda: RankingStore(tmp_path / "rankings.json")
+    )
+    with StandInServer() as server:
+        monkeypatch.setattr(odherogrid.odapi, "HERO_STATS_URL", f"{server.api_url}/heroStats")
+        odherogrid.odhg.run({}, pro_days=7)
+    assert "Using OpenDota's pro stats" in capsys.readouterr().out
+    assert "test (Pro)" in (tmp_path / "hero_grid_config.json").read_text()
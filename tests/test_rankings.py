@@ -0,0 +1,32 @@
+from odherogrid.rankings import RankingStore
+
+
+def test_ranking_store(tmp_path):
+    path = tmp_path / "rankings.json"
+    store = RankingStore(path)
+    assert store.get(7) is None
+    assert store.digest(7) is None
+
+    store.set(7, [3, 1, 2])
+    store.set("5-7", [1, 2, 3])
+    assert store.get(7) is None # previous rankings are unaffected by set()
+    store.save()
+
+    store = RankingStore(path)
+    assert store.get(7) == [3, 1, 2]
+    assert store.get("5-7") == [1, 2, 3]
+    assert store.digest(7) != store.digest("5-7")
+
+    # Rankings are only written when they change
+    mtime = path.stat().st_mtime_ns
+    store.set(7, [3, 1, 2])
+    store.save()
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_ranking_store_malformed(tmp_path):
+    path = tmp_path / "rankings.json"
+    path.write_text("[1, 2")
+    assert RankingStore(path).previous == {}
+    path.write_text('{"7": [1, "2"], "8": [2, 1]}')
+    assert RankingStore(path).previous == {"8": [2, 1]}
@@ -2,7 +2,7 @@ import random
 
 import pytest
 
-from odherogrid.resources import _get_new_category
+from odherogrid.resources import _get_new_category, get_new_hero_grid_base
 
 def test__get_new_category():
     arg = lambda: random.uniform(-3840, 3840)
@@ -17,4 +17,10 @@ def test__get_new_category():
         random.shuffle(kwargs)
         kw = kwargs[0:random.randint(0, len(kwargs))]
         params = {k: arg() for k in kw}
-        assert _get_new_category("test", **params)
\ No newline at end of file
+        assert _get_new_category("test", **params)
+
+def test_get_new_hero_grid_base():
+    a, b = get_new_hero_grid_base(), get_new_hero_grid_base()
+    assert [c.category_name for c in a.categories] == ["Strength", "Agility", "Intelligence"]
+    a.categories[0].hero_ids.append(1)
+    assert b.categories[0].hero_ids == [] # not shared
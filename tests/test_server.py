@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+from odherogrid.enums import Bracket
+from odherogrid.server import MAX_CACHED_GRIDS, GridServer, HTTPError
+
+from .synthetic import make_hero_stats
+
+
+@pytest.fixture
+def server() -> GridServer:
+    s = GridServer()
+    s.update(make_hero_stats(10))
+    return s
+
+
+async def _request(server: GridServer, target: str, headers: dict = None):
+    srv = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        lines = [f"GET {target} HTTP/1.1", "Host: localhost"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+        response = await reader.read()
+        writer.close()
+    finally:
+        srv.close()
+        await srv.wait_closed()
+    head, _, body = response.partition(b"\r\n\r\n")
+    head = head.decode().split("\r\n")
+    status = int(head[0].split()[1])
+    headers = dict(h.split(": ", 1) for h in head[1:])
+    return status, headers, body
+
+
+def test_server_stats(server):
+    status, headers, body = asyncio.run(_request(server, "/stats"))
+    assert status == 200
+    assert json.loads(body) == [h.to_json() for h in server.heroes]
+
+    # Conditional request
+    status, _, body = asyncio.run(
+        _request(server, "/stats", {"If-None-Match": headers["ETag"]})
+    )
+    assert status == 304
+    assert body == b""
+
+
+def test_server_grids(server):
+    status, _, body = asyncio.run(
+        _request(server, "/grids?bracket=7&bracket=d&bracket=8&layout=single&name=test")
+    )
+    assert status == 200
+    grids = json.loads(body)
+    assert [g["config_name"] for g in grids] == ["test (Divine)", "test (Immortal)"]
+    # Descending winrate. Winrates increase with hero ID.
+    assert grids[0]["categories"][0]["hero_ids"] == list(range(10, 0, -1))
+
+
+def test_server_grids_overlapping_brackets(server):
+    grids = json.loads(server.route("GET", "/grids?bracket=all&bracket=8&bracket=pubs").body)
+    names = [g["config_name"] for g in grids]
+    assert len(names) == len(set(names)) == len(Bracket) # every bracket but "all", and pubs
+
+
+def test_server_internal_error(server, monkeypatch):
+    """Unexpected errors are answered with a 500 (and logged)."""
+    def route(method, target):
+        raise KeyError("bug")
+    monkeypatch.setattr(server, "route", route)
+    monkeypatch.setattr("odherogrid.server.handle_exception", lambda e: None)
+    status, _, body = asyncio.run(_request(server, "/grids"))
+    assert status == 500
+    assert json.loads(body) == {"error": "Internal Server Error"}
+
+
+def test_server_refresh_updates_on_loop(server):
+    """Stats are fetched in a worker thread, but the server is updated
+    on the event loop thread."""
+    import threading
+
+    class Fetcher:
+        def fetch(self):
+            self.thread = threading.current_thread()
+            return make_hero_stats(5), True
+    updated = []
+    server.fetcher = Fetcher()
+    server.update = lambda heroes: updated.append(threading.current_thread())
+    server.interval = 3600
+
+    async def main():
+        task = asyncio.ensure_future(server.refresh_periodically())
+        while not updated:
+            await asyncio.sleep(0.01)
+        task.cancel()
+    asyncio.run(main())
+    assert server.fetcher.thread is not threading.main_thread()
+    assert updated == [threading.main_thread()]
+
+
+def test_server_grids_cache_is_bounded(server):
+    first = server.route("GET", "/grids?name=0")
+    assert server.route("GET", "/grids?name=0") is first
+    for i in range(1, MAX_CACHED_GRIDS * 2):
+        server.route("GET", f"/grids?name={i}")
+    assert len(server._grids) == MAX_CACHED_GRIDS
+    assert server.route("GET", "/grids?name=0") is not first # evicted
+
+
+@pytest.mark.parametrize("target,status", [
+    ("/grids?bracket=foo", 400),
+    ("/grids?layout=foo", 400),
+    ("/nothing", 404),
+])
+def test_server_errors(server, target, status):
+    with pytest.raises(HTTPError) as e:
+        server.route("GET", target)
+    assert e.value.status == status
+
+
+def test_server_no_stats():
+    with pytest.raises(HTTPError) as e:
+        GridServer().route("GET", "/stats")
+    assert e.value.status == 503
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+import odherogrid.odapi
+from odherogrid.odapi import fetch_hero_stats
+
+from .standin import Fault, StandInServer
+from .synthetic import generate_hero_stats
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(odherogrid.odapi, "BACKOFF", 0.01)
+
+
+def _fetch(server: StandInServer, cache) -> list:
+    odherogrid.odapi.HERO_STATS_URL = f"{server.api_url}/heroStats"
+    return fetch_hero_stats(cache=cache)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(odherogrid.odapi, "HERO_STATS_URL", odherogrid.odapi.HERO_STATS_URL)
+    return tmp_path / "heroStats.json"
+
+
+def test_fetch(cache):
+    with StandInServer(generate_hero_stats(10)) as server:
+        heroes = _fetch(server, cache)
+    assert len(heroes) == 10
+    assert "9_pick" in heroes[0] and "pro_pick" not in heroes[0]
+    assert server.stats.requests == 1
+
+
+@pytest.mark.parametrize("fault", [
+    Fault(status=503),
+    Fault(status=500),
+    Fault(truncate=0.5),
+])
+def test_fetch_retry(cache, fault):
+    with StandInServer(generate_hero_stats(10), faults=[fault, fault]) as server:
+        heroes = _fetch(server, cache)
+    assert len(heroes) == 10
+    assert server.stats.requests == 3
+
+
+def test_fetch_retry_after(cache):
+    faults = [Fault(status=429, retry_after="1")]
+    with StandInServer(generate_hero_stats(10), faults=faults) as server:
+        start = time.perf_counter()
+        _fetch(server, cache)
+        assert time.perf_counter() - start >= 1.0
+    assert server.stats.requests == 2
+
+
+def test_fetch_conditional(cache):
+    """Tests that the cached response is used when stats are unchanged."""
+    with StandInServer(generate_hero_stats(10)) as server:
+        first = _fetch(server, cache)
+        second = _fetch(server, cache)
+    assert first == second
+    assert server.stats.not_modified == 1
+
+
+def test_fetch_offline(cache):
+    """Tests fallback on cached stats when the API is unavailable."""
+    with StandInServer(generate_hero_stats(10)) as server:
+        first = _fetch(server, cache)
+        server.default_fault = Fault(status=503)
+        second = _fetch(server, cache)
+    assert first == second
+    assert server.stats.requests == 2 + odherogrid.odapi.MAX_RETRIES
+
+
+def test_fetch_offline_no_cache(cache):
+    import httpx
+    with StandInServer(default_fault=Fault(status=503)) as server:
+        with pytest.raises(httpx.HTTPError):
+            _fetch(server, cache)
+
+
+def test_run_overlaps_fetch(tmp_path, cache, monkeypatch):
+    """Tests that hero stats are fetched while the config is loaded."""
+    import odherogrid.odhg
+    from odherogrid.gridcache import GridCache
+    from odherogrid.herogrid import get_hero_grid_config_path
+    from odherogrid.rankings import RankingStore
+
+    config = {
+        "path": get_hero_grid_config_path(str(tmp_path)),
+        "brackets": [7],
+        "layout": [1],
+        "config_name": "test",
+        "ascending": False,
+    }
+    def get_config(**options):
+        time.sleep(0.5) # e.g. first-time setup
+        return config
+    monkeypatch.setattr(odherogrid.odhg, "get_config_from_cli_args", get_config)
+    monkeypatch.setattr(odherogrid.odapi, "HERO_STATS_CACHE", cache)
+    monkeypatch.setattr(
+        "odherogrid.gridcache.GridCache", lambda: GridCache(tmp_path / "grids")
+    )
+    monkeypatch.setattr(
+        "odherogrid.rankings.RankingStore", lambda: RankingStore(tmp_path / "rankings.json")
+    )
+
+    with StandInServer(generate_hero_stats(10), default_fault=Fault(latency=0.5)) as server:
+        monkeypatch.setattr(odherogrid.odapi, "HERO_STATS_URL", f"{server.api_url}/heroStats")
+        start = time.perf_counter()
+        odherogrid.odhg.run({})
+        assert time.perf_counter() - start < 0.9
+    assert "test (Divine)" in (tmp_path / "hero_grid_config.json").read_text()
@@ -0,0 +1,73 @@
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+# Cumulative time (in microseconds) that importing the `odhg` console script
+# entry point is allowed to take. Mostly spent importing click.
+IMPORT_TIME_BUDGET_US = 100_000
+
+# Modules that must not be imported until they are needed
+DEFERRED_MODULES = ["httpx", "yaml", "terminaltables"]
+
+# Equivalent to what the `odhg` console script does
+ENTRY_POINT = "from odherogrid.odhg import main"
+
+
+def _run(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args, "-c", code], 
+        capture_output=True, 
+        text=True, 
+        check=True
+    )
+
+
+def _importtime(code: str) -> Dict[str, int]:
+    """Returns cumulative import time of each top-level module imported
+    by `code`, as reported by `python -X importtime`."""
+    times = {}
+    for line in _run(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  "): # top-level imports only
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_entry_point_import_time():
+    times = _importtime(ENTRY_POINT)
+    total = sum(t for mod, t in times.items() if mod.startswith("odherogrid"))
+    assert total <= IMPORT_TIME_BUDGET_US
+
+
+@pytest.mark.parametrize("option", ["--help", "--version"])
+def test_entry_point_deferred_imports(option):
+    """Tests that --help and --version don't import heavy dependencies."""
+    code = (
+        f"import sys\n"
+        f"{ENTRY_POINT}\n"
+        f"try:\n"
+        f"    main(['{option}'])\n"
+        f"except SystemExit:\n"
+        f"    pass\n"
+        f"print(' '.join(sys.modules))"
+    )
+    modules = _run(code).stdout.split()
+    for module in DEFERRED_MODULES:
+        assert module not in modules
+
+
+def test_star_import():
+    """Tests that `from odherogrid import *` exports the names of the
+    lazily imported submodules, and that `import odherogrid` doesn't."""
+    code = (
+        "import sys\n"
+        "import odherogrid\n"
+        "print('httpx' in sys.modules)\n"
+        "from odherogrid import *\n"
+        "print(all(n in globals() for n in ['fetch_hero_stats', 'Bracket', 'main', 'Hero', 'odapi']))"
+    )
+    assert _run(code).stdout.split() == ["False", "True"]
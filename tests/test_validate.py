@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from odherogrid.herogrid import HeroGridConfig, get_hero_grid_config_path
+from odherogrid.validate import InvalidGrid, validate_grids
+
+from .synthetic import generate_hero_grid_config, make_hero_stats
+
+
+def test_validate_grids_valid():
+    hgc = generate_hero_grid_config(20)
+    grids, report = validate_grids(hgc["configs"])
+    assert report.ok
+    assert [g.to_json() for g in grids] == hgc["configs"]
+
+
+def test_validate_grids_repair():
+    configs = [
+        {"config_name": "a", "categories": [
+            {"category_name": "c", "x_position": "10", "y_position": None, 
+             "width": -5, "height": 180.0, "hero_ids": [1, "2", 3.0, "x", None]},
+            "not a category",
+        ]},
+        {"config_name": "a", "categories": [{"hero_ids": [1]}]},
+        {"categories": []},
+    ]
+    grids, report = validate_grids(configs, hero_ids={1, 2})
+    assert [g.config_name for g in grids] == ["a", "a (2)", "Unnamed Grid"]
+    c = grids[0].categories[0]
+    assert (c.x_position, c.y_position, c.width) == (10.0, 0.0, 5.0)
+    assert c.hero_ids == [1, 2, 3]
+    assert len(grids[0].categories) == 1
+    assert grids[1].categories[0].category_name == "Category 1"
+    assert report.repaired == ["a", "a (2)", "Unnamed Grid"]
+    assert report.unknown_hero_ids == [3]
+    assert not report.quarantined
+
+
+def test_validate_grids_non_finite_geometry():
+    """NaN and infinity (which Python's json module reads) can't be written
+    back as JSON, so they are replaced with the default geometry."""
+    configs = json.loads(
+        '[{"config_name": "a", "categories": [{"category_name": "c", "x_position": NaN, '
+        '"y_position": -Infinity, "width": "1e400", "height": 1e400, "hero_ids": [1]}]}]'
+    )
+    grids, report = validate_grids(configs)
+    c = grids[0].categories[0]
+    assert (c.x_position, c.y_position, c.width, c.height) == (0.0, 0.0, 1180.0, 180.0)
+    assert report.repaired == ["a"]
+    json.dumps([g.to_json() for g in grids], allow_nan=False)
+
+
+def test_validate_grids_quarantine():
+    configs = [
+        {"config_name": "good", "categories": []},
+        {"config_name": "bad", "categories": "none"},
+        ["not", "a", "grid"],
+    ]
+    grids, report = validate_grids(configs)
+    assert [g.config_name for g in grids] == ["good"]
+    assert report.quarantined == configs[1:]
+
+    with pytest.raises(InvalidGrid):
+        validate_grids({"configs": "not a list"})
+
+
+def _config(path) -> dict:
+    return {
+        "path": get_hero_grid_config_path(str(path)),
+        "brackets": [7],
+        "layout": 1,
+        "config_name": "test",
+        "ascending": False,
+    }
+
+
+def test_load_hero_grid_config_quarantine(tmp_path):
+    """Tests that valid grids are kept when some grids are broken."""
+    hgc = generate_hero_grid_config(5)
+    hgc["configs"].append({"config_name": "broken"})
+    (tmp_path / "hero_grid_config.json").write_text(json.dumps(hgc))
+
+    h = HeroGridConfig(make_hero_stats(10), _config(tmp_path))
+    assert len(h.hero_grid_config["configs"]) == 5
+    quarantined = list(tmp_path.glob("hero_grid_config_QUARANTINE_*.json"))
+    assert len(quarantined) == 1
+    assert json.loads(quarantined[0].read_text())["configs"] == [{"config_name": "broken"}]
+
+
+def test_load_hero_grid_config_malformed(tmp_path):
+    (tmp_path / "hero_grid_config.json").write_text("{not json")
+    h = HeroGridConfig(make_hero_stats(10), _config(tmp_path))
+    assert h.hero_grid_config == {"version": 3, "configs": []}
+    assert len(list(tmp_path.glob("hero_grid_config_INVALID_*.json"))) == 1
+
+
+def test_unknown_hero_ids_checked_when_heroes_are_set(tmp_path, capsys):
+    """The CLI loads hero_grid_config.json before the hero stats arrive
+    (`HeroGridConfig(None, ...)`), so hero IDs are checked by `set_heroes()`."""
+    hgc = generate_hero_grid_config(2, hero_ids=[1, 2, 99])
+    (tmp_path / "hero_grid_config.json").write_text(json.dumps(hgc))
+
+    h = HeroGridConfig(None, _config(tmp_path))
+    assert "Unknown hero IDs" not in capsys.readouterr().out
+    h.set_heroes(make_hero_stats(10))
+    assert "Unknown hero IDs (kept): 99" in capsys.readouterr().out
+
+    # Reported once, not for every stats refresh
+    h.set_heroes(make_hero_stats(10))
+    assert "Unknown hero IDs" not in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import json
+import sys
+
+import pytest
+
+from odherogrid.herogrid import HeroGridConfig
+from odherogrid.watch import IN_CLOSE_WRITE, GridWatcher, Inotify
+
+from .synthetic import make_hero_stats
+
+
+def _grid(name: str, hero_ids: list) -> dict:
+    return {
+        "config_name": name,
+        "categories": [
+            {
+                "category_name": "Heroes",
+                "x_position": 0.0,
+                "y_position": 0.0,
+                "width": 1180.0,
+                "height": 180.0,
+                "hero_ids": hero_ids,
+            }
+        ]
+    }
+
+
+@pytest.fixture
+def herogridconfig(tmp_path) -> HeroGridConfig:
+    path = tmp_path / "hero_grid_config.json"
+    path.write_text(json.dumps({
+        "version": 3, 
+        "configs": [_grid("a", [1, 2, 3]), _grid("b", [1, 2, 3])],
+    }))
+    config = {
+        "path": path,
+        "brackets": [7],
+        "layout": 1,
+        "config_name": "test",
+        "ascending": False,
+    }
+    return HeroGridConfig(make_hero_stats(10), config)
+
+
+def test_gridwatcher_on_change(herogridconfig):
+    """Tests that only edited grids are sorted."""
+    watcher = GridWatcher(herogridconfig)
+    assert watcher.on_change() == [] # nothing changed yet
+
+    # Simulate edit made by Dota 2 client
+    path = herogridconfig.path
+    hgc = json.loads(path.read_text())
+    hgc["configs"][1]["categories"][0]["hero_ids"] = [1, 2, 3, 4]
+    path.write_text(json.dumps(hgc))
+
+    edited = watcher.on_change()
+    assert [g["config_name"] for g in edited] == ["b"]
+    hgc = json.loads(path.read_text())
+    assert hgc["configs"][0]["categories"][0]["hero_ids"] == [1, 2, 3]
+    assert hgc["configs"][1]["categories"][0]["hero_ids"] == [4, 3, 2, 1]
+
+    # Our own write should not trigger sorting
+    assert watcher.on_change() == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify(tmp_path):
+    inotify = Inotify()
+    try:
+        inotify.add_watch(tmp_path, IN_CLOSE_WRITE)
+        (tmp_path / "hero_grid_config.json").write_text("{}")
+        assert inotify.read_events(1.0) == ["hero_grid_config.json"]
+        assert inotify.read_events(0) == []
+    finally:
+        inotify.close()